@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+#
+# Copyright (C) 2020 GreenWaves Technologies, SAS, ETH Zurich and University of Bologna
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+#
+# Measures the time taken by get_config on a synthetic system tree.
+# The default tree has 5 levels with a fan-out of 10, i.e. 11111 components, each one with a few
+# properties, and a wildcard option applied from the top.
+#
+# Usage: bench/gsystree_config.py [--depth 4] [--fanout 10] [--repeat 3]
+#
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models'))
+
+import gsystree
+
+
+class Bench_component(gsystree.Component):
+
+    def __init__(self, parent, name, depth, fanout, options=None):
+        super().__init__(parent, name, options=options)
+
+        for i in range(8):
+            self.add_property('p%d' % i, i)
+        self.add_property('d/e', {'f': [1, 2, 3]})
+
+        if depth > 0:
+            for i in range(fanout):
+                Bench_component(self, 'c%d' % i, depth - 1, fanout)
+
+
+parser = argparse.ArgumentParser(description='Benchmark system tree configuration generation')
+parser.add_argument('--depth', type=int, default=4, help='Depth of the tree below the top component')
+parser.add_argument('--fanout', type=int, default=10, help='Number of sub-components of each component')
+parser.add_argument('--repeat', type=int, default=3, help='Number of measures, the best one is reported')
+args = parser.parse_args()
+
+nb_components = sum([ args.fanout ** i for i in range(args.depth + 1) ])
+
+best = None
+for i in range(args.repeat):
+    top = Bench_component(None, None, args.depth, args.fanout, options=['**/p0=5'])
+    start = time.time()
+    top.get_config()
+    duration = time.time() - start
+    best = duration if best is None else min(best, duration)
+
+print('%d components: get_config %.3fs' % (nb_components, best))
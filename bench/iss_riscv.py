@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+
+#
+# Copyright (C) 2020 GreenWaves Technologies, SAS, ETH Zurich and University of Bologna
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+#
+# Measures the execution speed of the rv64imafdc ISS on a few synthetic workloads.
+# The ISS and a memory are compiled from this tree into the build directory, the same way the
+# Riscv class describes them, and are executed by the launcher of a GVSOC installation. The
+# program is generated here and preloaded in the memory, and ends with a semihosting exit.
+#
+# Workloads:
+#   loop:   a small loop with loads and stores, which stays in the instruction cache
+#   branch: calls to small functions which are all in different instruction pages, so that most
+#           instructions are reached through a page lookup
+#   decode: a long block of various instructions followed by a fence.i, which flushes the
+#           instruction cache, so that every instruction is decoded again at each iteration
+#
+# With --quantum, the ISS runs in loosely-timed mode and executes up to that number of instructions
+# each time it is activated. The option can be given several times, a quantum of 1 being the
+# default execution of one instruction per cycle.
+#
+# Usage: bench/iss_riscv.py --install-dir <gvsoc install dir> [--workload decode] [--quantum 64]
+#            [--decode-snapshot <dir>]
+#
+
+import argparse
+import concurrent.futures
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models'))
+
+import cpu.iss.isa_gen.isa_riscv_gen
+from cpu.iss.riscv import RiscvCommon
+from memory.memory import Memory
+
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+MEM_SIZE = 1 << 24
+SCRATCH_ADDR = 1 << 23
+# The program is not put at 0 since the prefetch buffer is reset to -1, which would make the first
+# instructions look like they are already in the buffer
+CODE_ADDR = 1 << 12
+
+
+class Program(object):
+
+    def __init__(self):
+        self.code = bytearray()
+        self.nb_insns = 0
+
+    def pc(self):
+        return CODE_ADDR + len(self.code)
+
+    def align(self, size):
+        self.code += bytes(-len(self.code) % size)
+
+    def emit(self, opcode):
+        self.code += opcode.to_bytes(4, 'little')
+
+    def emit_c(self, opcode):
+        self.code += opcode.to_bytes(2, 'little')
+
+    def r(self, funct7, funct3, opcode, rd, rs1, rs2):
+        self.emit((funct7 << 25) | (rs2 << 20) | (rs1 << 15) | (funct3 << 12) | (rd << 7) | opcode)
+
+    def i(self, funct3, opcode, rd, rs1, imm):
+        self.emit(((imm & 0xfff) << 20) | (rs1 << 15) | (funct3 << 12) | (rd << 7) | opcode)
+
+    def s(self, funct3, rs1, rs2, imm):
+        self.emit((((imm >> 5) & 0x7f) << 25) | (rs2 << 20) | (rs1 << 15) | (funct3 << 12) |
+            ((imm & 0x1f) << 7) | 0x23)
+
+    def b(self, funct3, rs1, rs2, target):
+        offset = target - self.pc()
+        self.emit((((offset >> 12) & 1) << 31) | (((offset >> 5) & 0x3f) << 25) | (rs2 << 20) |
+            (rs1 << 15) | (funct3 << 12) | (((offset >> 1) & 0xf) << 8) |
+            (((offset >> 11) & 1) << 7) | 0x63)
+
+    def jal(self, rd, target):
+        offset = target - self.pc()
+        self.emit((((offset >> 20) & 1) << 31) | (((offset >> 1) & 0x3ff) << 21) |
+            (((offset >> 11) & 1) << 20) | (((offset >> 12) & 0xff) << 12) | (rd << 7) | 0x6f)
+
+    def li(self, rd, value):
+        # Only for 32 bits positive values
+        upper = (value + 0x800) >> 12
+        self.emit((upper << 12) | (rd << 7) | 0x37)
+        self.i(0, 0x13, rd, rd, value - (upper << 12))
+        self.nb_insns += 2
+
+    def exit(self):
+        # Semihosting exit, with the status telling the application exited normally
+        self.i(0, 0x13, A0, 0, 0x18)
+        self.li(A1, 0x20026)
+        self.emit(0x01f01013)
+        self.emit(0x00100073)
+        self.emit(0x40705013)
+        self.nb_insns += 4
+
+
+# Registers
+RA, T0, T1, T2, S0, S1, A0, A1 = 1, 5, 6, 7, 8, 9, 10, 11
+
+# Registers which can be freely modified by the generated instructions
+FREE_REGS = [ T0, T1, T2 ] + list(range(12, 18)) + list(range(18, 28)) + list(range(28, 32))
+
+
+def gen_loop(args, iterations):
+    program = Program()
+    program.li(S0, iterations)
+    program.li(S1, SCRATCH_ADDR)
+
+    loop = program.pc()
+    program.i(3, 0x03, T0, S1, 0)                   # ld t0, 0(s1)
+    program.i(0, 0x13, T0, T0, 1)                   # addi t0, t0, 1
+    program.s(3, S1, T0, 0)                         # sd t0, 0(s1)
+    program.r(0, 0, 0x33, T1, T1, T0)               # add t1, t1, t0
+    program.r(0, 4, 0x33, T2, T2, T1)               # xor t2, t2, t1
+    program.i(0, 0x13, S0, S0, -1)                  # addi s0, s0, -1
+    program.b(1, S0, 0, loop)                       # bnez s0, loop
+    program.nb_insns += 7 * iterations
+
+    program.exit()
+    return program
+
+
+def gen_branch(args, iterations):
+    program = Program()
+    program.li(S0, iterations)
+
+    # The functions are put at the beginning of the pages following the main loop
+    pages = [ CODE_ADDR + (page << 12) for page in range(1, args.pages + 1) ]
+    random.Random(0).shuffle(pages)
+
+    loop = program.pc()
+    for page in pages:
+        program.jal(RA, page)
+    program.i(0, 0x13, S0, S0, -1)
+    program.b(1, S0, 0, loop)
+    program.exit()
+
+    for page in range(1, args.pages + 1):
+        program.align(1 << 12)
+        assert program.pc() == CODE_ADDR + (page << 12)
+        program.r(0, 0, 0x33, T1, T1, T0)           # add t1, t1, t0
+        program.i(0, 0x67, 0, RA, 0)                # ret
+
+    program.nb_insns += (args.pages * 3 + 2) * iterations
+    return program
+
+
+def gen_decode_insn(program, rand):
+    rd = rand.choice(FREE_REGS)
+    rs1 = rand.choice(FREE_REGS)
+    rs2 = rand.choice(FREE_REGS)
+    imm = rand.randrange(-2048, 2048)
+    kind = rand.randrange(12)
+
+    if kind == 0:
+        # add, sub, sll, slt, sltu, xor, srl, sra, or, and
+        funct3 = rand.randrange(8)
+        funct7 = rand.choice([0, 0x20]) if funct3 in [0, 5] else 0
+        program.r(funct7, funct3, 0x33, rd, rs1, rs2)
+    elif kind == 1:
+        # mul, mulh, mulhsu, mulhu, div, divu, rem, remu
+        program.r(1, rand.randrange(8), 0x33, rd, rs1, rs2)
+    elif kind == 2:
+        # addw, subw, sllw, srlw, sraw, mulw, divw
+        funct3, funct7 = rand.choice([(0, 0), (0, 0x20), (1, 0), (5, 0), (5, 0x20), (0, 1), (4, 1)])
+        program.r(funct7, funct3, 0x3b, rd, rs1, rs2)
+    elif kind == 3 or kind == 4:
+        # addi, slti, sltiu, xori, ori, andi, slli, srli, srai
+        funct3 = rand.randrange(8)
+        if funct3 == 1:
+            imm = rand.randrange(64)
+        elif funct3 == 5:
+            imm = rand.randrange(64) | rand.choice([0, 0x400])
+        program.i(funct3, 0x13, rd, rs1, imm)
+    elif kind == 5:
+        # addiw, slliw, srliw
+        funct3 = rand.choice([0, 1, 5])
+        program.i(funct3, 0x1b, rd, rs1, imm if funct3 == 0 else rand.randrange(32))
+    elif kind == 6:
+        # lb, lh, lw, ld, lbu, lhu, lwu
+        program.i(rand.choice([0, 1, 2, 3, 4, 5, 6]), 0x03, rd, S1, rand.randrange(256) * 8)
+    elif kind == 7:
+        # sb, sh, sw, sd
+        program.s(rand.randrange(4), S1, rs2, rand.randrange(256) * 8)
+    elif kind == 8:
+        # lui, auipc
+        program.emit((rand.randrange(1 << 20) << 12) | (rd << 7) | rand.choice([0x37, 0x17]))
+    elif kind == 9:
+        # Branches to the next instruction
+        program.b(rand.choice([0, 1, 4, 5, 6, 7]), rs1, rs2, program.pc() + 4)
+    else:
+        # c.addi, c.li, c.slli, c.mv, c.add, emitted by pairs to keep the alignment
+        for i in range(2):
+            imm = rand.randrange(1, 32)
+            program.emit_c(rand.choice([
+                (imm << 2) | (rd << 7) | 0x1,
+                0x4000 | (imm << 2) | (rd << 7) | 0x1,
+                (imm << 2) | (rd << 7) | 0x2,
+                0x8000 | (rs2 << 2) | (rd << 7) | 0x2,
+                0x9000 | (rs2 << 2) | (rd << 7) | 0x2,
+            ]))
+        return 2
+
+    return 1
+
+
+def gen_decode(args, iterations):
+    program = Program()
+    program.li(S0, iterations)
+    program.li(S1, SCRATCH_ADDR)
+
+    rand = random.Random(0)
+    loop = program.pc()
+    nb_insns = 0
+    while nb_insns < args.decode_size:
+        nb_insns += gen_decode_insn(program, rand)
+
+    program.emit(0x0000100f)                        # fence.i
+    program.i(0, 0x13, S0, S0, -1)                  # addi s0, s0, -1
+    # The loop is too long for a branch, the branch is skipping a jump instead
+    program.b(0, S0, 0, program.pc() + 8)           # beqz s0, exit
+    program.jal(0, loop)
+    program.nb_insns += (nb_insns + 4) * iterations - 1
+
+    program.exit()
+    return program
+
+
+workloads = {
+    'loop': gen_loop,
+    'branch': gen_branch,
+    'decode': gen_decode,
+}
+
+default_iterations = {
+    'loop': 10000000,
+    'branch': 500000,
+    'decode': 500,
+}
+
+
+def get_iss(quantum=None):
+    isa = cpu.iss.isa_gen.isa_riscv_gen.RiscvIsa('rv64imafdc', 'rv64imafdc')
+
+    # Same core as the Riscv class, except for the wrapper
+    return RiscvCommon(None, 'iss', isa=isa, riscv_exceptions=True, riscv_dbg_unit=True, mmu=True,
+        pmp=True, fetch_enable=True, boot_addr=CODE_ADDR, internal_atomics=True, supervisor=True,
+        user=True, timed=False, quantum=quantum,
+        wrapper=os.path.join(ROOT_DIR, 'bench', 'iss_wrapper.cpp'),
+        cflags=[ '-DPIPELINE_STAGES=2', '-DCONFIG_ISS_CORE=riscv' ])
+
+
+def compile_source(args, source, flags, obj):
+    if source.endswith('.c'):
+        command = [ args.cc ] + flags
+    else:
+        command = [ args.cxx, '-std=c++17' ] + flags
+
+    subprocess.run(command + [ '-c', source, '-o', obj ], check=True)
+
+
+def build_model(args, comp, name, builddir):
+    models_dir = os.path.join(ROOT_DIR, 'models')
+    flags = [ '-O3', '-fPIC', '-D__GVSOC__' ] + comp.c_flags + [
+        '-I' + os.path.join(ROOT_DIR, 'engine', 'include'),
+        '-I' + models_dir,
+        '-I' + os.path.join(models_dir, 'cpu', 'iss', 'include'),
+        '-I' + os.path.join(models_dir, 'cpu', 'iss', 'flexfloat'),
+        '-I' + builddir
+    ]
+
+    objs = []
+    with concurrent.futures.ThreadPoolExecutor(args.jobs) as executor:
+        futures = []
+        for source in comp.sources:
+            if os.path.exists(os.path.join(builddir, source)):
+                path = os.path.join(builddir, source)
+            else:
+                path = os.path.join(models_dir, source)
+            obj = os.path.join(builddir, name + '_' + source.replace('/', '_') + '.o')
+            objs.append(obj)
+            futures.append(executor.submit(compile_source, args, path, flags, obj))
+
+        for future in futures:
+            future.result()
+
+    path = os.path.join(builddir, 'models', 'bench', name + '.so')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    lib_dir = os.path.join(args.install_dir, 'lib')
+    subprocess.run([ args.cxx, '-shared', '-o', path ] + objs +
+        [ '-L' + lib_dir, '-Wl,-rpath,' + lib_dir, '-lgvsoc' ], check=True)
+
+    return 'bench.' + name
+
+
+def build(args):
+    os.makedirs(args.build_dir, exist_ok=True)
+
+    iss = get_iss()
+    iss.isa.gen(iss, args.build_dir, args.build_dir)
+    build_model(args, iss, 'iss', args.build_dir)
+    build_model(args, Memory(None, 'mem', size=MEM_SIZE), 'memory', args.build_dir)
+
+
+def get_config(args, binary, quantum, decode_snapshot):
+    iss = get_iss(quantum)
+    iss_config = iss.properties.copy()
+    iss_config['vp_component'] = 'bench.iss'
+    iss_config['binaries'] = [ binary ]
+    if decode_snapshot is not None:
+        iss_config['decode_snapshot'] = decode_snapshot
+
+    mem_config = Memory(None, 'mem', size=MEM_SIZE, stim_file=binary).properties.copy()
+    mem_config['vp_component'] = 'bench.memory'
+
+    # The ISS has its own clock port, so it must be clocked through a composite
+    return {
+        'target': {
+            'clock': { 'vp_component': 'vp.clock_domain_impl', 'frequency': 100000000 },
+            'soc': {
+                'vp_component': 'utils.composite_impl',
+                'iss': iss_config,
+                'mem': mem_config,
+                'components': [ 'iss', 'mem' ],
+                'bindings': [
+                    [ 'iss->fetch', 'mem->input' ],
+                    [ 'iss->data', 'mem->input' ]
+                ]
+            },
+            'components': [ 'clock', 'soc' ],
+            'bindings': [
+                [ 'clock->out', 'soc->clock' ]
+            ],
+            'gvsoc': {
+                'proxy': { 'enabled': False },
+                'include_dirs': [ os.path.join(args.build_dir, 'models'),
+                    os.path.join(args.install_dir, 'models') ],
+                'werror': True,
+                'verbose': False,
+                'debug-mode': False,
+                'events': { 'enabled': False, 'include_raw': [], 'include_regex': [],
+                    'exclude_regex': [], 'format': 'fst', 'active': False, 'all': True,
+                    'gtkw': False, 'files': [], 'traces': {}, 'tags': [] },
+                'traces': { 'level': 'debug', 'format': 'long', 'enabled': False,
+                    'include_regex': [], 'exclude_regex': [] }
+            }
+        }
+    }
+
+
+def run(args, config_path):
+    launcher = os.path.join(args.install_dir, 'bin', 'gvsoc_launcher')
+    start = time.time()
+    subprocess.run([ launcher, '--config=' + config_path ], check=True)
+    return time.time() - start
+
+
+def measure(args, workload, iterations, quantum):
+    binary = os.path.join(args.build_dir, workload + '.bin')
+    program = workloads[workload](args, iterations)
+    with open(binary, 'wb') as file:
+        file.write(bytes(CODE_ADDR) + program.code)
+
+    config_path = os.path.join(args.build_dir, workload + '.json')
+    with open(config_path, 'w') as file:
+        json.dump(get_config(args, binary, quantum, args.decode_snapshot), file)
+
+    if args.decode_snapshot is not None:
+        # The first run creates the snapshot and is reported on its own
+        shutil.rmtree(args.decode_snapshot, ignore_errors=True)
+        os.makedirs(args.decode_snapshot)
+        report(workload, quantum, 'first run', program.nb_insns, run(args, config_path))
+
+    best = min([ run(args, config_path) for i in range(args.repeat) ])
+    report(workload, quantum, 'snapshot' if args.decode_snapshot is not None else '',
+        program.nb_insns, best)
+
+
+def report(workload, quantum, mode, nb_insns, elapsed):
+    print('%-6s quantum %-4s %-9s %d instructions: %.3f s, %.1f MIPS' % (workload,
+        quantum if quantum is not None else '-', mode, nb_insns, elapsed, nb_insns / elapsed / 1e6))
+
+
+parser = argparse.ArgumentParser(description='Benchmark the ISS execution speed')
+parser.add_argument('--install-dir', required=True, help='GVSOC installation directory')
+parser.add_argument('--build-dir', default='build/bench', help='Directory where the ISS is built')
+parser.add_argument('--no-build', action='store_true', help='Reuse the ISS already built')
+parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='Number of parallel compilations')
+parser.add_argument('--cc', default='gcc', help='C compiler')
+parser.add_argument('--cxx', default='g++', help='C++ compiler')
+parser.add_argument('--workload', action='append', choices=workloads.keys(), help='Workload to measure, all by default')
+parser.add_argument('--iterations', type=int, default=None, help='Number of iterations of the workload, which depends on the workload by default')
+parser.add_argument('--pages', type=int, default=48, help='Number of instruction pages for the branch workload')
+parser.add_argument('--decode-size', type=int, default=16384, help='Number of instructions for the decode workload')
+parser.add_argument('--quantum', type=int, action='append', help='ISS quantum, one instruction per cycle by default')
+parser.add_argument('--decode-snapshot', default=None, help='Directory for the decoder snapshot, disabled by default')
+parser.add_argument('--repeat', type=int, default=3, help='Number of measures, the best one is reported')
+args = parser.parse_args()
+
+args.build_dir = os.path.abspath(args.build_dir)
+
+if not args.no_build:
+    build(args)
+
+for workload in args.workload if args.workload is not None else workloads.keys():
+    iterations = args.iterations if args.iterations is not None else default_iterations[workload]
+    for quantum in args.quantum if args.quantum is not None else [ None ]:
+        measure(args, workload, iterations, quantum)
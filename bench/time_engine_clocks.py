@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+#
+# Copyright (C) 2020 GreenWaves Technologies, SAS, ETH Zurich and University of Bologna
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+#
+# Measures the time engine scheduling cost with many clock domains.
+# Each clock domain has a co-prime period and clocks a clock generator which has an event on every
+# cycle, so that the time engine has to reschedule a different clock domain at almost every step.
+# The simulation is executed for the same duration with each time engine client queue.
+#
+# Usage: bench/time_engine_clocks.py --install-dir <gvsoc install dir> [--clocks 256] [--duration 100000000]
+#
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models'))
+
+from gv.gvsoc_control import Proxy
+
+
+def get_periods(nb):
+    # Prime periods in picoseconds, starting at 1ns, so that all the clock domains are co-prime
+    periods = []
+    period = 1000
+    while len(periods) < nb:
+        period += 1
+        if all(period % i != 0 for i in range(2, int(period ** 0.5) + 1)):
+            periods.append(period)
+    return periods
+
+
+def get_config(args, queue):
+    target = { 'components': [], 'bindings': [] }
+
+    for i, period in enumerate(get_periods(args.clocks)):
+        # The clock generator only enables its event when its output is bound, which is done with a
+        # clock domain in the same domain, which does not clock anything
+        target['clock%d' % i] = { 'vp_component': 'vp.clock_domain_impl', 'frequency': 10**12 // period }
+        target['gen%d' % i] = { 'vp_component': 'utils.clock_impl', 'powerup_time': 0 }
+        target['sink%d' % i] = { 'vp_component': 'vp.clock_domain_impl', 'frequency': 10**12 // period }
+        target['components'] += [ 'clock%d' % i, 'gen%d' % i, 'sink%d' % i ]
+        target['bindings'] += [
+            [ 'clock%d->out' % i, 'gen%d->clock' % i ],
+            [ 'clock%d->out' % i, 'sink%d->clock' % i ],
+            [ 'gen%d->clock_sync' % i, 'sink%d->clock_in' % i ]
+        ]
+
+    target['gvsoc'] = {
+        'proxy': { 'enabled': True, 'port': 0 },
+        'include_dirs': [ os.path.join(args.install_dir, 'models') ],
+        'werror': True,
+        'verbose': False,
+        'debug-mode': False,
+        'events': { 'enabled': False, 'include_raw': [], 'include_regex': [], 'exclude_regex': [],
+            'format': 'fst', 'active': False, 'all': True, 'gtkw': False, 'files': [],
+            'traces': {}, 'tags': [] },
+        'traces': { 'level': 'debug', 'format': 'long', 'enabled': False, 'include_regex': [],
+            'exclude_regex': [] },
+        'time_engine': { 'queue': queue }
+    }
+
+    return { 'target': target }
+
+
+def measure(args, queue):
+    with tempfile.NamedTemporaryFile('w', suffix='.json') as config_file:
+        json.dump(get_config(args, queue), config_file)
+        config_file.flush()
+
+        launcher = os.path.join(args.install_dir, 'bin', 'gvsoc_launcher')
+        process = subprocess.Popen([ 'stdbuf', '-oL', launcher, '--config=' + config_file.name ],
+            stdout=subprocess.PIPE, text=True)
+
+        try:
+            line = process.stdout.readline()
+            port = re.search(r'Opened proxy on socket (\d+)', line)
+            if port is None:
+                raise RuntimeError('Failed to launch GVSOC: ' + line)
+
+            proxy = Proxy('localhost', int(port.group(1)))
+            proxy.register_exit_callback(lambda status: None)
+
+            best = None
+            for i in range(args.repeat):
+                start = time.time()
+                proxy.run(args.duration)
+                elapsed = time.time() - start
+                if best is None or elapsed < best:
+                    best = elapsed
+
+            proxy.quit(0)
+        finally:
+            process.kill()
+            process.wait()
+
+    return best
+
+
+parser = argparse.ArgumentParser(description='Benchmark the time engine with many clock domains')
+parser.add_argument('--install-dir', required=True, help='GVSOC installation directory')
+parser.add_argument('--clocks', type=int, default=256, help='Number of clock domains')
+parser.add_argument('--duration', type=int, default=100000000, help='Simulated duration of each measure, in picoseconds')
+parser.add_argument('--repeat', type=int, default=3, help='Number of measures, the best one is reported')
+parser.add_argument('--queue', action='append', help='Time engine client queue to measure, list and heap by default')
+args = parser.parse_args()
+
+# Each clock generator has an event on every cycle
+nb_events = sum([ args.duration // period for period in get_periods(args.clocks) ])
+
+for queue in args.queue if args.queue is not None else [ 'list', 'heap' ]:
+    elapsed = measure(args, queue)
+    print('%-5s %d clocks, %d events: %.3f s, %.1f ns per event' % (queue, args.clocks, nb_events,
+        elapsed, elapsed * 1e9 / nb_events))
@@ -0,0 +1,86 @@
+/*
+ * Copyright (C) 2020 GreenWaves Technologies, SAS, ETH Zurich and University of Bologna
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+/*
+ * Authors: Germain Haugou, GreenWaves Technologies (germain.haugou@greenwaves-technologies.com)
+ */
+
+#pragma once
+
+#include <stdint.h>
+#include <string>
+#include <vector>
+#include <map>
+
+namespace vp {
+
+    class component;
+
+    /*
+     * Archive containing the state of a whole simulation.
+     *
+     * A checkpoint is a directory containing the archive, with one section per component
+     * identified by its path, and additional files for big data like memory images.
+     * Components are saving and restoring their state with the same sequence of io calls, so
+     * that a single method handles both directions. Any error is reported with a
+     * std::runtime_error exception.
+     */
+    class checkpoint
+    {
+    public:
+        checkpoint(component *top, std::string path, bool is_restore);
+
+        inline bool is_restore() { return this->restore; }
+        inline std::string get_path() { return this->path; }
+
+        // Reads the archive from the checkpoint directory, must be called before restoring
+        void load();
+        // Writes the archive to the checkpoint directory, once everything has been saved
+        void save();
+
+        // Selects the section where the next io calls are done. Closing a section being restored
+        // checks that it has been fully read, to detect architecture mismatches.
+        void section_open(std::string name);
+        void section_close();
+
+        // Saves or restores raw data in the current section
+        void io(void *data, size_t size);
+        template<typename T> inline void io(T &value) { this->io((void *)&value, sizeof(T)); }
+        void io(std::string &value);
+
+        // Gives the path of a file of the checkpoint directory, for data which is too big to be
+        // put in the archive, like memory images
+        std::string file_path(std::string section, std::string name);
+
+        // Returns the component with the specified path, used to find back components referenced
+        // from other sections
+        component *component_get(std::string path);
+
+    private:
+        void component_register(component *comp);
+
+        component *top;
+        std::string path;
+        bool restore;
+        std::map<std::string, std::string> sections;
+        std::vector<std::string> sections_order;
+        std::string *current = NULL;
+        std::string current_name;
+        size_t current_pos;
+        std::map<std::string, component *> components;
+    };
+
+};
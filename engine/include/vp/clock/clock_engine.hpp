@@ -101,9 +101,43 @@ namespace vp {
 
     bool has_events() { return this->nb_enqueued_to_cycle || this->delayed_queue || this->permanent_first; }
 
+    void checkpoint_io(vp::checkpoint *ckpt);
+
+    // Removes all pending events without executing them. This is done on all clock engines before
+    // restoring a checkpoint, since the events are restored by the engine where they were pending
+    // when the checkpoint was saved.
+    void events_clear();
+
   protected:
 
-    clock_event *event_queue[CLOCK_EVENT_QUEUE_SIZE];
+    // Events are kept in circular doubly-linked lists, so that they can be removed in
+    // constant time.
+    inline void event_list_push(clock_event **list, clock_event *event);
+    inline void event_list_insert_before(clock_event **list, clock_event *current, clock_event *event);
+    inline void event_list_remove(clock_event *event);
+
+    void wheel_insert(clock_event *event);
+    void wheel_advance(int64_t cycle);
+    clock_event *wheel_first();
+
+    inline void event_exec_profiled(vp::profiler *profiler, clock_event *event);
+
+    inline int64_t stall_skip_get();
+    void stall_skip_stop(bool from_exec);
+
+    void checkpoint_event_io(vp::checkpoint *ckpt, clock_event **event);
+
+    // Hierarchical timing wheel. Level N has slots of CLOCK_EVENT_QUEUE_SIZE^N cycles and contains
+    // the events which are in the same slot of level N+1 as the wheel base cycle. Events are pushed
+    // at the head of their slot, so that, as with a sorted list, the events of the same cycle are
+    // executed from the last enqueued one. The slots of the base cycle are redistributed to the
+    // lower levels when the base moves forward.
+    clock_event *event_wheel[CLOCK_EVENT_WHEEL_LEVELS][CLOCK_EVENT_QUEUE_SIZE];
+    // One bit per wheel slot, set when the slot is not empty, so that the next event is found
+    // without going through the slots. This assumes CLOCK_EVENT_QUEUE_SIZE is 32.
+    uint32_t wheel_occupancy[CLOCK_EVENT_WHEEL_LEVELS];
+    int64_t wheel_base = 0;
+    // Events beyond the wheel, sorted by cycle
     clock_event *delayed_queue = NULL;
     clock_event *permanent_first = NULL;
     int current_cycle = 0;
@@ -116,7 +150,7 @@ namespace vp {
     // engine is updated by an external interaction.
     int64_t cycles = 0;
 
-    // Tells how many events are enqueued to the circular buffer.
+    // Tells how many events are enqueued to the timing wheel.
     // If it is zero, there could still be some events in the delayed queue.
     int nb_enqueued_to_cycle = 0;
 
@@ -128,6 +162,14 @@ namespace vp {
     // external event.
     int64_t stop_time = 0;
 
+    // True when all the permanent events are stalled and the engine is not executed until the
+    // first one is active again. The cycles are then updated from the time, as when there is no
+    // permanent event, and the skipped cycles are removed from the events stall cycles when the
+    // engine is executed again or when something happens on it.
+    bool stall_skip = false;
+    // Cycle where the engine started skipping cycles
+    int64_t stall_skip_cycles = 0;
+
     vp::trace cycles_trace;
   };    
 
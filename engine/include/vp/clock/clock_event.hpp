@@ -33,8 +33,12 @@ namespace vp {
 
   #define CLOCK_EVENT_PAYLOAD_SIZE 64
   #define CLOCK_EVENT_NB_ARGS 8
-  #define CLOCK_EVENT_QUEUE_SIZE 32
+  #define CLOCK_EVENT_QUEUE_BITS 5
+  #define CLOCK_EVENT_QUEUE_SIZE (1 << CLOCK_EVENT_QUEUE_BITS)
   #define CLOCK_EVENT_QUEUE_MASK (CLOCK_EVENT_QUEUE_SIZE - 1)
+  // Number of levels of the timing wheel. Events further away than what the wheel can cover
+  // go into the sorted delayed queue.
+  #define CLOCK_EVENT_WHEEL_LEVELS 4
 
   typedef void (clock_event_meth_t)(void *, clock_event *event);
 
@@ -71,6 +75,7 @@ namespace vp {
     inline void disable();
 
     inline void meth_set(void *_this, clock_event_meth_t *meth) { this->_this = _this; this->meth = meth; }
+    inline clock_event_meth_t *meth_get() { return this->meth; }
 
     inline void stall_cycle_inc(int64_t inc) { this->stall_cycle += inc; }
     inline void stall_cycle_set(int64_t value) { this->stall_cycle = value; }
@@ -84,6 +89,10 @@ namespace vp {
     clock_event_meth_t *meth;
     clock_event *next;
     clock_event *prev;
+    // Head of the list where the event is enqueued and the clock engine owning it, so that it
+    // can be removed without searching it. The list is NULL for permanent events.
+    clock_event **queue;
+    clock_engine *queue_clock;
     bool enqueued;
     int64_t cycle;
     int64_t stall_cycle;
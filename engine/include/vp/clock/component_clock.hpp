@@ -39,6 +39,8 @@ namespace vp {
   class component_clock
   {
 
+    friend class clock_engine;
+
   public:
 
     static void clk_reg(component *_this, component *clock);
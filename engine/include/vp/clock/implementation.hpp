@@ -92,7 +92,7 @@ inline vp::time_engine *vp::component_clock::get_engine()
 
 inline void vp::clock_engine::sync()
 {
-  if (!is_running() && this->permanent_first == NULL)
+  if (!is_running() && (this->permanent_first == NULL || this->stall_skip))
   {
     this->update();
   }
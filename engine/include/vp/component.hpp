@@ -61,6 +61,7 @@ namespace vp {
   class component;
   class signal;
   class trace_domain;
+  class checkpoint;
 
 
   class Notifier {
@@ -94,10 +95,24 @@ namespace vp {
 
     virtual void dump_traces(FILE *file) {}
 
+    // Saves or restores the component state. The same sequence of io calls must be done in both
+    // directions. Registers declared with new_reg and pending clock events are already handled
+    // by the framework.
+    virtual void checkpoint_io(vp::checkpoint *ckpt) {}
+
     std::string get_component_path(std::string);
 
     void dump_traces_recursive(FILE *file);
 
+    void checkpoint_io_all(vp::checkpoint *ckpt);
+    // Throws a std::runtime_error if any component of the hierarchy does not support checkpoints
+    void checkpoint_check_all();
+
+    // Must be called from the build method of components whose state can not be saved, like
+    // models connected to the host, so that checkpoints of architectures containing them are
+    // refused instead of being silently restored in their reset state.
+    void checkpoint_unsupported() { this->checkpoint_supported = false; }
+
     component *get_parent() { return this->parent; }
     inline js::config *get_js_config() { return comp_js_config; }
 
@@ -239,6 +254,7 @@ namespace vp {
     bool reset_done_from_itf;
 
     time_engine *time_engine_ptr = NULL;
+    bool checkpoint_supported = true;
     Gvsoc_launcher *launcher;
   };
 
@@ -26,6 +26,7 @@
 #include <mutex>
 #include <condition_variable>
 #include <queue>
+#include <sys/types.h>
 
 
 class Gvsoc_launcher : public gv::Gvsoc
@@ -75,8 +76,15 @@ public:
 
     vp::top *top_get() { return this->handler; }
 
+    // Forks the simulation, must be called with the engine locked. As for fork, this returns the
+    // pid of the child in the parent and 0 in the child, where only the calling thread exists.
+    pid_t fork();
+    // Takes the role of the main thread in a forked simulation, until the simulation is over
+    void fork_main();
+
 private:
     void engine_routine();
+    void fork_engine_routine();
     static void *signal_routine(void *__this);
 
     gv::GvsocConf *conf;
@@ -92,4 +100,5 @@ private:
     Gv_proxy *proxy;
     bool running = false;
     bool run_req = false;
+    std::vector<pid_t> fork_pids;
 };
@@ -0,0 +1,102 @@
+/*
+ * Copyright (C) 2020 GreenWaves Technologies, SAS, ETH Zurich and University of Bologna
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+/*
+ * Authors: Germain Haugou, GreenWaves Technologies (germain.haugou@greenwaves-technologies.com)
+ */
+
+#pragma once
+
+#include <stdint.h>
+#include <time.h>
+#include <string>
+#include <vector>
+#include <unordered_map>
+
+namespace vp {
+
+    class component;
+
+    class profiler_stats
+    {
+    public:
+        int64_t count = 0;
+        int64_t ns = 0;
+    };
+
+    /*
+     * Host time profiler, enabled with the profiling/enabled property.
+     *
+     * The engines are calling enter before executing a callback of a component, and leave after,
+     * so that the number of callbacks and the host time spent in them are accounted per component.
+     * The time of nested callbacks is only accounted to the innermost one, so that clock engines
+     * only get the time of the scheduling and not the time of the events they execute.
+     * Each time engine partition has its own profiler, since it executes on its own thread.
+     */
+    class profiler
+    {
+    public:
+        inline profiler_stats *enter(component *comp);
+        inline void leave(profiler_stats *prev);
+
+        // Returns the report of the specified profilers, sorted by decreasing host time, either as
+        // a text table or as a JSON object keyed by component path
+        static std::string report(std::vector<profiler *> profilers, bool json);
+
+    private:
+        static inline int64_t get_ns();
+        inline void account(int64_t now);
+
+        std::unordered_map<component *, profiler_stats> stats;
+        profiler_stats *current = NULL;
+        int64_t start = 0;
+    };
+
+};
+
+
+inline int64_t vp::profiler::get_ns()
+{
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (int64_t)ts.tv_sec * 1000000000 + ts.tv_nsec;
+}
+
+inline void vp::profiler::account(int64_t now)
+{
+    if (this->current)
+    {
+        this->current->ns += now - this->start;
+    }
+    this->start = now;
+}
+
+inline vp::profiler_stats *vp::profiler::enter(component *comp)
+{
+    this->account(get_ns());
+
+    profiler_stats *prev = this->current;
+    // Pointers to unordered_map elements stay valid when new elements are inserted
+    this->current = &this->stats[comp];
+    this->current->count++;
+    return prev;
+}
+
+inline void vp::profiler::leave(profiler_stats *prev)
+{
+    this->account(get_ns());
+    this->current = prev;
+}
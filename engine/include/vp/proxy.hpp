@@ -19,9 +19,26 @@
 #define __VP_PROXY_HPP__
 
 #include <mutex>
+#include <set>
 
 class Gvsoc_launcher;
 
+// Binary protocol, negotiated by a client with the text command "protocol binary".
+// Requests and replies are frames made of this header followed by size bytes. A command frame
+// contains the command, which can be followed by a raw payload read by the command itself, as with
+// the text protocol. Notifications are sent with request -1.
+#define GV_PROXY_FRAME_CMD     0
+#define GV_PROXY_FRAME_REPLY   1
+#define GV_PROXY_FRAME_PAYLOAD 2
+#define GV_PROXY_FRAME_EXIT    3
+
+typedef struct
+{
+    int32_t req;
+    uint32_t type;
+    uint32_t size;
+} __attribute__((packed)) gv_proxy_frame_t;
+
 class Gv_proxy : vp::Notifier
 {
   public:
@@ -31,6 +48,7 @@ class Gv_proxy : vp::Notifier
     void notify_stop(int64_t time);
     void notify_run(int64_t time);
     bool send_payload(FILE *reply_file, std::string req, uint8_t *payload, int size);
+    void reply(FILE *reply_file, std::string req, std::string msg);
     
   private:
  
@@ -38,6 +56,10 @@ class Gv_proxy : vp::Notifier
     void listener(void);
     void proxy_loop(int, int);
     void send_reply(std::string msg);
+    bool send_frame(FILE *reply_file, std::string req, uint32_t type, const void *data, int size);
+    bool read_request(FILE *req_file, bool binary, std::string &req, std::string &cmd);
+    std::string fork(int nb);
+    void fork_child(int port_fd);
     
     int telnet_socket;
     int socket_port;
@@ -46,6 +68,8 @@ class Gv_proxy : vp::Notifier
     std::thread *listener_thread;
 
     std::vector<int> sockets;
+    // Sockets of the clients which switched to the binary protocol
+    std::set<int> binary_fds;
 
     vp::component *top;
     int req_pipe;
@@ -26,6 +26,10 @@
 #include "vp/component.hpp"
 #include "json.hpp"
 #include "gv/gvsoc.hpp"
+#include "vp/profiler.hpp"
+#include <vector>
+#include <map>
+#include <pthread.h>
 
 namespace vp
 {
@@ -37,7 +41,7 @@ class Time_engine_stop_event;
 class time_engine
 {
 public:
-    time_engine(component *top, js::config *config);
+    time_engine(component *top, js::config *config, time_engine *parent=NULL);
 
     void step_register(int64_t time);
 
@@ -82,13 +86,66 @@ public:
     void retain_inc(int inc);
     int retain_count() { return this->retain; }
 
+    // Partitions, used for conservative parallel simulation.
+    // A partition is a time engine executing its own clients on its own thread. Partitions are
+    // executed in windows whose size is bounded by the minimum latency of the links between them,
+    // registered with lookahead_register, so that none can receive an event inside its window.
+    time_engine *get_partition(std::string name);
+    time_engine *get_root() { return this->parent ? this->parent : this; }
+    bool is_partitioned() { return this->partitions.size() != 0; }
+    void lookahead_register(int64_t lookahead);
+    // Callbacks are called from the main thread at the end of each window, while all partitions
+    // are stopped, in registration order.
+    void partition_sync_register(void *_this, void (*meth)(void *));
+
+    // Checkpoints. They must be saved and restored while the engine is not executing events.
+    // Requests from components executing events are handled once the current timestamp is over.
+    void checkpoint_save(std::string path);
+    void checkpoint_restore(std::string path);
+    void checkpoint_req(std::string path);
+
+    // Restores the engine synchronization in a forked process, where only the thread which locked
+    // the engine and forked still exists.
+    void fork_child();
+
+    // Host time profiling, enabled with the profiling/enabled property. The profiler is NULL
+    // when profiling is disabled.
+    vp::profiler *profiler_get() { return this->profiler; }
+    std::string profiling_report(bool json);
+    void profiling_dump();
+
 private:
 
     int64_t exec();
+    int64_t exec_clients();
+    int64_t exec_partitions();
+    void partitions_start();
+    int64_t partitions_next_event_time();
+    static void *partition_routine(void *arg);
     void flush_all() {this->top->flush_all(); }
-
+    void checkpoint_io(vp::checkpoint *ckpt);
+    void checkpoint_handle();
+    void clients_resync();
+
+    // Client queue, ordered by next event time. It is either a linked list, which is the fastest
+    // with few clients, or a binary heap, which scales better with many clock domains.
+    inline time_engine_client *client_first();
+    inline void client_pop_first();
+    inline void client_push_first(time_engine_client *client);
+    inline void client_insert_after_first(time_engine_client *client);
+    void client_insert(time_engine_client *client);
+    void client_remove(time_engine_client *client);
+
+    inline bool client_heap_before(time_engine_client *a, time_engine_client *b);
+    void client_heap_push(time_engine_client *client, uint64_t seq);
+    void client_heap_remove(int index);
+    void client_heap_sift_up(int index);
+    void client_heap_sift_down(int index);
 
     time_engine_client *first_client = NULL;
+    bool use_client_heap = false;
+    std::vector<time_engine_client *> client_heap;
+    uint64_t client_heap_seq = 0;
 
 
     pthread_mutex_t lock_mutex;
@@ -105,8 +162,24 @@ private:
     bool stop_req = false;
     bool pause_req = false;
     gv::Gvsoc_user *launcher = NULL;
-    Time_engine_stop_event *stop_event;
+    Time_engine_stop_event *stop_event = NULL;
     int retain = 0;
+
+    // Partitions
+    time_engine *parent;
+    std::map<std::string, time_engine *> partitions_map;
+    std::vector<time_engine *> partitions;
+    std::vector<std::pair<void *, void (*)(void *)>> partition_sync_callbacks;
+    std::vector<pthread_t> partition_threads;
+    pthread_barrier_t partition_barrier;
+    int64_t partition_window = 1000000;
+    // Time where the current window ends, events at this time or later are not executed
+    int64_t window_end = INT64_MAX;
+
+    // Path of the checkpoint requested by a component, empty if none is pending
+    std::string checkpoint_path;
+
+    vp::profiler *profiler = NULL;
 };
 
 class time_engine_client : public component
@@ -145,6 +218,11 @@ protected:
     // anymore or when the client is enqueued to the engine.
     int64_t next_event_time = 0;
 
+    // Position in the engine heap and insertion order, used when the engine uses a heap for its
+    // clients
+    int heap_index;
+    uint64_t heap_seq;
+
     time_engine *engine;
     bool running = false;
     bool is_enqueued = false;
@@ -174,6 +252,12 @@ namespace vp
 
 inline void vp::time_engine::lock()
 {
+    // Partitions are only stopped by the main engine, between windows
+    if (this->parent)
+    {
+        return this->parent->lock();
+    }
+
     // Increase the number of lock request by one, so that the main engine loop leaves the critical loop
     // This needs to be protected as severall thread may try to lock at the same time.
     pthread_mutex_lock(&lock_mutex);
@@ -188,6 +272,11 @@ inline void vp::time_engine::lock()
 
 inline void vp::time_engine::unlock()
 {
+    if (this->parent)
+    {
+        return this->parent->unlock();
+    }
+
     pthread_mutex_lock(&lock_mutex);
     this->lock_req--;
     pthread_mutex_unlock(&lock_mutex);
@@ -224,7 +313,90 @@ inline void vp::time_engine::update(int64_t time)
 
 inline int64_t vp::time_engine::get_next_event_time()
 {
-    return this->first_client ? this->first_client->next_event_time : -1;
+    if (unlikely(this->is_partitioned()))
+    {
+        return this->partitions_next_event_time();
+    }
+
+    time_engine_client *first = this->client_first();
+    return first ? first->next_event_time : -1;
+}
+
+inline vp::time_engine_client *vp::time_engine::client_first()
+{
+    if (this->use_client_heap)
+    {
+        return this->client_heap.size() ? this->client_heap[0] : NULL;
+    }
+    return this->first_client;
+}
+
+inline void vp::time_engine::client_pop_first()
+{
+    if (this->use_client_heap)
+    {
+        this->client_heap_remove(0);
+    }
+    else
+    {
+        this->first_client = this->first_client->next;
+    }
+}
+
+inline void vp::time_engine::client_push_first(time_engine_client *client)
+{
+    // Only called for a client whose time is before all the others
+    if (this->use_client_heap)
+    {
+        this->client_heap_push(client, this->client_heap_seq++);
+    }
+    else
+    {
+        client->next = this->first_client;
+        this->first_client = client;
+    }
+}
+
+inline void vp::time_engine::client_insert_after_first(time_engine_client *client)
+{
+    // Only called for a client whose time is not before the first one
+    if (this->use_client_heap)
+    {
+        time_engine_client *first = this->client_heap[0];
+        if (first->next_event_time == client->next_event_time)
+        {
+            // The list puts the client right after the first one, before the other clients with
+            // the same time. The first one has the highest sequence number of its time, so the
+            // client takes it and the first one gets a new one, which keeps it at the top.
+            uint64_t seq = first->heap_seq;
+            first->heap_seq = this->client_heap_seq++;
+            this->client_heap_push(client, seq);
+        }
+        else
+        {
+            this->client_heap_push(client, this->client_heap_seq++);
+        }
+    }
+    else
+    {
+        time_engine_client *current = this->first_client->next, *prev = this->first_client;
+        while (current && current->next_event_time < client->next_event_time)
+        {
+            prev = current;
+            current = current->next;
+        }
+        client->next = current;
+        prev->next = client;
+    }
+}
+
+inline bool vp::time_engine::client_heap_before(time_engine_client *a, time_engine_client *b)
+{
+    // Clients with the same time are ordered by decreasing sequence number. New clients get the
+    // highest one, so that they go first as in the list, except when they are inserted after the
+    // first client, see client_insert_after_first.
+    return a->next_event_time < b->next_event_time ||
+        (a->next_event_time == b->next_event_time && a->heap_seq > b->heap_seq);
 }
 
 #endif
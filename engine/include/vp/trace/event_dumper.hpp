@@ -78,6 +78,8 @@ namespace vp {
     Event_trace *get_trace_string(string trace_name, string file_name);
     void close();
     void set_vcd_user(gv::Vcd_user *user);
+    // True if any event trace has been enabled since the beginning of the simulation
+    bool has_traces() { return this->event_traces.size() != 0; }
 
   private:
     std::map<std::string, Event_trace *> event_traces;
@@ -79,6 +79,12 @@ namespace vp {
     virtual void add_exclude_trace_path(int events, std::string path) {}
     virtual void check_traces() {}
 
+    // Used to fork the simulation. The dumper thread is first stopped once all events have been
+    // dumped, and is then resumed in the parent, or started again in the child.
+    void fork_prepare();
+    void fork_parent();
+    void fork_child();
+
     inline bool get_werror() { return this->werror; }
     inline bool is_warning_active(vp::trace::warning_type_e type) { return this->active_warnings[type]; }
 
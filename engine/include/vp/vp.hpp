@@ -28,3 +28,4 @@
 #include "vp/power/power_trace.hpp"
 #include "vp/power/power_source.hpp"
 #include "vp/power/power_table.hpp"
+#include "vp/checkpoint.hpp"
@@ -0,0 +1,259 @@
+/*
+ * Copyright (C) 2020 GreenWaves Technologies, SAS, ETH Zurich and
+ *                    University of Bologna
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+/*
+ * Authors: Germain Haugou, GreenWaves Technologies (germain.haugou@greenwaves-technologies.com)
+ */
+
+#include <vp/vp.hpp>
+#include <vp/checkpoint.hpp>
+#include <stdexcept>
+#include <string.h>
+#include <errno.h>
+#include <sys/stat.h>
+
+// Archive header, the version must be increased when the format of the archive changes
+#define CHECKPOINT_MAGIC "GVCKPT"
+#define CHECKPOINT_VERSION 1
+
+
+static void checkpoint_dir_create(std::string path)
+{
+    if (mkdir(path.c_str(), 0755) && errno != EEXIST)
+    {
+        throw std::runtime_error("Failed to create checkpoint directory (path: " + path +
+            ", error: " + strerror(errno) + ")");
+    }
+}
+
+
+
+vp::checkpoint::checkpoint(component *top, std::string path, bool is_restore)
+    : top(top), path(path), restore(is_restore)
+{
+}
+
+
+
+void vp::checkpoint::load()
+{
+    std::string archive_path = this->path + "/state.bin";
+    FILE *file = fopen(archive_path.c_str(), "rb");
+    if (file == NULL)
+    {
+        throw std::runtime_error("Failed to open checkpoint (path: " + archive_path + ", error: " +
+            strerror(errno) + ")");
+    }
+
+    char magic[sizeof(CHECKPOINT_MAGIC)];
+    uint32_t version;
+    if (fread(magic, 1, sizeof(magic), file) != sizeof(magic) ||
+        strcmp(magic, CHECKPOINT_MAGIC) != 0 ||
+        fread(&version, 1, sizeof(version), file) != sizeof(version) ||
+        version != CHECKPOINT_VERSION)
+    {
+        fclose(file);
+        throw std::runtime_error("Invalid checkpoint (path: " + archive_path + ")");
+    }
+
+    while (1)
+    {
+        uint32_t name_size;
+        uint64_t size;
+        if (fread(&name_size, 1, sizeof(name_size), file) != sizeof(name_size))
+        {
+            break;
+        }
+
+        std::string name(name_size, '\0');
+        if (fread(&name[0], 1, name_size, file) != name_size ||
+            fread(&size, 1, sizeof(size), file) != sizeof(size))
+        {
+            fclose(file);
+            throw std::runtime_error("Truncated checkpoint (path: " + archive_path + ")");
+        }
+
+        std::string &data = this->sections[name];
+        data.resize(size);
+        if (fread(&data[0], 1, size, file) != size)
+        {
+            fclose(file);
+            throw std::runtime_error("Truncated checkpoint (path: " + archive_path + ")");
+        }
+    }
+
+    fclose(file);
+}
+
+
+
+void vp::checkpoint::save()
+{
+    checkpoint_dir_create(this->path);
+
+    std::string archive_path = this->path + "/state.bin";
+    FILE *file = fopen(archive_path.c_str(), "wb");
+    if (file == NULL)
+    {
+        throw std::runtime_error("Failed to open checkpoint (path: " + archive_path + ", error: " +
+            strerror(errno) + ")");
+    }
+
+    uint32_t version = CHECKPOINT_VERSION;
+    bool error = fwrite(CHECKPOINT_MAGIC, 1, sizeof(CHECKPOINT_MAGIC), file) != sizeof(CHECKPOINT_MAGIC);
+    error |= fwrite(&version, 1, sizeof(version), file) != sizeof(version);
+
+    // Sections are dumped in the order they were saved to get reproducible archives
+    for (std::string &name: this->sections_order)
+    {
+        std::string &data = this->sections[name];
+        uint32_t name_size = name.size();
+        uint64_t size = data.size();
+        error |= fwrite(&name_size, 1, sizeof(name_size), file) != sizeof(name_size);
+        error |= fwrite(name.c_str(), 1, name_size, file) != name_size;
+        error |= fwrite(&size, 1, sizeof(size), file) != sizeof(size);
+        error |= fwrite(data.c_str(), 1, size, file) != size;
+    }
+
+    if (fclose(file) || error)
+    {
+        throw std::runtime_error("Failed to write checkpoint (path: " + archive_path + ")");
+    }
+}
+
+
+
+void vp::checkpoint::section_open(std::string name)
+{
+    if (this->restore)
+    {
+        auto it = this->sections.find(name);
+        if (it == this->sections.end())
+        {
+            throw std::runtime_error("Checkpoint does not contain any state for " + name);
+        }
+        this->current = &it->second;
+    }
+    else
+    {
+        if (this->sections.find(name) == this->sections.end())
+        {
+            this->sections_order.push_back(name);
+        }
+        this->current = &this->sections[name];
+        this->current->clear();
+    }
+
+    this->current_name = name;
+    this->current_pos = 0;
+}
+
+
+
+void vp::checkpoint::section_close()
+{
+    if (this->restore && this->current_pos != this->current->size())
+    {
+        throw std::runtime_error("Checkpoint state of " + this->current_name +
+            " does not match the architecture");
+    }
+
+    this->current = NULL;
+}
+
+
+
+void vp::checkpoint::io(void *data, size_t size)
+{
+    if (this->restore)
+    {
+        if (this->current_pos + size > this->current->size())
+        {
+            throw std::runtime_error("Checkpoint state of " + this->current_name +
+                " does not match the architecture");
+        }
+        memcpy(data, &(*this->current)[this->current_pos], size);
+        this->current_pos += size;
+    }
+    else
+    {
+        this->current->append((char *)data, size);
+    }
+}
+
+
+
+void vp::checkpoint::io(std::string &value)
+{
+    uint32_t size = value.size();
+    this->io(size);
+    if (this->restore)
+    {
+        value.resize(size);
+    }
+    this->io(&value[0], size);
+}
+
+
+
+std::string vp::checkpoint::file_path(std::string section, std::string name)
+{
+    // Files are written while components are saved, before the archive
+    if (!this->restore)
+    {
+        checkpoint_dir_create(this->path);
+    }
+
+    // Component paths are flattened so that all files are in the checkpoint directory
+    for (char &c: section)
+    {
+        if (c == '/')
+        {
+            c = '.';
+        }
+    }
+
+    return this->path + "/" + section.substr(section[0] == '.' ? 1 : 0) + "." + name;
+}
+
+
+
+void vp::checkpoint::component_register(component *comp)
+{
+    this->components[comp->get_path()] = comp;
+    for (vp::component *child: comp->get_childs())
+    {
+        this->component_register(child);
+    }
+}
+
+
+
+vp::component *vp::checkpoint::component_get(std::string path)
+{
+    if (this->components.size() == 0)
+    {
+        this->component_register(this->top);
+    }
+
+    auto it = this->components.find(path);
+    if (it == this->components.end())
+    {
+        throw std::runtime_error("Checkpoint refers to unknown component " + path);
+    }
+    return it->second;
+}
@@ -47,8 +47,198 @@
 #include <vp/signal.hpp>
 #include <sys/stat.h>
 
+inline void vp::clock_engine::event_list_push(vp::clock_event **list, vp::clock_event *event)
+{
+    vp::clock_event *first = *list;
+    if (first)
+    {
+        event->next = first;
+        event->prev = first->prev;
+        first->prev->next = event;
+        first->prev = event;
+    }
+    else
+    {
+        event->next = event;
+        event->prev = event;
+    }
+    event->queue = list;
+    event->queue_clock = this;
+    *list = event;
+}
+
+inline void vp::clock_engine::event_list_insert_before(vp::clock_event **list, vp::clock_event *current,
+    vp::clock_event *event)
+{
+    // Insert at the tail if current is NULL
+    vp::clock_event *first = *list;
+    if (current == first)
+    {
+        this->event_list_push(list, event);
+        return;
+    }
+    if (current == NULL)
+    {
+        current = first;
+    }
+    event->next = current;
+    event->prev = current->prev;
+    current->prev->next = event;
+    current->prev = event;
+    event->queue = list;
+    event->queue_clock = this;
+}
+
+inline void vp::clock_engine::event_list_remove(vp::clock_event *event)
+{
+    vp::clock_event **list = event->queue;
+    if (event->next == event)
+    {
+        *list = NULL;
+
+        if (list != &this->delayed_queue)
+        {
+            int index = list - &this->event_wheel[0][0];
+            this->wheel_occupancy[index >> CLOCK_EVENT_QUEUE_BITS] &= ~(1U << (index & CLOCK_EVENT_QUEUE_MASK));
+        }
+    }
+    else
+    {
+        event->prev->next = event->next;
+        event->next->prev = event->prev;
+        if (*list == event)
+        {
+            *list = event->next;
+        }
+    }
+}
+
+void vp::clock_engine::wheel_insert(vp::clock_event *event)
+{
+    int64_t cycle = event->cycle;
+
+    for (int level=0; level<CLOCK_EVENT_WHEEL_LEVELS; level++)
+    {
+        int shift = (level + 1) * CLOCK_EVENT_QUEUE_BITS;
+        if ((cycle >> shift) == (this->wheel_base >> shift))
+        {
+            int slot = (cycle >> (level * CLOCK_EVENT_QUEUE_BITS)) & CLOCK_EVENT_QUEUE_MASK;
+            this->event_list_push(&this->event_wheel[level][slot], event);
+            this->wheel_occupancy[level] |= 1U << slot;
+            this->nb_enqueued_to_cycle++;
+            return;
+        }
+    }
+
+    // The event is too far for the wheel, insert it into the delayed queue, before the events
+    // of the same cycle.
+    vp::clock_event *current = this->delayed_queue;
+    while (current && current->cycle < cycle)
+    {
+        current = current->next;
+        if (current == this->delayed_queue)
+        {
+            current = NULL;
+        }
+    }
+    this->event_list_insert_before(&this->delayed_queue, current, event);
+}
+
+void vp::clock_engine::wheel_advance(int64_t cycle)
+{
+    // This must only be called with a cycle which is not after the first event, so that the
+    // wheel slots which are now behind the base are empty.
+    int64_t base = this->wheel_base;
+    this->wheel_base = cycle;
+
+    int shift = CLOCK_EVENT_WHEEL_LEVELS * CLOCK_EVENT_QUEUE_BITS;
+    if ((cycle >> shift) != (base >> shift))
+    {
+        // Move from the delayed queue the events which now fall into the wheel. They are at the
+        // head of the queue, and are moved from the last one, so that the events of the same
+        // cycle keep their order.
+        vp::clock_event *last = NULL;
+        vp::clock_event *current = this->delayed_queue;
+        while (current && (current->cycle >> shift) == (cycle >> shift))
+        {
+            last = current;
+            current = current->next;
+            if (current == this->delayed_queue)
+            {
+                break;
+            }
+        }
+
+        while (last)
+        {
+            vp::clock_event *prev = last == this->delayed_queue ? NULL : last->prev;
+            this->event_list_remove(last);
+            this->wheel_insert(last);
+            last = prev;
+        }
+    }
+
+    // Then redistribute the slots of the new base, from the top level, so that the oldest events
+    // are moved first
+    for (int level=CLOCK_EVENT_WHEEL_LEVELS-1; level>0; level--)
+    {
+        shift = level * CLOCK_EVENT_QUEUE_BITS;
+        if ((cycle >> shift) != (base >> shift))
+        {
+            vp::clock_event **slot = &this->event_wheel[level][(cycle >> shift) & CLOCK_EVENT_QUEUE_MASK];
+            while (*slot)
+            {
+                vp::clock_event *last = (*slot)->prev;
+                this->event_list_remove(last);
+                this->nb_enqueued_to_cycle--;
+                this->wheel_insert(last);
+            }
+        }
+    }
+}
+
+vp::clock_event *vp::clock_engine::wheel_first()
+{
+    if (this->nb_enqueued_to_cycle)
+    {
+        // The slots before the base ones are always empty, and the slot of the base one is also
+        // empty for levels above 0 since its events are in the lower levels, so the first
+        // non-empty slot is directly the lowest bit set in the occupancy.
+        for (int level=0; level<CLOCK_EVENT_WHEEL_LEVELS; level++)
+        {
+            uint32_t occupancy = this->wheel_occupancy[level];
+            if (occupancy)
+            {
+                vp::clock_event *first = this->event_wheel[level][__builtin_ctz(occupancy)];
+                if (level == 0)
+                {
+                    return first;
+                }
+
+                // Upper level slots mix several cycles, take the first event of the lowest one
+                vp::clock_event *result = first;
+                for (vp::clock_event *event = first->next; event != first; event = event->next)
+                {
+                    if (event->cycle < result->cycle)
+                    {
+                        result = event;
+                    }
+                }
+                return result;
+            }
+        }
+    }
+
+    return this->delayed_queue;
+}
+
 vp::clock_event *vp::clock_engine::enable(vp::clock_event *event)
 {
+    if (unlikely(this->stall_skip))
+    {
+        this->stall_skip_stop(false);
+    }
+
     if (!event->enqueued)
     {
         if (event->stall_cycle == -1)
@@ -87,6 +277,7 @@ vp::clock_event *vp::clock_engine::enable(vp::clock_event *event)
             }
             event->enqueued = true;
             event->cycle = -1;
+            event->queue = NULL;
 
             this->permanent_first = event;
         }
@@ -97,6 +288,11 @@ vp::clock_event *vp::clock_engine::enable(vp::clock_event *event)
 
 void vp::clock_engine::disable(vp::clock_event *event)
 {
+    if (unlikely(this->stall_skip))
+    {
+        this->stall_skip_stop(false);
+    }
+
     if (event->enqueued)
     {
         // Since the event is enqueued in a list which may be being traveled, we cannot directly remove it.
@@ -123,6 +319,11 @@ void vp::clock_engine::reenqueue_to_engine()
 
 void vp::clock_engine::apply_frequency(int frequency)
 {
+    if (unlikely(this->stall_skip))
+    {
+        this->stall_skip_stop(false);
+    }
+
     // Update the number of cycles so that we update the event cycle only on the cycles after the frequency change
     // TODO this is breaking benchmarks
     // this->update();
@@ -180,6 +381,11 @@ vp::clock_event *vp::clock_engine::enqueue(vp::clock_event *event, int64_t cycle
     vp_assert(!event->enqueued, 0, "Enqueueing already enqueued event\n");
     // vp_assert(cycles > 0, 0, "Enqueueing event with 0 or negative cycles\n");
 
+    if (unlikely(this->stall_skip))
+    {
+        this->stall_skip_stop(false);
+    }
+
     event->enqueued = true;
 
     // That should not be needed but in practice, lots of models are pushing from one
@@ -195,50 +401,28 @@ vp::clock_event *vp::clock_engine::enqueue(vp::clock_event *event, int64_t cycle
         }
     }
 
-    vp::clock_event *current = delayed_queue, *prev = NULL;
     int64_t full_cycle = cycle + get_cycles();
 
-    while (current && current->cycle < full_cycle)
+    // The wheel cannot go back in time, this can only happen with events enqueued in the past
+    if (unlikely(full_cycle < this->wheel_base))
     {
-        prev = current;
-        current = current->next;
+        full_cycle = this->wheel_base;
     }
-    if (prev)
-        prev->next = event;
-    else
-        delayed_queue = event;
-    event->next = current;
+
     event->cycle = full_cycle;
+    this->wheel_insert(event);
 
     return event;
 }
 
 vp::clock_event *vp::clock_engine::get_next_event()
 {
-    // There is no quick way of getting the next event.
-    // We have to first check if there is an event in the circular buffer
-    // and if not in the delayed queue
-
     if (this->permanent_first)
     {
         return this->permanent_first;
     }
 
-    if (this->nb_enqueued_to_cycle)
-    {
-        for (int i = 0; i < CLOCK_EVENT_QUEUE_SIZE; i++)
-        {
-            int cycle = (current_cycle + i) & CLOCK_EVENT_QUEUE_MASK;
-            vp::clock_event *event = event_queue[cycle];
-            if (event)
-            {
-                return event;
-            }
-        }
-        // vp_assert(false, 0, "Didn't find any event in circular buffer while it is not empty\n");
-    }
-
-    return this->delayed_queue;
+    return this->wheel_first();
 }
 
 void vp::clock_engine::cancel(vp::clock_event *event)
@@ -246,61 +430,37 @@ void vp::clock_engine::cancel(vp::clock_event *event)
     if (!event->is_enqueued())
         return;
 
-    // There is no way to know if the event is enqueued into the circular buffer
-    // or in the delayed queue so first go through the delayed queue and if it is
-    // not found, look in the circular buffer
-
-    // First the delayed queue
-    vp::clock_event *current = delayed_queue, *prev = NULL;
-    while (current)
+    // Some models are canceling events through a different clock engine than the one where
+    // they were enqueued, forward it to the right one
+    if (event->queue != NULL && event->queue_clock != this)
     {
-        if (current == event)
-        {
-            if (prev)
-                prev->next = event->next;
-            else
-                delayed_queue = event->next;
-
-            goto end;
-        }
-
-        prev = current;
-        current = current->next;
+        event->queue_clock->cancel(event);
+        return;
     }
 
-    // Then in the circular buffer
-    for (int i = 0; i < CLOCK_EVENT_QUEUE_SIZE; i++)
+    // Permanent events are removed with disable
+    if (event->queue != NULL)
     {
-        vp::clock_event *current = event_queue[i], *prev = NULL;
-        while (current)
+        if (event->queue != &this->delayed_queue)
         {
-            if (current == event)
-            {
-                if (prev)
-                    prev->next = event->next;
-                else
-                    event_queue[i] = event->next;
-
-                this->nb_enqueued_to_cycle--;
-
-                goto end;
-            }
-
-            prev = current;
-            current = current->next;
+            this->nb_enqueued_to_cycle--;
         }
+        this->event_list_remove(event);
     }
 
-    // TODO some models are pushing events to a different one that that they belong to
-    // vp_assert(0, NULL, "Didn't find event in any queue while canceling event\n");
-
-end:
     event->enqueued = false;
 
     if (!this->has_events())
         this->dequeue_from_engine();
 }
 
+inline void vp::clock_engine::event_exec_profiled(vp::profiler *profiler, clock_event *event)
+{
+    vp::profiler_stats *prev = profiler->enter(static_cast<vp::component *>(event->comp));
+    event->meth(event->_this, event);
+    profiler->leave(prev);
+}
+
 int64_t vp::clock_engine::exec()
 {
     vp_assert(this->has_events(), NULL, "Executing clock engine while it has no event\n");
@@ -310,18 +470,34 @@ int64_t vp::clock_engine::exec()
 
     vp_assert(this->get_next_event(), NULL, "Executing clock engine while it has no next event\n");
 
+    vp::profiler *profiler = this->engine->profiler_get();
+
     clock_event *current = this->permanent_first;
 
     if (likely(current != NULL))
     {
-        this->cycles++;
+        if (unlikely(this->stall_skip))
+        {
+            this->stall_skip_stop(true);
+        }
+        else
+        {
+            this->cycles++;
+        }
 
         do
         {
             clock_event *next = current->next;
             if (likely(current->stall_cycle == 0))
             {
-                current->meth(current->_this, current);
+                if (unlikely(profiler != NULL))
+                {
+                    this->event_exec_profiled(profiler, current);
+                }
+                else
+                {
+                    current->meth(current->_this, current);
+                }
             }
             else
             {
@@ -360,25 +536,50 @@ int64_t vp::clock_engine::exec()
     }
     else
     {
-        this->cycles = delayed_queue->cycle;
+        this->cycles = this->wheel_first()->cycle;
     }
 
-    while (delayed_queue)
+    while (1)
     {
-        if (delayed_queue->cycle > this->get_cycles())
+        clock_event *current = this->wheel_first();
+
+        if (current == NULL || current->cycle > this->get_cycles())
         {
             break;
         }
 
-        clock_event *current = delayed_queue;
+        // Move the wheel to the event cycle, which brings it to the first slot of level 0
+        this->wheel_advance(current->cycle);
+        current = this->event_wheel[0][current->cycle & CLOCK_EVENT_QUEUE_MASK];
+
         current->enqueued = false;
-        delayed_queue = delayed_queue->next;
-        current->meth(current->_this, current);
+        this->nb_enqueued_to_cycle--;
+        this->event_list_remove(current);
+        if (unlikely(profiler != NULL))
+        {
+            this->event_exec_profiled(profiler, current);
+        }
+        else
+        {
+            current->meth(current->_this, current);
+        }
     }
 
     if (likely(this->permanent_first != NULL))
     {
-        return period;
+        int64_t skip = this->stall_skip_get();
+        if (likely(skip == 0))
+        {
+            return period;
+        }
+
+        // All permanent events are stalled, jump directly to the first cycle where one of them or
+        // a delayed event is executed
+        this->stall_skip = true;
+        this->stall_skip_cycles = this->cycles;
+        this->stop_time = this->get_time();
+
+        return (skip + 1) * period;
     }
     else
     {
@@ -387,9 +588,10 @@ int64_t vp::clock_engine::exec()
         // in case we enqueue and event from another engine.
         this->stop_time = this->get_time();
 
-        if (delayed_queue)
+        clock_event *next = this->wheel_first();
+        if (next)
         {
-            int64_t cycle_diff = delayed_queue->cycle - get_cycles();
+            int64_t cycle_diff = next->cycle - get_cycles();
             int64_t time_diff = cycle_diff * period;
             return time_diff;
         }
@@ -400,6 +602,64 @@ int64_t vp::clock_engine::exec()
     }
 }
 
+inline int64_t vp::clock_engine::stall_skip_get()
+{
+    // Returns the number of the next cycles where no event is executed, starting from the next one
+    clock_event *current = this->permanent_first;
+    int64_t skip = current->stall_cycle;
+    if (likely(skip <= 0))
+    {
+        return 0;
+    }
+
+    for (current = current->next; current != this->permanent_first; current = current->next)
+    {
+        if (current->stall_cycle <= 0)
+        {
+            return 0;
+        }
+        if (current->stall_cycle < skip)
+        {
+            skip = current->stall_cycle;
+        }
+    }
+
+    clock_event *next = this->wheel_first();
+    if (next && next->cycle - this->cycles - 1 < skip)
+    {
+        skip = next->cycle - this->cycles - 1;
+    }
+
+    return skip > 0 ? skip : 0;
+}
+
+void vp::clock_engine::stall_skip_stop(bool from_exec)
+{
+    this->stall_skip = false;
+
+    // Bring the cycles up to date. When called from exec, the current cycle is the one where the
+    // events are executed again, and it is not part of the skipped ones.
+    this->update();
+    int64_t skipped = this->cycles - this->stall_skip_cycles - (from_exec ? 1 : 0);
+
+    clock_event *current = this->permanent_first;
+    do
+    {
+        if (current->stall_cycle > 0)
+        {
+            current->stall_cycle -= skipped;
+        }
+        current = current->next;
+    } while (current != this->permanent_first);
+
+    // If something happened while skipping, we need to execute again the events from the next
+    // cycle since they may not be stalled anymore
+    if (!from_exec)
+    {
+        this->enqueue_to_engine(this->stop_time + this->period);
+    }
+}
+
 vp::clock_event *vp::clock_engine::reenqueue(vp::clock_event *event, int64_t enqueue_cycles)
 {
     if (event->is_enqueued())
@@ -417,3 +677,182 @@ vp::clock_event *vp::clock_engine::reenqueue_ext(vp::clock_event *event, int64_t
     this->sync();
     return this->reenqueue(event, enqueue_cycles);
 }
+
+void vp::clock_engine::events_clear()
+{
+    if (this->permanent_first)
+    {
+        clock_event *current = this->permanent_first;
+        do
+        {
+            current->enqueued = false;
+            current->stall_cycle = 0;
+            current = current->next;
+        } while (current != this->permanent_first);
+
+        this->permanent_first = NULL;
+    }
+
+    for (int level=0; level<CLOCK_EVENT_WHEEL_LEVELS; level++)
+    {
+        for (int slot=0; slot<CLOCK_EVENT_QUEUE_SIZE; slot++)
+        {
+            while (this->event_wheel[level][slot])
+            {
+                clock_event *event = this->event_wheel[level][slot];
+                event->enqueued = false;
+                this->event_list_remove(event);
+            }
+        }
+    }
+    this->nb_enqueued_to_cycle = 0;
+
+    while (this->delayed_queue)
+    {
+        clock_event *event = this->delayed_queue;
+        event->enqueued = false;
+        this->event_list_remove(event);
+    }
+
+    this->stall_skip = false;
+}
+
+void vp::clock_engine::checkpoint_event_io(vp::checkpoint *ckpt, vp::clock_event **event)
+{
+    // Events are identified by their owner and their index in its events, since they are created
+    // in the same order each time the architecture is built.
+    // Only the payload is saved with it, the arguments may be pointers.
+    std::string path;
+    uint32_t index = 0;
+
+    if (!ckpt->is_restore())
+    {
+        vp::component *comp = static_cast<vp::component *>((*event)->comp);
+        path = comp->get_path();
+        index = std::find(comp->events.begin(), comp->events.end(), *event) - comp->events.begin();
+    }
+
+    ckpt->io(path);
+    ckpt->io(index);
+
+    if (ckpt->is_restore())
+    {
+        vp::component *comp = ckpt->component_get(path);
+        if (index >= comp->events.size())
+        {
+            throw std::runtime_error("Checkpoint refers to unknown event of " + path);
+        }
+        *event = comp->events[index];
+    }
+
+    ckpt->io((*event)->payload, CLOCK_EVENT_PAYLOAD_SIZE);
+}
+
+void vp::clock_engine::checkpoint_io(vp::checkpoint *ckpt)
+{
+    ckpt->io(this->cycles);
+    ckpt->io(this->stop_time);
+    ckpt->io(this->period);
+    ckpt->io(this->freq);
+    ckpt->io(this->stall_skip);
+    ckpt->io(this->stall_skip_cycles);
+    ckpt->io(this->wheel_base);
+
+    // Permanent events are saved in execution order, including the disabled ones which are not
+    // yet removed, and the other ones in the order of the wheel slots lists, so that the events
+    // of the same cycle are executed in the same order after the restore.
+    std::vector<clock_event *> permanent;
+    std::vector<clock_event *> delayed;
+
+    if (!ckpt->is_restore())
+    {
+        if (this->permanent_first)
+        {
+            clock_event *current = this->permanent_first;
+            do
+            {
+                permanent.push_back(current);
+                current = current->next;
+            } while (current != this->permanent_first);
+        }
+
+        for (int level=0; level<CLOCK_EVENT_WHEEL_LEVELS; level++)
+        {
+            for (int slot=0; slot<CLOCK_EVENT_QUEUE_SIZE; slot++)
+            {
+                clock_event *first = this->event_wheel[level][slot];
+                if (first)
+                {
+                    clock_event *current = first;
+                    do
+                    {
+                        delayed.push_back(current);
+                        current = current->next;
+                    } while (current != first);
+                }
+            }
+        }
+
+        if (this->delayed_queue)
+        {
+            clock_event *current = this->delayed_queue;
+            do
+            {
+                delayed.push_back(current);
+                current = current->next;
+            } while (current != this->delayed_queue);
+        }
+    }
+
+    uint32_t nb_permanent = permanent.size();
+    ckpt->io(nb_permanent);
+    permanent.resize(nb_permanent);
+    for (clock_event *&event: permanent)
+    {
+        this->checkpoint_event_io(ckpt, &event);
+        ckpt->io(event->stall_cycle);
+        ckpt->io(event->enqueued);
+    }
+
+    uint32_t nb_delayed = delayed.size();
+    ckpt->io(nb_delayed);
+    delayed.resize(nb_delayed);
+    for (clock_event *&event: delayed)
+    {
+        this->checkpoint_event_io(ckpt, &event);
+        ckpt->io(event->cycle);
+    }
+
+    // State of the engine in the time engine, which has already been restored
+    bool enqueued = this->is_enqueued;
+    int64_t next_event_time = this->next_event_time;
+    ckpt->io(enqueued);
+    ckpt->io(next_event_time);
+
+    if (ckpt->is_restore())
+    {
+        for (unsigned int i=0; i<nb_permanent; i++)
+        {
+            clock_event *event = permanent[i];
+            event->next = permanent[(i + 1) % nb_permanent];
+            event->prev = permanent[(i + nb_permanent - 1) % nb_permanent];
+            event->cycle = -1;
+            event->queue = NULL;
+        }
+        this->permanent_first = nb_permanent ? permanent[0] : NULL;
+
+        // Events are pushed at the head of their list, insert them from the last one to get the
+        // same lists
+        for (auto it = delayed.rbegin(); it != delayed.rend(); ++it)
+        {
+            (*it)->enqueued = true;
+            this->wheel_insert(*it);
+        }
+
+        this->dequeue_from_engine();
+        if (enqueued)
+        {
+            this->enqueue_to_engine(next_event_time);
+        }
+    }
+}
@@ -21,6 +21,8 @@
 
 #include <pthread.h>
 #include <signal.h>
+#include <unistd.h>
+#include <sys/wait.h>
 
 #include <vp/vp.hpp>
 #include <gv/gvsoc.hpp>
@@ -114,6 +116,21 @@ void Gvsoc_launcher::start()
     this->instance->build_new();
     this->instance->reset_all(true);
     this->instance->reset_all(false);
+
+    // The checkpoint is restored on top of the reset state, so that anything which is not part
+    // of it is in its reset state
+    js::config *restore_config = this->instance->get_vp_config()->get("restore");
+    if (restore_config != NULL && restore_config->get_str() != "")
+    {
+        try
+        {
+            this->engine->checkpoint_restore(restore_config->get_str());
+        }
+        catch (const std::runtime_error &e)
+        {
+            this->instance->throw_error(e.what());
+        }
+    }
 }
 
 void Gvsoc_launcher::close()
@@ -123,6 +140,8 @@ void Gvsoc_launcher::close()
         proxy->stop(this->retval);
     }
 
+    this->engine->profiling_dump();
+
     this->instance->stop_all();
 
     vp::top *top = (vp::top *)this->handler;
@@ -335,6 +354,73 @@ void Gvsoc_launcher::engine_routine()
 
 
 
+pid_t Gvsoc_launcher::fork()
+{
+    vp::trace_engine *trace_engine = this->instance->traces.get_trace_manager();
+
+    // Reap the previous children which are over, they are not waited anywhere else
+    for (auto it = this->fork_pids.begin(); it != this->fork_pids.end();)
+    {
+        it = waitpid(*it, NULL, WNOHANG) != 0 ? this->fork_pids.erase(it) : it + 1;
+    }
+
+    // The engine is already stopped by the caller, the trace dumper thread must also be idle so
+    // that the child gets a consistent state
+    trace_engine->fork_prepare();
+    fflush(NULL);
+
+    pid_t pid = ::fork();
+
+    if (pid != 0)
+    {
+        trace_engine->fork_parent();
+        if (pid > 0)
+        {
+            this->fork_pids.push_back(pid);
+        }
+        return pid;
+    }
+
+    // Only this thread exists in the child, the other ones must be started again
+    trace_engine->fork_child();
+    this->engine->fork_child();
+    this->fork_pids.clear();
+
+    // The thread catching SIGINT is gone
+    signal(SIGINT, SIG_DFL);
+
+    // The child starts stopped so that it can be configured before it runs
+    this->running = false;
+    this->run_req = false;
+    this->engine_thread = new std::thread(&Gvsoc_launcher::fork_engine_routine, this);
+
+    return 0;
+}
+
+
+
+void Gvsoc_launcher::fork_engine_routine()
+{
+    // The engine thread owns the engine when it is not locked, as it was in the parent
+    this->engine->critical_enter();
+    this->engine_routine();
+}
+
+
+
+void Gvsoc_launcher::fork_main()
+{
+    int retval = this->join();
+
+    this->stop();
+    this->close();
+
+    fflush(NULL);
+    _exit(retval);
+}
+
+
+
 void Gvsoc_launcher::register_exec_notifier(vp::Notifier *notifier)
 {
     this->exec_notifiers.push_back(notifier);
@@ -0,0 +1,80 @@
+/*
+ * Copyright (C) 2020 GreenWaves Technologies, SAS, ETH Zurich and
+ *                    University of Bologna
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+/*
+ * Authors: Germain Haugou, GreenWaves Technologies (germain.haugou@greenwaves-technologies.com)
+ */
+
+#include <vp/vp.hpp>
+#include <vp/profiler.hpp>
+#include <algorithm>
+#include <map>
+#include <stdio.h>
+
+
+std::string vp::profiler::report(std::vector<profiler *> profilers, bool json)
+{
+    // Components of different partitions may have the same path, for example the clock engines
+    // of a clock domain, so they are merged by path
+    std::map<std::string, profiler_stats> merged;
+    int64_t total_ns = 0;
+    for (profiler *profiler: profilers)
+    {
+        for (auto &x: profiler->stats)
+        {
+            profiler_stats &stats = merged[x.first->get_path()];
+            stats.count += x.second.count;
+            stats.ns += x.second.ns;
+            total_ns += x.second.ns;
+        }
+    }
+
+    std::vector<std::pair<std::string, profiler_stats>> sorted(merged.begin(), merged.end());
+    std::stable_sort(sorted.begin(), sorted.end(),
+        [](const std::pair<std::string, profiler_stats> &a,
+            const std::pair<std::string, profiler_stats> &b) { return a.second.ns > b.second.ns; });
+
+    std::string result;
+    char line[1024];
+
+    if (json)
+    {
+        result = "{";
+        bool first = true;
+        for (auto &x: sorted)
+        {
+            snprintf(line, sizeof(line), "%s\"%s\": {\"count\": %ld, \"ns\": %ld}",
+                first ? "" : ", ", x.first.c_str(), x.second.count, x.second.ns);
+            result += line;
+            first = false;
+        }
+        result += "}";
+    }
+    else
+    {
+        snprintf(line, sizeof(line), "%-60s %15s %15s %7s\n", "Component", "Callbacks", "Host ns", "%");
+        result = line;
+        for (auto &x: sorted)
+        {
+            snprintf(line, sizeof(line), "%-60s %15ld %15ld %6.2f%%\n", x.first.c_str(),
+                x.second.count, x.second.ns, total_ns ? x.second.ns * 100.0 / total_ns : 0.0);
+            result += line;
+        }
+    }
+
+    return result;
+}
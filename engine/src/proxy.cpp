@@ -36,9 +36,9 @@
 #include <sys/types.h>
 #include <sys/socket.h>
 #include <netinet/in.h>
+#include <netinet/tcp.h>
 #include <poll.h>
 #include <signal.h>
-#include <regex>
 #include <sys/types.h>
 #include <unistd.h>
 #include <sys/prctl.h>
@@ -47,6 +47,20 @@
 #include <vp/launcher.hpp>
 
 
+// Splits a command into words separated by white spaces
+static std::vector<std::string> split_words(const std::string& s)
+{
+    std::vector<std::string> words;
+    std::istringstream stream(s);
+    std::string word;
+    while (stream >> word)
+    {
+        words.push_back(word);
+    }
+    return words;
+}
+
+
 static std::vector<std::string> split(const std::string& s, char delimiter)
 {
    std::vector<std::string> tokens;
@@ -62,21 +76,66 @@ static std::vector<std::string> split(const std::string& s, char delimiter)
 
 void Gv_proxy::notify_stop(int64_t time)
 {
-    this->send_reply("req=-1;msg=stopped=" + std::to_string(time) + '\n');
+    this->send_reply("stopped=" + std::to_string(time));
 }
 
 void Gv_proxy::notify_run(int64_t time)
 {
-    this->send_reply("req=-1;msg=running=" + std::to_string(time) + '\n');
+    this->send_reply("running=" + std::to_string(time));
 }
 
 
+// Sends a notification to all connected clients
 void Gv_proxy::send_reply(std::string msg)
 {
     std::unique_lock<std::mutex> lock(this->mutex);
     for (auto x: this->sockets)
     {
-        dprintf(x, "%s", msg.c_str());
+        if (this->binary_fds.count(x))
+        {
+            gv_proxy_frame_t frame = { -1, GV_PROXY_FRAME_REPLY, (uint32_t)msg.size() };
+            if (write(x, &frame, sizeof(frame)) == sizeof(frame))
+            {
+                if (write(x, msg.c_str(), msg.size())) {}
+            }
+        }
+        else
+        {
+            dprintf(x, "req=-1;msg=%s\n", msg.c_str());
+        }
+    }
+    lock.unlock();
+}
+
+
+bool Gv_proxy::send_frame(FILE *reply_file, std::string req, uint32_t type, const void *data, int size)
+{
+    gv_proxy_frame_t frame = { (int32_t)strtol(req.c_str(), NULL, 0), type, (uint32_t)size };
+    bool error = fwrite(&frame, 1, sizeof(frame), reply_file) != sizeof(frame);
+    error |= (int)fwrite(data, 1, size, reply_file) != size;
+    fflush(reply_file);
+    return error;
+}
+
+
+void Gv_proxy::reply(FILE *reply_file, std::string req, std::string msg)
+{
+    std::unique_lock<std::mutex> lock(this->mutex);
+    if (this->binary_fds.count(fileno(reply_file)))
+    {
+        this->send_frame(reply_file, req, GV_PROXY_FRAME_REPLY, msg.c_str(), msg.size());
+    }
+    else
+    {
+        if (msg == "")
+        {
+            fprintf(reply_file, "req=%s\n", req.c_str());
+        }
+        else
+        {
+            fprintf(reply_file, "req=%s;msg=%s\n", req.c_str(), msg.c_str());
+        }
+        fflush(reply_file);
     }
     lock.unlock();
 }
@@ -84,6 +143,14 @@ void Gv_proxy::send_reply(std::string msg)
 
 bool Gv_proxy::send_payload(FILE *reply_file, std::string req, uint8_t *payload, int size)
 {
+    // Payloads are also sent from the engine thread, e.g. by the uart testbench, while connection
+    // threads can update the protocols, so this must be done with the mutex, as for replies
+    std::unique_lock<std::mutex> lock(this->mutex);
+    if (this->binary_fds.count(fileno(reply_file)))
+    {
+        return this->send_frame(reply_file, req, GV_PROXY_FRAME_PAYLOAD, payload, size);
+    }
+
     fprintf(reply_file, "req=%s;payload=%d\n", req.c_str(), size);
     int write_size = fwrite(payload, 1, size, reply_file);
     fflush(reply_file);
@@ -91,6 +158,71 @@ bool Gv_proxy::send_payload(FILE *reply_file, std::string req, uint8_t *payload,
 }
 
 
+// Reads the next request, either as a text line or as a binary frame depending on the protocol
+// of the connection. Any payload of the command is left in the file, for the command handler.
+bool Gv_proxy::read_request(FILE *req_file, bool binary, std::string &req, std::string &cmd)
+{
+    req = "";
+    cmd = "";
+
+    if (binary)
+    {
+        gv_proxy_frame_t frame;
+        if (fread(&frame, 1, sizeof(frame), req_file) != sizeof(frame))
+        {
+            return false;
+        }
+
+        cmd.resize(frame.size);
+        if (fread(&cmd[0], 1, frame.size, req_file) != frame.size)
+        {
+            return false;
+        }
+
+        req = std::to_string(frame.req);
+        return true;
+    }
+
+    char line_array[1024];
+
+    if (!fgets(line_array, 1024, req_file))
+    {
+        return false;
+    }
+
+    std::string line = std::string(line_array);
+
+    int start = 0;
+    int end = line.find(";");
+    std::vector<std::string> tokens;
+    while (end != -1) {
+        tokens.push_back(line.substr(start, end - start));
+        start = end + 1;
+        end = line.find(";", start);
+    }
+    tokens.push_back(line.substr(start, end - start));
+
+    for (auto x: tokens)
+    {
+        int start = 0;
+        int index = x.find("=");
+        std::string name = x.substr(start, index - start);
+        std::string value = x.substr(index + 1, x.size());
+
+        if (name == "req")
+        {
+            req = value;
+        }
+        else if (name == "cmd")
+        {
+            cmd = value;
+        }
+    }
+
+    return true;
+}
+
+
 void Gv_proxy::proxy_loop(int socket_fd, int reply_fd)
 {
     FILE *sock = fdopen(socket_fd, "r");
@@ -103,12 +235,18 @@ void Gv_proxy::proxy_loop(int socket_fd, int reply_fd)
         engine->critical_enter();
     }
 
+    bool binary = false;
+
     while(1)
     {
-        char line_array[1024];
+        std::string req, cmd;
 
-        if (!fgets(line_array, 1024, sock))
+        if (!this->read_request(sock, binary, req, cmd))
         {
+            std::unique_lock<std::mutex> lock(this->mutex);
+            this->binary_fds.erase(reply_fd);
+            lock.unlock();
+
             if (!this->is_async)
             {
                 launcher->release();
@@ -118,51 +256,31 @@ void Gv_proxy::proxy_loop(int socket_fd, int reply_fd)
             return ;
         }
 
-        std::string line = std::string(line_array);
-
-        int start = 0;
-        int end = line.find(";");
-        std::vector<std::string> tokens;
-        while (end != -1) {
-            tokens.push_back(line.substr(start, end - start));
-            start = end + 1;
-            end = line.find(";", start);
-        }
-        tokens.push_back(line.substr(start, end - start));
-
-        std::string req = "";
-        std::string cmd = "";
-
-        for (auto x: tokens)
-        {
-            int start = 0;
-            int index = x.find("=");
-            std::string name = x.substr(start, index - start);
-            std::string value = x.substr(index + 1, x.size());
-
-            if (name == "req")
-            {
-                req = value;
-            }
-            else if (name == "cmd")
-            {
-                cmd = value;
-            }
-        }
+        std::vector<std::string> words = split_words(cmd);
 
-        std::regex regex{R"([\s]+)"};
-        std::sregex_token_iterator it{cmd.begin(), cmd.end(), regex, -1};
-        std::vector<std::string> words{it, {}};
-        
         if (words.size() > 0)
         {
-            if (words[0] == "run")
+            if (words[0] == "protocol")
             {
-                launcher->run();
+                // The reply is sent with the current protocol and the new one is used from the
+                // next request. This is atomic with notifications so that they are not sent with
+                // the wrong protocol.
+                bool is_binary = words.size() == 2 && words[1] == "binary";
                 std::unique_lock<std::mutex> lock(this->mutex);
-                dprintf(reply_fd, "req=%s\n", req.c_str());
+                fprintf(reply_sock, "req=%s;msg=%s\n", req.c_str(), is_binary ? "binary" : "text");
+                fflush(reply_sock);
+                if (is_binary && !binary)
+                {
+                    this->binary_fds.insert(reply_fd);
+                    binary = true;
+                }
                 lock.unlock();
             }
+            else if (words[0] == "run")
+            {
+                launcher->run();
+                this->reply(reply_sock, req, "");
+            }
             else if (words[0] == "step")
             {
                 if (words.size() != 2)
@@ -174,17 +292,13 @@ void Gv_proxy::proxy_loop(int socket_fd, int reply_fd)
                     int64_t duration = strtol(words[1].c_str(), NULL, 0);
                     int64_t timestamp = engine->get_time() + duration;
                     launcher->step(duration);
-                    std::unique_lock<std::mutex> lock(this->mutex);
-                    dprintf(reply_fd, "req=%s;msg=%ld\n", req.c_str(), timestamp);
-                    lock.unlock();
+                    this->reply(reply_sock, req, std::to_string(timestamp));
                 }
             }
             else if (words[0] == "stop")
             {
                 launcher->stop();
-                std::unique_lock<std::mutex> lock(this->mutex);
-                dprintf(reply_fd, "req=%s\n", req.c_str());
-                lock.unlock();
+                this->reply(reply_sock, req, "");
             }
             else if (words[0] == "quit")
             {
@@ -193,13 +307,13 @@ void Gv_proxy::proxy_loop(int socket_fd, int reply_fd)
                     engine->lock();
                 }
                 engine->quit(strtol(words[1].c_str(), NULL, 0));
+                // Reply before unlocking, otherwise the simulator may exit and close the socket
+                // before the reply is sent
+                this->reply(reply_sock, req, "quit");
                 if (this->is_async)
                 {
                     engine->unlock();
                 }
-                std::unique_lock<std::mutex> lock(this->mutex);
-                dprintf(reply_fd, "req=%s;msg=quit\n", req.c_str());
-                lock.unlock();
             }
             else
             {
@@ -213,25 +327,63 @@ void Gv_proxy::proxy_loop(int socket_fd, int reply_fd)
                 if (words[0] == "get_component")
                 {
                     vp::component *comp = this->top->get_component(split(words[1], '/'));
-                    std::unique_lock<std::mutex> lock(this->mutex);
+                    char msg[32];
                     if (comp)
                     {
-                        dprintf(reply_fd, "req=%s;msg=%p\n", req.c_str(), comp);
+                        snprintf(msg, sizeof(msg), "%p", comp);
                     }
                     else
                     {
-                        dprintf(reply_fd, "req=%s;msg=0x0\n", req.c_str());
+                        snprintf(msg, sizeof(msg), "0x0");
                     }
-                    lock.unlock();
+                    this->reply(reply_sock, req, msg);
                 }
                 else if (words[0] == "component")
                 {
                     vp::component *comp = (vp::component *)strtoll(words[1].c_str(), NULL, 0);
                     std::string retval = comp->handle_command(this, sock, reply_sock, {words.begin() + 2, words.end()}, req);
-                    std::unique_lock<std::mutex> lock(this->mutex);
-                    fprintf(reply_sock, "req=%s;msg=%s\n", req.c_str(), retval.c_str());
-                    fflush(reply_sock);
-                    lock.unlock();
+                    this->reply(reply_sock, req, retval);
+                }
+                else if (words[0] == "checkpoint")
+                {
+                    std::string error = "";
+                    if (words.size() != 2)
+                    {
+                        error = "This command requires 1 argument: checkpoint path";
+                    }
+                    else
+                    {
+                        try
+                        {
+                            engine->checkpoint_save(words[1]);
+                        }
+                        catch (const std::runtime_error &e)
+                        {
+                            error = e.what();
+                        }
+                    }
+                    this->reply(reply_sock, req, error);
+                }
+                else if (words[0] == "profile")
+                {
+                    // The report is sent as a JSON payload, which is empty if profiling is not
+                    // enabled
+                    std::string report = engine->profiling_report(true);
+                    this->send_payload(reply_sock, req, (uint8_t *)report.c_str(), report.size());
+                    this->reply(reply_sock, req, "");
+                }
+                else if (words[0] == "fork")
+                {
+                    std::string msg;
+                    if (words.size() != 2)
+                    {
+                        msg = "This command requires 1 argument: fork nb_children";
+                    }
+                    else
+                    {
+                        msg = this->fork(strtol(words[1].c_str(), NULL, 0));
+                    }
+                    this->reply(reply_sock, req, msg);
                 }
                 else if (words[0] == "trace")
                 {
@@ -256,8 +408,7 @@ void Gv_proxy::proxy_loop(int socket_fd, int reply_fd)
                             this->top->traces.get_trace_manager()->add_exclude_trace_path(0, words[2]);
                             this->top->traces.get_trace_manager()->check_traces();
                         }
-                        fprintf(reply_sock, "req=%s\n", req.c_str());
-                        fflush(reply_sock);
+                        this->reply(reply_sock, req, "");
                     }
                 }
                 else if (words[0] == "event")
@@ -282,7 +433,7 @@ void Gv_proxy::proxy_loop(int socket_fd, int reply_fd)
                             //this->top->traces.get_trace_manager()->check_traces();
                             this->top->traces.get_trace_manager()->conf_trace(1, words[2], 0);
                         }
-                        fprintf(reply_sock, "req=%s\n", req.c_str());
+                        this->reply(reply_sock, req, "");
                     }
                 }
                 else
@@ -298,6 +449,92 @@ void Gv_proxy::proxy_loop(int socket_fd, int reply_fd)
     }
 }
 
+// Forks the simulation into the specified number of children, each one with its own proxy.
+// Returns the list of ports of the children proxies, or an error message.
+std::string Gv_proxy::fork(int nb)
+{
+    if (!this->is_async || this->req_pipe != -1)
+    {
+        return "Fork is only supported by the asynchronous socket proxy";
+    }
+
+    std::string ports = "";
+
+    for (int i=0; i<nb; i++)
+    {
+        // The child sends back the port of its proxy through this pipe
+        int fds[2];
+        if (pipe(fds))
+        {
+            return std::string("Failed to create pipe: ") + strerror(errno);
+        }
+
+        // Keep the mutex so that no other proxy thread is sending a reply while forking
+        std::unique_lock<std::mutex> lock(this->mutex);
+        pid_t pid = this->launcher->fork();
+        lock.unlock();
+
+        if (pid == 0)
+        {
+            ::close(fds[0]);
+            this->fork_child(fds[1]);
+        }
+
+        ::close(fds[1]);
+
+        if (pid == -1)
+        {
+            ::close(fds[0]);
+            return std::string("Failed to fork simulation: ") + strerror(errno);
+        }
+
+        int port = -1;
+        if (read(fds[0], &port, sizeof(port)) != sizeof(port) || port == -1)
+        {
+            ::close(fds[0]);
+            return "Failed to open proxy in forked simulation";
+        }
+        ::close(fds[0]);
+
+        ports += (i == 0 ? "" : ",") + std::to_string(port);
+    }
+
+    return "ports=" + ports;
+}
+
+
+
+void Gv_proxy::fork_child(int port_fd)
+{
+    // The connections belong to the parent, the child opens its own proxy on a new port
+    for (auto x: this->sockets)
+    {
+        ::close(x);
+    }
+    this->sockets.clear();
+    this->binary_fds.clear();
+    ::close(this->telnet_socket);
+
+    int port;
+    if (this->open(0, &port))
+    {
+        port = -1;
+    }
+
+    if (write(port_fd, &port, sizeof(port)) != sizeof(port) || port == -1)
+    {
+        _exit(-1);
+    }
+    ::close(port_fd);
+
+    // This thread was processing a command with the engine locked, it now becomes the main thread
+    // of the child
+    this->launcher->top_get()->time_engine_get()->unlock();
+    this->launcher->fork_main();
+}
+
+
+
 Gv_proxy::Gv_proxy(vp::time_engine *engine, vp::component *top, Gvsoc_launcher *launcher, bool is_async, int req_pipe, int reply_pipe)
   : top(top), launcher(launcher), req_pipe(req_pipe), reply_pipe(reply_pipe)
 {
@@ -321,6 +558,10 @@ void Gv_proxy::listener(void)
             return;
         }
 
+        // Replies are often followed by a payload or another reply, don't let them be delayed
+        int yes = 1;
+        setsockopt(client_fd, IPPROTO_TCP, TCP_NODELAY, &yes, sizeof(yes));
+
         this->sockets.push_back(client_fd);
         this->loop_thread = new std::thread(&Gv_proxy::proxy_loop, this, client_fd, client_fd);
     }
@@ -386,9 +627,22 @@ int Gv_proxy::open(int port, int *out_port)
 
 void Gv_proxy::stop(int status)
 {
+    std::unique_lock<std::mutex> lock(this->mutex);
     for (auto x: this->sockets)
     {
-        dprintf(x, "req=-1;exit=%d\n", status);
+        if (this->binary_fds.count(x))
+        {
+            std::string msg = std::to_string(status);
+            gv_proxy_frame_t frame = { -1, GV_PROXY_FRAME_EXIT, (uint32_t)msg.size() };
+            if (write(x, &frame, sizeof(frame)) == sizeof(frame))
+            {
+                if (write(x, msg.c_str(), msg.size())) {}
+            }
+        }
+        else
+        {
+            dprintf(x, "req=-1;exit=%d\n", status);
+        }
         shutdown(x, SHUT_RDWR);
     }
 }
@@ -22,30 +22,295 @@
 #include <vp/vp.hpp>
 #include "vp/time/time_engine.hpp"
 #include "vp/time/time_scheduler.hpp"
+#include <stdexcept>
+#include <string.h>
+#include <errno.h>
 
 
 
-vp::time_engine::time_engine(vp::component *top, js::config *config)
-    : first_client(NULL), top(top), config(config)
+vp::time_engine::time_engine(vp::component *top, js::config *config, vp::time_engine *parent)
+    : first_client(NULL), top(top), config(config), parent(parent)
 {
     pthread_mutex_init(&lock_mutex, NULL);
     pthread_mutex_init(&mutex, NULL);
     pthread_cond_init(&cond, NULL);
 
-    top->new_service("time", static_cast<time_engine *>(this));
+    js::config *queue_config = config ? config->get("time_engine/queue") : NULL;
+    if (queue_config != NULL)
+    {
+        std::string queue = queue_config->get_str();
+        if (queue == "heap")
+        {
+            this->use_client_heap = true;
+        }
+        else if (queue != "list")
+        {
+            throw std::invalid_argument("Invalid time engine queue: " + queue);
+        }
+    }
+
+    js::config *window_config = config ? config->get("time_engine/window") : NULL;
+    if (window_config != NULL)
+    {
+        this->partition_window = window_config->get_int();
+    }
+
+    if (config && config->get_child_bool("profiling/enabled"))
+    {
+        this->profiler = new vp::profiler();
+    }
+
+    // Partitions are only reachable through their clients, the main engine remains the time
+    // service and is the only one controlled by the launcher
+    if (parent == NULL)
+    {
+        top->new_service("time", static_cast<time_engine *>(this));
+
+        this->stop_event = new vp::Time_engine_stop_event(this->top, this);
+    }
+}
+
+
+
+vp::time_engine *vp::time_engine::get_partition(std::string name)
+{
+    if (this->parent)
+    {
+        return this->parent->get_partition(name);
+    }
+
+    if (name == "" || name == "main")
+    {
+        return this;
+    }
+
+    auto it = this->partitions_map.find(name);
+    if (it != this->partitions_map.end())
+    {
+        return it->second;
+    }
+
+    time_engine *partition = new time_engine(this->top, this->config, this);
+    this->partitions_map[name] = partition;
+    this->partitions.push_back(partition);
+
+    return partition;
+}
+
+
+
+void vp::time_engine::lookahead_register(int64_t lookahead)
+{
+    if (this->parent)
+    {
+        return this->parent->lookahead_register(lookahead);
+    }
+
+    if (lookahead <= 0)
+    {
+        throw std::invalid_argument("Cross-partition links must have a strictly positive latency");
+    }
+
+    if (lookahead < this->partition_window)
+    {
+        this->partition_window = lookahead;
+    }
+}
+
+
+
+void vp::time_engine::partition_sync_register(void *_this, void (*meth)(void *))
+{
+    if (this->parent)
+    {
+        return this->parent->partition_sync_register(_this, meth);
+    }
+
+    this->partition_sync_callbacks.push_back(std::make_pair(_this, meth));
+}
+
+
+
+int64_t vp::time_engine::partitions_next_event_time()
+{
+    time_engine_client *first = this->client_first();
+    int64_t result = first ? first->next_event_time : -1;
+
+    for (time_engine *partition: this->partitions)
+    {
+        int64_t time = partition->get_next_event_time();
+        if (time != -1 && (result == -1 || time < result))
+        {
+            result = time;
+        }
+    }
+
+    return result;
+}
+
+
+
+void vp::time_engine::partitions_start()
+{
+    pthread_barrier_init(&this->partition_barrier, NULL, this->partitions.size() + 1);
+
+    for (time_engine *partition: this->partitions)
+    {
+        pthread_t thread;
+        pthread_create(&thread, NULL, &time_engine::partition_routine, (void *)partition);
+        this->partition_threads.push_back(thread);
+    }
+}
+
+
+
+void *vp::time_engine::partition_routine(void *arg)
+{
+    time_engine *_this = (time_engine *)arg;
+    time_engine *root = _this->parent;
+
+    while (1)
+    {
+        // Wait for the window to be opened by the main engine, execute it, and notify the end
+        pthread_barrier_wait(&root->partition_barrier);
+        _this->exec_clients();
+        pthread_barrier_wait(&root->partition_barrier);
+    }
+
+    return NULL;
+}
+
+
+
+int64_t vp::time_engine::exec_partitions()
+{
+    // Events are dumped to a single buffer and must be in time order, which concurrent
+    // partitions can't guarantee. They can only be enabled while the engine is stopped, so
+    // checking them when execution is resumed is enough.
+    if (this->top->traces.get_trace_manager()->event_dumper.has_traces())
+    {
+        this->fatal("Event traces can not be enabled when time engine partitions are used\n");
+        return this->get_next_event_time();
+    }
+
+    if (this->partition_threads.size() == 0)
+    {
+        this->partitions_start();
+    }
+
+    while (1)
+    {
+        // The window starts at the first pending event of any partition, and is small enough that
+        // no event crossing partitions can be received before it ends. Since the windows only
+        // depend on simulated time, the execution is deterministic whatever the host scheduling.
+        int64_t start = this->partitions_next_event_time();
+        if (start == -1)
+        {
+            break;
+        }
+
+        int64_t window_end = start > INT64_MAX - this->partition_window ?
+            INT64_MAX : start + this->partition_window;
 
-    this->stop_event = new vp::Time_engine_stop_event(this->top, this);
+        // The main engine stops at the end of the timestamp of its stop event, partitions must
+        // not go further, so that the whole system is at the same time when it stops
+        if (this->stop_event->is_enqueued && this->stop_event->next_event_time < window_end)
+        {
+            window_end = this->stop_event->next_event_time + 1;
+        }
+
+        this->window_end = window_end;
+        time_engine *active = NULL;
+        int nb_active = 0;
+        for (time_engine *partition: this->partitions)
+        {
+            partition->window_end = window_end;
+            int64_t time = partition->get_next_event_time();
+            if (time != -1 && time < window_end)
+            {
+                active = partition;
+                nb_active++;
+            }
+        }
+
+        time_engine_client *first = this->client_first();
+        bool main_active = first && first->next_event_time < window_end;
+
+        if (nb_active == 0)
+        {
+            this->exec_clients();
+        }
+        else if (nb_active == 1 && !main_active)
+        {
+            // Only one partition has something to do, no need to wake-up the threads
+            active->exec_clients();
+        }
+        else
+        {
+            pthread_barrier_wait(&this->partition_barrier);
+            this->exec_clients();
+            pthread_barrier_wait(&this->partition_barrier);
+        }
+
+        // All partitions are stopped, cross-partition events can now be exchanged
+        for (auto &callback: this->partition_sync_callbacks)
+        {
+            callback.second(callback.first);
+        }
+
+        // Forward to the main engine the requests done by components of the partitions, in a fixed
+        // order to stay deterministic
+        for (time_engine *partition: this->partitions)
+        {
+            if (partition->finished && !this->finished)
+            {
+                this->quit(partition->stop_status);
+            }
+            else if (partition->pause_req)
+            {
+                this->pause();
+            }
+            if (partition->checkpoint_path != "")
+            {
+                this->checkpoint_req(partition->checkpoint_path);
+                partition->checkpoint_path = "";
+            }
+            partition->pause_req = false;
+            partition->stop_req = false;
+        }
+
+        if (this->stop_req)
+        {
+            break;
+        }
+    }
+
+    this->window_end = INT64_MAX;
+
+    return this->get_next_event_time();
 }
 
 
 
 int64_t vp::time_engine::exec()
 {
-    time_engine_client *current = first_client;
+    if (unlikely(this->is_partitioned()))
+    {
+        return this->exec_partitions();
+    }
+
+    return this->exec_clients();
+}
 
-    if (current)
+
+
+int64_t vp::time_engine::exec_clients()
+{
+    time_engine_client *current = this->client_first();
+
+    if (current && current->next_event_time < this->window_end)
     {
-        first_client = current->next;
+        this->client_pop_first();
         current->is_enqueued = false;
 
         // Update the global engine time with the current event time
@@ -55,9 +320,19 @@ int64_t vp::time_engine::exec()
         {
             current->running = true;
 
-            int64_t time = current->exec();
+            int64_t time;
+            if (unlikely(this->profiler != NULL))
+            {
+                vp::profiler_stats *prev = this->profiler->enter(current);
+                time = current->exec();
+                this->profiler->leave(prev);
+            }
+            else
+            {
+                time = current->exec();
+            }
 
-            time_engine_client *next = first_client;
+            time_engine_client *next = this->client_first();
 
             // Shortcut to quickly continue with the same client
             if (likely(time > 0))
@@ -65,16 +340,15 @@ int64_t vp::time_engine::exec()
                 time += this->time;
                 if (likely((!next || next->next_event_time > time)))
                 {
-                    if (likely(!this->stop_req))
+                    if (likely(!this->stop_req && time < this->window_end))
                     {
                         this->time = time;
                         continue;
                     }
                     else
                     {
-                        current->next = first_client;
-                        first_client = current;
                         current->next_event_time = time;
+                        this->client_push_first(current);
                         current->is_enqueued = true;
                         current->running = false;
                         break;
@@ -89,33 +363,27 @@ int64_t vp::time_engine::exec()
             if (time > 0)
             {
                 current->next_event_time = time;
-                time_engine_client *client = next->next, *prev = next;
-                while (client && client->next_event_time < time)
-                {
-                    prev = client;
-                    client = client->next;
-                }
-                current->next = client;
-                prev->next = current;
+                this->client_insert_after_first(current);
                 current->is_enqueued = true;
             }
 
             current->running = false;
 
-            current = first_client;
+            current = this->client_first();
 
             // Leave the loop either if there is no more client to schedule or if there is a stop request.
             // In case of a stop request, always take it into account when time is increased so that teh engine
             // is stopped at the end of the current timestamp. This will ensure the step operation, which is using a
             // stop event, is stepping until the end of the timestamp.
-            if (!current || (this->stop_req && current->next_event_time > this->time))
+            if (!current || (this->stop_req && current->next_event_time > this->time) ||
+                current->next_event_time >= this->window_end)
             {
                 break;
             }
 
-            vp_assert(first_client->next_event_time >= get_time(), NULL, "event time is before vp time\n");
+            vp_assert(current->next_event_time >= get_time(), NULL, "event time is before vp time\n");
 
-            first_client = current->next;
+            this->client_pop_first();
             current->is_enqueued = false;
 
             // Update the global engine time with the current event time
@@ -123,14 +391,8 @@ int64_t vp::time_engine::exec()
         }
     }
 
-    int64_t time = -1;
-
-    if (this->first_client)
-    {
-        time = this->first_client->next_event_time;
-    }
-
-    return time;
+    time_engine_client *first = this->client_first();
+    return first ? first->next_event_time : -1;
 }
 
 
@@ -184,6 +446,11 @@ int64_t vp::time_engine::run_until(int64_t end_time)
         // when locks are handled.
         this->stop_req = false;
 
+        if (unlikely(this->checkpoint_path != ""))
+        {
+            this->checkpoint_handle();
+        }
+
         // Checks locks since we may have been stopped by them
         this->handle_locks();
 
@@ -216,6 +483,11 @@ int64_t vp::time_engine::run()
         // when locks are handled.
         this->stop_req = false;
 
+        if (unlikely(this->checkpoint_path != ""))
+        {
+            this->checkpoint_handle();
+        }
+
         // In case there is no more event, stall the engine until something happens.
         if (time == -1)
         {
@@ -254,16 +526,7 @@ bool vp::time_engine::dequeue(time_engine_client *client)
 
     client->is_enqueued = false;
 
-    time_engine_client *current = this->first_client, *prev = NULL;
-    while (current && current != client)
-    {
-        prev = current;
-        current = current->next;
-    }
-    if (prev)
-        prev->next = client->next;
-    else
-        this->first_client = client->next;
+    this->client_remove(client);
 
     return true;
 }
@@ -272,8 +535,6 @@ bool vp::time_engine::dequeue(time_engine_client *client)
 
 bool vp::time_engine::enqueue(time_engine_client *client, int64_t full_time)
 {
-    bool update = false;
-
     vp_assert(full_time >= get_time(), NULL, "Time must be higher than current time\n");
 
     if (client->is_running())
@@ -287,9 +548,29 @@ bool vp::time_engine::enqueue(time_engine_client *client, int64_t full_time)
     }
 
     client->is_enqueued = true;
+    client->next_event_time = full_time;
+
+    this->client_insert(client);
+
+    if (this->client_first() == client && this->launcher)
+    {
+        this->launcher->was_updated();
+    }
+
+    return true;
+}
+
+
+
+void vp::time_engine::client_insert(time_engine_client *client)
+{
+    if (this->use_client_heap)
+    {
+        this->client_heap_push(client, this->client_heap_seq++);
+        return;
+    }
 
     time_engine_client *current = first_client, *prev = NULL;
-    client->next_event_time = full_time;
     while (current && current->next_event_time < client->next_event_time)
     {
         prev = current;
@@ -298,18 +579,114 @@ bool vp::time_engine::enqueue(time_engine_client *client, int64_t full_time)
     if (prev)
         prev->next = client;
     else
-    {
-        update = true;
         first_client = client;
-    }
     client->next = current;
+}
+
+
 
-    if (update && this->launcher)
+void vp::time_engine::client_remove(time_engine_client *client)
+{
+    if (this->use_client_heap)
     {
-        this->launcher->was_updated();
+        this->client_heap_remove(client->heap_index);
+        return;
     }
 
-    return true;
+    time_engine_client *current = this->first_client, *prev = NULL;
+    while (current && current != client)
+    {
+        prev = current;
+        current = current->next;
+    }
+    if (prev)
+        prev->next = client->next;
+    else
+        this->first_client = client->next;
+}
+
+
+
+void vp::time_engine::client_heap_push(time_engine_client *client, uint64_t seq)
+{
+    client->heap_seq = seq;
+    client->heap_index = this->client_heap.size();
+    this->client_heap.push_back(client);
+    this->client_heap_sift_up(client->heap_index);
+}
+
+
+
+void vp::time_engine::client_heap_remove(int index)
+{
+    time_engine_client *last = this->client_heap.back();
+    this->client_heap.pop_back();
+
+    if (index < (int)this->client_heap.size())
+    {
+        // Move the last client to the hole and put it back at the right place, which can be
+        // either above or below since the hole is not necessarily the root.
+        this->client_heap[index] = last;
+        last->heap_index = index;
+        this->client_heap_sift_up(index);
+        this->client_heap_sift_down(last->heap_index);
+    }
+}
+
+
+
+void vp::time_engine::client_heap_sift_up(int index)
+{
+    time_engine_client *client = this->client_heap[index];
+
+    while (index > 0)
+    {
+        int parent_index = (index - 1) / 2;
+        time_engine_client *parent = this->client_heap[parent_index];
+        if (!this->client_heap_before(client, parent))
+        {
+            break;
+        }
+        this->client_heap[index] = parent;
+        parent->heap_index = index;
+        index = parent_index;
+    }
+
+    this->client_heap[index] = client;
+    client->heap_index = index;
+}
+
+
+
+void vp::time_engine::client_heap_sift_down(int index)
+{
+    int size = this->client_heap.size();
+    time_engine_client *client = this->client_heap[index];
+
+    while (1)
+    {
+        int child_index = index * 2 + 1;
+        if (child_index >= size)
+        {
+            break;
+        }
+        if (child_index + 1 < size &&
+            this->client_heap_before(this->client_heap[child_index + 1], this->client_heap[child_index]))
+        {
+            child_index++;
+        }
+        time_engine_client *child = this->client_heap[child_index];
+        if (!this->client_heap_before(child, client))
+        {
+            break;
+        }
+        this->client_heap[index] = child;
+        child->heap_index = index;
+        index = child_index;
+    }
+
+    this->client_heap[index] = client;
+    client->heap_index = index;
 }
 
 
@@ -344,6 +721,188 @@ void vp::time_engine::pause()
 
 
 
+void vp::time_engine::checkpoint_req(std::string path)
+{
+    // Only the first request of a timestamp is taken into account
+    if (this->checkpoint_path == "")
+    {
+        this->checkpoint_path = path;
+    }
+    this->stop_req = true;
+}
+
+
+
+void vp::time_engine::checkpoint_handle()
+{
+    std::string path = this->checkpoint_path;
+    this->checkpoint_path = "";
+
+    try
+    {
+        this->checkpoint_save(path);
+    }
+    catch (const std::runtime_error &e)
+    {
+        this->top->warning.force_warning("Failed to save checkpoint: %s\n", e.what());
+    }
+}
+
+
+
+void vp::time_engine::checkpoint_io(vp::checkpoint *ckpt)
+{
+    ckpt->section_open("@time_engine");
+    ckpt->io(this->time);
+    for (time_engine *partition: this->partitions)
+    {
+        ckpt->io(partition->time);
+    }
+    ckpt->section_close();
+}
+
+
+
+static void time_engine_events_clear(vp::component *comp)
+{
+    vp::clock_engine *clock = dynamic_cast<vp::clock_engine *>(comp);
+    if (clock)
+    {
+        clock->events_clear();
+    }
+
+    for (vp::component *child: comp->get_childs())
+    {
+        time_engine_events_clear(child);
+    }
+}
+
+
+
+void vp::time_engine::clients_resync()
+{
+    // Reinsert all clients so that none of them is executed before the current time
+    std::vector<time_engine_client *> clients;
+    while (this->client_first())
+    {
+        clients.push_back(this->client_first());
+        this->client_pop_first();
+    }
+
+    for (time_engine_client *client: clients)
+    {
+        if (client->next_event_time < this->time)
+        {
+            client->next_event_time = this->time;
+        }
+        this->client_insert(client);
+    }
+}
+
+
+
+void vp::time_engine::checkpoint_save(std::string path)
+{
+    vp::checkpoint ckpt(this->top, path, false);
+
+    this->top->checkpoint_check_all();
+
+    this->checkpoint_io(&ckpt);
+    this->top->checkpoint_io_all(&ckpt);
+
+    ckpt.save();
+}
+
+
+
+void vp::time_engine::checkpoint_restore(std::string path)
+{
+    vp::checkpoint ckpt(this->top, path, true);
+
+    this->top->checkpoint_check_all();
+
+    ckpt.load();
+
+    // The time must be restored first since the clock engines are enqueueing themselves at their
+    // saved time. Their events are first all removed, as an event may have been enqueued during
+    // reset into a different engine than the one where it was pending when the checkpoint was
+    // saved.
+    this->checkpoint_io(&ckpt);
+    time_engine_events_clear(this->top);
+    this->top->checkpoint_io_all(&ckpt);
+
+    // Clients which are not saved, like time schedulers, may have been enqueued in the past
+    this->clients_resync();
+    for (time_engine *partition: this->partitions)
+    {
+        partition->clients_resync();
+    }
+}
+
+
+
+void vp::time_engine::fork_child()
+{
+    // Other threads may have been waiting on the condition or pending on a lock when the process
+    // was forked, they must be forgotten. Only the lock of the forking thread remains.
+    pthread_mutex_init(&this->lock_mutex, NULL);
+    pthread_cond_init(&this->cond, NULL);
+    this->lock_req = 1;
+
+    // Partition threads are started again at the next window
+    this->partition_threads.clear();
+}
+
+
+
+std::string vp::time_engine::profiling_report(bool json)
+{
+    if (this->profiler == NULL)
+    {
+        return "";
+    }
+
+    std::vector<vp::profiler *> profilers = { this->profiler };
+    for (time_engine *partition: this->partitions)
+    {
+        profilers.push_back(partition->profiler);
+    }
+
+    return vp::profiler::report(profilers, json);
+}
+
+
+
+void vp::time_engine::profiling_dump()
+{
+    if (this->profiler == NULL)
+    {
+        return;
+    }
+
+    std::string path = this->config->get_child_str("profiling/path");
+    if (path == "")
+    {
+        path = "profile";
+    }
+
+    for (bool json: { false, true })
+    {
+        std::string file_path = path + (json ? ".json" : ".txt");
+        FILE *file = fopen(file_path.c_str(), "w");
+        if (file == NULL)
+        {
+            this->top->warning.force_warning("Failed to open profiling report (path: %s, error: %s)\n",
+                file_path.c_str(), strerror(errno));
+            continue;
+        }
+        fprintf(file, "%s%s", this->profiling_report(json).c_str(), json ? "\n" : "");
+        fclose(file);
+    }
+}
+
+
+
 void vp::time_engine::flush()
 {
     this->top->flush_all();
@@ -279,6 +279,32 @@ void vp::trace_engine::flush()
     }
 }
 
+void vp::trace_engine::fork_prepare()
+{
+    this->flush();
+
+    // Wait until all buffers have been processed by the dumper thread and keep the mutex so that
+    // it stays idle until the fork is done
+    pthread_mutex_lock(&mutex);
+    while (this->event_buffers.size() + (this->current_buffer != NULL) != TRACE_EVENT_NB_BUFFER)
+    {
+        pthread_cond_wait(&cond, &mutex);
+    }
+}
+
+void vp::trace_engine::fork_parent()
+{
+    pthread_mutex_unlock(&mutex);
+}
+
+void vp::trace_engine::fork_child()
+{
+    // The dumper thread does not exist anymore in the child, and was waiting on the condition
+    pthread_mutex_init(&mutex, NULL);
+    pthread_cond_init(&cond, NULL);
+    this->thread = new std::thread(&trace_engine::vcd_routine, this);
+}
+
 void vp::trace_engine::dump_event_to_buffer(vp::trace *trace, int64_t timestamp, uint8_t *event, int bytes, bool include_size)
 {
     if (!this->global_enable)
@@ -242,6 +242,8 @@ void vp::component::pre_start_all()
 void vp::component_clock::clk_reg(component *_this, component *clock)
 {
     _this->clock = (clock_engine *)clock;
+    // The time engine depends on the clock domain partition, make sure it is looked up again
+    _this->time_engine_ptr = NULL;
     for (auto &x : _this->childs)
     {
         x->clk_reg(x, clock);
@@ -339,7 +341,16 @@ vp::time_engine *vp::component::get_time_engine()
 {
     if (this->time_engine_ptr == NULL)
     {
-        this->time_engine_ptr = (vp::time_engine*)this->get_service("time");
+        // Clocked components are executed by the engine of their clock domain, which is not the
+        // main one if the domain is in a partition
+        if (this->clock && this->clock->get_engine())
+        {
+            this->time_engine_ptr = this->clock->get_engine();
+        }
+        else
+        {
+            this->time_engine_ptr = (vp::time_engine*)this->get_service("time");
+        }
     }
 
     return this->time_engine_ptr;
@@ -1071,6 +1082,39 @@ void vp::component::dump_traces_recursive(FILE *file)
     }
 }
 
+void vp::component::checkpoint_check_all()
+{
+    if (!this->checkpoint_supported)
+    {
+        throw std::runtime_error("Component does not support checkpoints (path: " +
+            this->get_path() + ")");
+    }
+
+    for (auto& x: this->get_childs())
+    {
+        x->checkpoint_check_all();
+    }
+}
+
+void vp::component::checkpoint_io_all(vp::checkpoint *ckpt)
+{
+    ckpt->section_open(this->get_path());
+
+    for (auto reg : this->regs)
+    {
+        ckpt->io(reg->value_bytes, reg->nb_bytes);
+    }
+
+    this->checkpoint_io(ckpt);
+
+    ckpt->section_close();
+
+    for (auto& x: this->get_childs())
+    {
+        x->checkpoint_io_all(ckpt);
+    }
+}
+
 std::string vp::__gv_get_component_path(js::config *gv_config, std::string relpath)
 {
     js::config *inc_dirs = gv_config->get("include_dirs");
@@ -35,6 +35,8 @@ public:
 
   void pre_start();
 
+  std::string handle_command(Gv_proxy *proxy, FILE *req_file, FILE *reply_file, std::vector<std::string> args, std::string req);
+
 
 private:
 
@@ -82,7 +84,16 @@ int clock_domain::build()
     this->factor = 1;
   }
 
-  this->set_time_engine((vp::time_engine*)this->get_service("time"));
+  // Clock domains belonging to a partition are executed by the partition engine, on its own
+  // thread, together with all the components they are clocking
+  vp::time_engine *engine = (vp::time_engine*)this->get_service("time");
+  js::config *partition = this->get_js_config()->get("partition");
+  if (partition != NULL)
+  {
+    engine = engine->get_partition(partition->get_str());
+  }
+
+  this->set_time_engine(engine);
 
   return 0;
 }
@@ -92,14 +103,34 @@ void clock_domain::pre_start()
   out.reg(this);
 }
 
+std::string clock_domain::handle_command(Gv_proxy *proxy, FILE *req_file, FILE *reply_file, std::vector<std::string> args, std::string req)
+{
+  // Used to change the frequency from the proxy, for example to give a different one to each
+  // copy of a forked simulation
+  if (args.size() == 2 && args[0] == "set_frequency")
+  {
+    int64_t frequency = strtoll(args[1].c_str(), NULL, 0);
+    if (frequency > 0)
+    {
+      clock_domain::set_frequency(this, frequency);
+      return "err=0";
+    }
+  }
+  return "err=1";
+}
+
 
 vp::clock_engine::clock_engine(js::config *config)
   : vp::time_engine_client(config), cycles(0), period(0), freq(0)
 {
   delayed_queue = NULL;
-  for (int i=0; i<CLOCK_EVENT_QUEUE_SIZE; i++)
+  for (int i=0; i<CLOCK_EVENT_WHEEL_LEVELS; i++)
   {
-    event_queue[i] = NULL;
+    wheel_occupancy[i] = 0;
+    for (int j=0; j<CLOCK_EVENT_QUEUE_SIZE; j++)
+    {
+      event_wheel[i][j] = NULL;
+    }
   }
   current_cycle = 0;
 }
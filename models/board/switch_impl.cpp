@@ -52,6 +52,8 @@ void Switch::sync(void *__this, int value)
 
 int Switch::build()
 {
+    this->checkpoint_unsupported();
+
     this->in_itf.set_sync_meth(&Switch::sync);
     this->new_slave_port("input", &this->in_itf);
 
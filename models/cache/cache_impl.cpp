@@ -61,6 +61,7 @@ public:
 
   int build();
   void start();
+  void checkpoint_io(vp::checkpoint *ckpt);
 
 private:
 
@@ -290,6 +291,27 @@ void Cache::start()
 
 
 
+void Cache::checkpoint_io(vp::checkpoint *ckpt)
+{
+  // Pending refills are in-flight requests, which are not saved
+  ckpt->io(this->enabled);
+  ckpt->io(this->R1);
+  ckpt->io(this->R2);
+  ckpt->io(this->lru_out);
+  ckpt->io(this->refill_timestamp);
+
+  for (unsigned int i=0; i<this->nb_sets*this->nb_ways; i++)
+  {
+    cache_line_t *line = &this->lines[i];
+    ckpt->io(line->tag);
+    ckpt->io(line->dirty);
+    ckpt->io(line->timestamp);
+    ckpt->io(line->data, this->line_size);
+  }
+}
+
+
+
 cache_line_t *Cache::refill(int line_index, unsigned int addr, unsigned int tag, vp::io_req *req, bool *pending)
 {
   // The cache supports only 1 refill at the same time.
@@ -52,6 +52,7 @@ public:
 
     int build();
     void reset(bool active);
+    void checkpoint_io(vp::checkpoint *ckpt);
 
 private:
     static void event_handler(void *_this, vp::clock_event *event);
@@ -122,6 +123,14 @@ void Clint::reset(bool active)
     }
 }
 
+void Clint::checkpoint_io(vp::checkpoint *ckpt)
+{
+    // Timer events are saved by the framework
+    ckpt->io(this->msip.data(), this->nb_cores * sizeof(msip_t));
+    ckpt->io(this->mtimecmp.data(), this->nb_cores * sizeof(mtimecmp_t));
+    ckpt->io(this->start_time);
+}
+
 void Clint::event_handler(void *__this, vp::clock_event *event)
 {
     Clint *_this = (Clint *)__this;
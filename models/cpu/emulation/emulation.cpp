@@ -355,6 +355,8 @@ void emulation::flush_cache_ack_sync(void *__this, bool active)
 
 int emulation::build()
 {
+    this->checkpoint_unsupported();
+
     traces.new_trace("trace", &trace, vp::DEBUG);
 
     new_slave_port("dbg_unit", &this->dbg_unit);
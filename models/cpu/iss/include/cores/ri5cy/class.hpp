@@ -85,7 +85,9 @@ public:
 
     int build();
     void start();
+    void stop();
     void reset(bool active);
+    void checkpoint_io(vp::checkpoint *ckpt);
     virtual void target_open();
 
     Iss iss;
@@ -151,6 +151,7 @@ public:
 
     void build();
     void reset(bool active);
+    void checkpoint_io(vp::checkpoint *ckpt);
 
     void declare_pcer(int index, std::string name, std::string help);
     void declare_csr(CsrAbtractReg *reg, std::string name, iss_reg_t address, iss_reg_t reset_val=0, iss_reg_t mask=-1);
@@ -22,6 +22,35 @@
 #pragma once
 
 #include <cpu/iss/include/types.hpp>
+#include <unordered_map>
+
+/*
+ * Decoder snapshot file. It starts with a iss_decode_snapshot_header_t and is followed by
+ * the pages, which have the same layout as the instruction cache pages, so that an instruction
+ * is found from its pc without any search.
+ */
+typedef struct
+{
+    char magic[8];
+    uint64_t isa_hash;
+    uint64_t elf_hash;
+    uint64_t nb_pages;
+} iss_decode_snapshot_header_t;
+
+typedef struct
+{
+    uint64_t opcode;
+    // Index of the decoder item plus 1, or 0 if the instruction was not decoded
+    uint32_t item;
+    uint32_t padding;
+} iss_decode_snapshot_entry_t;
+
+typedef struct
+{
+    // Instruction page index, which is the pc of the first instruction shifted by INSN_PAGE_BITS
+    uint64_t index;
+    iss_decode_snapshot_entry_t entries[INSN_PAGE_SIZE];
+} iss_decode_snapshot_page_t;
 
 class Decode
 {
@@ -29,17 +58,21 @@ public:
     Decode(Iss &iss);
     void build();
     void reset(bool active);
+    void stop();
 
     bool decode_pc(iss_insn_t *insn, iss_reg_t pc);
 
     vp::trace trace;
 
     static void flush_cache_sync(void *_this, bool active);
+    static void flush_cache_range_sync(void *_this, vp::io_req *req);
 
     void parse_isa();
 
     // decode
     vp::wire_slave<bool> flush_cache_itf;
+    // The address and size of the request give the range of instructions to invalidate
+    vp::wire_slave<vp::io_req *> flush_cache_range_itf;
     iss_insn_cache_t insn_cache;
     const char *isa;
     iss_reg_t misa_extensions;
@@ -54,5 +87,25 @@ private:
     uint64_t decode_ranges(iss_opcode_t opcode, iss_decoder_range_set_t *range_set, bool is_signed);
     int decode_info(iss_insn_t *insn, iss_opcode_t opcode, iss_decoder_arg_info_t *info, bool is_signed);
 
+    void snapshot_open(std::string dir);
+    void snapshot_index_item(iss_decoder_item_t *item);
+    void snapshot_load();
+    void snapshot_save();
+    iss_decode_snapshot_page_t *snapshot_page_get(uint64_t index);
+    inline iss_decode_snapshot_entry_t *snapshot_entry_get(iss_reg_t pc);
+
+    // Path of the decoder snapshot, or empty if snapshots are disabled
+    std::string snapshot_path;
+    uint64_t snapshot_isa_hash;
+    uint64_t snapshot_elf_hash;
+    // Decoder items, indexed by their snapshot ID, and the reverse map
+    std::vector<iss_decoder_item_t *> snapshot_items;
+    std::unordered_map<iss_decoder_item_t *, uint32_t> snapshot_item_ids;
+    // Pages of the snapshot, loaded at startup and completed with the instructions decoded during
+    // this run, which are dumped when the simulation stops. The last page used is kept aside
+    // since instructions are mostly decoded one after the other.
+    std::unordered_map<uint64_t, iss_decode_snapshot_page_t *> snapshot_pages;
+    iss_decode_snapshot_page_t *snapshot_last_page = NULL;
+
     Iss &iss;
 };
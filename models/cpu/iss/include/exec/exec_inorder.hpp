@@ -37,6 +37,7 @@ public:
     Exec(Iss &iss);
     void build();
     void reset(bool active);
+    void checkpoint_io(vp::checkpoint *ckpt);
 
     inline void stalled_inc();
     inline void stalled_dec();
@@ -90,7 +91,7 @@ public:
     vp::clock_event *instr_event;
 
     static void exec_instr(void *__this, vp::clock_event *event);
-    static void exec_instr_untimed(void *__this, vp::clock_event *event);
+    static void exec_instr_quantum(void *__this, vp::clock_event *event);
     static void exec_instr_check_all(void *__this, vp::clock_event *event);
 
     void hwloop_set_start(int index, iss_reg_t pc);
@@ -135,6 +136,10 @@ public:
 
     bool irq_locked;
 
+    // Maximum number of instructions executed per activation in loosely-timed mode, or 0 when
+    // instructions are executed one per cycle
+    int quantum;
+
 
 private:
     static void flush_cache_ack_sync(void *_this, bool active);
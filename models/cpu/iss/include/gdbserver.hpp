@@ -69,7 +69,6 @@ public:
     static void data_response(void *_this, vp::io_req *req);
 
     void breakpoint_stub_insert(iss_insn_t *insn, iss_reg_t pc);
-    void breakpoint_stub_remove(iss_insn_t *insn, iss_reg_t pc);
     bool breakpoint_check_pc(iss_addr_t pc);
 
     void decode_insn(iss_insn_t *insn, iss_addr_t pc);
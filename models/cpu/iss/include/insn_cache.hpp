@@ -28,6 +28,10 @@
 
 int insn_cache_init(Iss *iss);
 void iss_cache_flush(Iss *iss);
+// Invalidate the decoded instructions overlapping the specified physical address range
+void iss_cache_flush_range(Iss *iss, iss_addr_t addr, iss_addr_t size);
+// Invalidate a single instruction so that it is decoded again when executed
+void iss_cache_flush_insn(Iss *iss, iss_insn_t *insn);
 bool insn_cache_is_decoded(Iss *iss, iss_insn_t *insn);
 
 iss_insn_t *insn_cache_get_insn_from_cache(Iss *iss, iss_reg_t vaddr);
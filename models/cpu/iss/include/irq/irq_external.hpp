@@ -30,6 +30,7 @@ public:
     Irq(Iss &iss);
 
     void build();
+    void checkpoint_io(vp::checkpoint *ckpt);
 
     bool mtvec_access(bool is_write, iss_reg_t &value);
     bool stvec_access(bool is_write, iss_reg_t &value);
@@ -46,6 +46,7 @@ public:
     Irq(Iss &iss);
 
     void build();
+    void checkpoint_io(vp::checkpoint *ckpt);
 
     bool mideleg_access(bool is_write, iss_reg_t &value);
     bool mip_access(bool is_write, iss_reg_t &value);
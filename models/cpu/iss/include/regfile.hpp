@@ -31,6 +31,7 @@ public:
     Regfile(Iss &iss);
 
     void reset(bool active);
+    void checkpoint_io(vp::checkpoint *ckpt);
 
     iss_reg_t regs[ISS_NB_REGS];
     iss_freg_t fregs[ISS_NB_FREGS];
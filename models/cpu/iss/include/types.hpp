@@ -337,6 +337,9 @@ typedef struct iss_decoder_item_s
             int width;
             int nb_groups;
             iss_decoder_item_t **groups;
+            // Table directly indexed by the opcode, or NULL if the groups must be walked.
+            // Unknown opcodes give the item for other opcodes, or NULL.
+            iss_decoder_item_t **table;
         } group;
     } u;
 
@@ -432,6 +435,10 @@ typedef struct iss_insn_block_s
 #define INSN_PAGE_SIZE (1 << (INSN_PAGE_BITS - 1))
 #define INSN_PAGE_MASK (INSN_PAGE_SIZE - 1)
 
+#define INSN_PAGE_TLB_BITS 6
+#define INSN_PAGE_TLB_SIZE (1 << INSN_PAGE_TLB_BITS)
+#define INSN_PAGE_TLB_MASK (INSN_PAGE_TLB_SIZE - 1)
+
 
 typedef struct iss_insn_page_s iss_insn_page_t;
 
@@ -446,6 +453,10 @@ typedef struct iss_insn_cache_s
     iss_insn_page_t *current_insn_page;
     iss_reg_t current_insn_page_base;
     std::unordered_map<iss_reg_t, iss_insn_page_t *>pages;
+    // Direct-mapped cache of the last pages used, indexed by the low bits of the page index, so that
+    // jumps to other pages do not need to look into the map. Entries with a NULL page are invalid.
+    iss_reg_t tlb_index[INSN_PAGE_TLB_SIZE];
+    iss_insn_page_t *tlb_page[INSN_PAGE_TLB_SIZE];
     iss_insn_page_t *first_free_page;
     iss_insn_page_t *first_page;
     iss_insn_page_t *last_page;
@@ -20,9 +20,37 @@
 #
 
 import collections
+import hashlib
+import inspect
+import os.path
+import pickle
 
 
 
+# Digests of the python sources used to describe ISAs, computed only once per process
+source_digests = {}
+
+
+def get_source_digest(cls):
+    # Return a digest of the sources of a class and of the classes it inherits from
+    digest = ''
+    for parent in cls.__mro__:
+        if parent is object:
+            continue
+        try:
+            path = os.path.abspath(inspect.getsourcefile(parent))
+        except TypeError:
+            continue
+
+        if source_digests.get(path) is None:
+            with open(path, 'rb') as fd:
+                source_digests[path] = hashlib.sha256(fd.read()).hexdigest()
+
+        digest += source_digests[path]
+
+    return digest
+
+
 def dump(isaFile, str, level=0):
     for i in range(0, level):
         isaFile.write('  ')
@@ -355,6 +383,142 @@ class DecodeLeaf(object):
     def get_name(self):
         return self.instr.get_full_name()
 
+# Opcode groups are emitted with a table directly indexed by the opcode when they have at least
+# DECODE_TABLE_MIN_GROUPS entries. Fields up to DECODE_TABLE_DENSE_WIDTH bits, like the major
+# opcode or funct3/funct7, always get one, while wider fields up to DECODE_TABLE_MAX_WIDTH bits
+# only get one when at least one quarter of the table is used.
+DECODE_TABLE_MIN_GROUPS = 4
+DECODE_TABLE_DENSE_WIDTH = 7
+DECODE_TABLE_MAX_WIDTH = 10
+
+
+class DecodeTreeOptimizer(object):
+    """
+    This class chooses the opcode fields used by the decode trees, based on an instruction profile.
+
+    Each level of a decode tree is an opcode group whose entries are compared one by one by the
+    decoder. The field used at each level is chosen among the contiguous sets of bits discriminating
+    all the instructions, and the entries of each group are sorted by decreasing weight, so that
+    the number of levels and entries walked to decode an instruction, weighted by how often the
+    instruction is executed, is minimal.
+
+    Attributes
+    ----------
+    profile : dict
+        Number of executions of each instruction, indexed by instruction label. Instructions which
+        are not in the profile are considered executed once.
+    """
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.costs = {}
+
+    def get_weight(self, instr):
+        return self.profile.get(instr.getLabel(), 0) + 1
+
+    def get_field(self, instrs, mask):
+        """Return the field which should be used to split a set of instructions.
+
+        Parameters
+        ----------
+        instrs : list
+            Instructions to be split.
+        mask : int
+            Bits which can still be used to discriminate them.
+
+        Returns
+        -------
+        int
+            The mask of the field, or None if there is no field common to all instructions, in
+            which case the default algorithm should be used.
+        """
+        fields = self.__get_fields(instrs, mask)
+
+        if len(fields) <= 1:
+            return fields[0] if len(fields) == 1 else None
+
+        best_field = None
+        best_cost = None
+        for field in fields:
+            cost = self.__get_split_cost(instrs, mask, field)
+            if best_cost is None or cost < best_cost:
+                best_field = field
+                best_cost = cost
+
+        return best_field
+
+    def sort_groups(self, groups):
+        """Sort opcode groups so that the most executed ones are compared first.
+
+        Parameters
+        ----------
+        groups : OrderedDict
+            Instructions of each group, indexed by opcode.
+
+        Returns
+        -------
+        OrderedDict
+            The sorted groups.
+        """
+        return collections.OrderedDict(sorted(groups.items(),
+            key=lambda group: -sum([self.get_weight(instr) for instr in group[1]])))
+
+    def __get_fields(self, instrs, mask):
+        # Return all the maximal contiguous sets of bits which are discriminating for all the
+        # instructions
+        common = mask
+        for instr in instrs:
+            common &= instr.care_mask
+
+        fields = []
+        while common != 0:
+            low_bit = common & -common
+            field = common & ~(common + low_bit)
+            fields.append(field)
+            common &= ~field
+
+        return fields
+
+    def __get_split_cost(self, instrs, mask, field):
+        groups = collections.OrderedDict()
+        for instr in instrs:
+            groups.setdefault(instr.value & field, []).append(instr)
+
+        # Each instruction costs the number of group entries compared before its own entry is
+        # found, plus the cost of the sub-tree
+        cost = 0
+        for index, group in enumerate(self.sort_groups(groups).values()):
+            cost += self.__get_cost(group, mask & ~field)
+            cost += (index + 1) * sum([self.get_weight(instr) for instr in group])
+
+        return cost
+
+    def __get_cost(self, instrs, mask):
+        # Return the sum of the number of entries compared to decode each instruction, weighted by
+        # the instruction weight
+        min_size = min([instr.len for instr in instrs])
+        mask &= (1 << min_size) - 1
+
+        if len(instrs) == 1:
+            # All the remaining fields of the instruction must be checked, one level with a
+            # single entry per field
+            return self.get_weight(instrs[0]) * len(self.__get_fields(instrs, mask))
+
+        key = (frozenset([id(instr) for instr in instrs]), mask)
+        cost = self.costs.get(key)
+        if cost is None:
+            fields = self.__get_fields(instrs, mask)
+            if len(fields) == 0:
+                # The default algorithm will be used, just count one entry
+                cost = sum([self.get_weight(instr) for instr in instrs])
+            else:
+                cost = min([self.__get_split_cost(instrs, mask, field) for field in fields])
+
+            self.costs[key] = cost
+
+        return cost
+
+
 class DecodeTree(object):
     def __init__(self, isa, isaFile, instrs, mask, opcode):
         self.opcode = opcode
@@ -380,52 +544,45 @@ class DecodeTree(object):
         # a discriminating bit
         searchMask = 0
         for instr in instrs:
-            for bit in range(0, minSize):
-                if (currentMask & (1<<bit)) == 0: continue
-                if instr.encoding[bit] in ['0', '1']: searchMask |= 1<<bit
+            searchMask |= instr.care_mask
         currentMask &= searchMask
 
-        # Browse all instructions to find the biggest common opcode set
-        searchMask = currentMask
-        for instr in instrs:
+        # When a decoder profile is available, let the optimizer choose the field
+        searchMask = None
+        if isa.decoder_optimizer is not None:
+            searchMask = isa.decoder_optimizer.get_field(instrs, currentMask)
+            if searchMask is not None:
+                self.firstBit = (searchMask & -searchMask).bit_length() - 1
 
-            #print ('Parsing instr %s: %s' % (instr.encoding, instr.label))
-            done = False
-            firstBit = None
-            size = instr.len
-
-            for bit in range(0, size):
-                if done or not instr.encoding[bit] in ['0', '1'] or (searchMask & (1<<bit)) == 0: #, '-']:
-                    searchMask &= ~(1<<bit)
-                    if firstBit != None: 
-                        done = True
+        if searchMask is None:
+            # Browse all instructions to find the biggest common opcode set.
+            # For each instruction, only keep the first contiguous set of discriminating bits.
+            searchMask = currentMask
+            for instr in instrs:
+                instrMask = instr.care_mask & searchMask
+                if instrMask == 0:
+                    searchMask = 0
                     continue
-                elif firstBit == None:
-                    firstBit = bit
 
-            if firstBit != None and firstBit > self.firstBit: self.firstBit = firstBit
+                lowBit = instrMask & -instrMask
+                searchMask = instrMask & ~(instrMask + lowBit)
 
+                firstBit = lowBit.bit_length() - 1
+                if firstBit > self.firstBit: self.firstBit = firstBit
 
+            # In case we found no common mask, maybe we still have some discriminating
+            # bits where some instructions don't care
+            # Find a common mask where the opcode is either fully defined or don't care
+            if searchMask == 0 and len(instrs) > 1: 
+                # First find the biggest common discriminating bits
+                searchMask = currentMask
+                for instr in instrs:
+                    instrMask = instr.care_mask & currentMask
+                    if instrMask != 0:
+                        searchMask &= instrMask
 
-        # In case we found no common mask, maybe we still have some discriminating
-        # bits where some instructions don't care
-        # Find a common mask where the opcode is either fully defined or don't care
-        if searchMask == 0 and len(instrs) > 1: 
-            # First find the biggest common discriminating bits
-            searchMask = currentMask
-            for instr in instrs:
-                instrMask = 0
-                for bit in range(0, size):
-                    if (currentMask & (1<<bit)) == 0: continue
-                    if instr.encoding[bit] in ['0', '1']:
-                        instrMask |= 1<<bit
-                if instrMask != 0:
-                    searchMask &= instrMask
-            
-            for bit in range(0, size):
-                if searchMask & (1<<bit): 
-                    self.firstBit = bit
-                    break
+                if searchMask != 0:
+                    self.firstBit = (searchMask & -searchMask).bit_length() - 1
 
         if searchMask == 0 and len(instrs) > 1: 
             error = 'Error the following instructions have the same opcode:\n'
@@ -438,46 +595,31 @@ class DecodeTree(object):
         self.currentMask = currentMask
         mask = mask & ~currentMask
 
+        # Bits of the opcode, from the most significant one
+        opcodeBits = [bit for bit in range(minSize-1, -1, -1) if currentMask & (1<<bit)]
+
         # Now group them together in sub-groups depending on their
         # opcode for this mask
         groups = collections.OrderedDict({})
         for instr in instrs:
-            size = instr.len
-
-            opcodeList = ['']
-            isOther = False
-            # Extract opcode
-            for bit in range(size-1, -1, -1):
-                if (currentMask & (1<<bit)) == 0: continue
-                instrBit = instr.encoding[bit]
-                if instrBit in ['0', '1']:
-                    instrBits = [instrBit]
-                else:
-                    isOther = True
-                    break
-                newList = []
-                for bit in instrBits:
-                    for opcode in opcodeList:
-                        newList.append(opcode + bit)
-                opcodeList = newList
-
-            # Now register the instruction for each of its possible opcode
-            if not isOther:
-                for opcode in opcodeList:
-                    if groups.get(opcode) == None: groups[opcode] = []
-                    groups[opcode].append(instr)
+            # Instructions which don't care about some bits of the opcode can't be
+            # put in a group
+            if currentMask & ~instr.care_mask:
+                opcode = 'OTHERS'
             else:
-                if groups.get('OTHERS') == None: groups['OTHERS'] = []
-                groups['OTHERS'].append(instr)
+                opcode = ''.join(['1' if instr.value & (1<<bit) else '0' for bit in opcodeBits])
+
+            if groups.get(opcode) == None: groups[opcode] = []
+            groups[opcode].append(instr)
+
+        if isa.decoder_optimizer is not None:
+            groups = isa.decoder_optimizer.sort_groups(groups)
 
         self.opcode_width = 0
-        for opcode, instrs in groups.items():
+        for opcode in groups.keys():
             if opcode == 'OTHERS': continue
             if len(opcode) > self.opcode_width:
                 self.opcode_width = len(opcode)
-            names = []
-            for instr in instrs:
-                names.append(instr.label)
 
 
         for opcode, instrs in groups.items():
@@ -503,6 +645,29 @@ class DecodeTree(object):
         else:
             return list(self.subtrees.values())[0].get_name()
 
+    def need_table(self):
+        nb_groups = len([opcode for opcode in self.subtrees.keys() if opcode != 'OTHERS'])
+
+        if nb_groups < DECODE_TABLE_MIN_GROUPS or self.opcode_width > DECODE_TABLE_MAX_WIDTH:
+            return False
+
+        return self.opcode_width <= DECODE_TABLE_DENSE_WIDTH or nb_groups * 4 >= 1 << self.opcode_width
+
+    def gen_table(self):
+        # Each table entry gives the item of the corresponding opcode, or the item for other
+        # opcodes if there is one.
+        others = self.subtrees.get('OTHERS')
+        table = ['NULL' if others is None else '&' + others.get_name()] * (1 << self.opcode_width)
+
+        for opcode, subtree in self.subtrees.items():
+            if opcode != 'OTHERS':
+                table[int(opcode, 2)] = '&' + subtree.get_name()
+
+        self.dump('static iss_decoder_item_t *%s_table[] = {' % self.get_name())
+        for entry in table:
+            self.dump(' %s,' % entry)
+        self.dump(' };\n')
+
 
     def gen(self, isa, is_top=False):
 
@@ -529,6 +694,10 @@ class DecodeTree(object):
              
                 self.dump(' };\n')
 
+                need_table = self.need_table()
+                if need_table:
+                    self.gen_table()
+
                 self.dump('%siss_decoder_item_t %s = {\n' % ('' if is_top else 'static ', self.get_name()))
                 self.dump('  .is_insn=false,\n')
                 self.dump('  .is_active=false,\n')
@@ -539,7 +708,8 @@ class DecodeTree(object):
                 self.dump('      .bit=%d,\n' % self.firstBit)
                 self.dump('      .width=%d,\n' % self.opcode_width)
                 self.dump('      .nb_groups=%d,\n' % len(self.subtrees))
-                self.dump('      .groups=%s_groups\n' % self.get_name())
+                self.dump('      .groups=%s_groups,\n' % self.get_name())
+                self.dump('      .table=%s\n' % ('%s_table' % self.get_name() if need_table else 'NULL'))
                 self.dump('    }\n')
                 self.dump('  }\n')
                 self.dump('};\n')
@@ -646,6 +816,8 @@ class Isa(object):
         self.nb_decoder_tree = 0
         self.nb_insn = 0
         self.name = name
+        self.decoder_profile = None
+        self.decoder_optimizer = None
 
         for tree in self.trees:
             self.trees_dict[tree.name] = tree
@@ -689,6 +861,64 @@ class Isa(object):
     def get_tree(self, name):
         return self.trees_dict.get(name)
 
+    def set_decoder_profile(self, profile):
+        """Set the instruction profile used to optimize the decode trees.
+
+        Parameters
+        ----------
+        profile : dict
+            Number of executions of each instruction, indexed by instruction label.
+        """
+        self.decoder_profile = profile
+        self.decoder_optimizer = DecodeTreeOptimizer(profile) if profile is not None else None
+
+    def load_decoder_profile(self, path):
+        """Load the instruction profile used to optimize the decode trees.
+
+        The file has one instruction per line, with its label followed by its number of
+        executions, which is the output of gvsoc_analyze_insn.
+
+        Parameters
+        ----------
+        path : str
+            Path to the profile.
+        """
+        profile = {}
+        with open(path, 'r') as file:
+            for line in file.readlines():
+                fields = line.split()
+                if len(fields) >= 2:
+                    profile[fields[0]] = profile.get(fields[0], 0) + int(fields[1])
+
+        self.set_decoder_profile(profile)
+
+    def get_digest(self):
+        """Return a digest of everything which is used to generate the ISA code.
+
+        This includes the sources of the generator and of the classes describing the instructions,
+        so that two ISAs with the same digest generate the same code.
+        """
+        digest = hashlib.sha256()
+
+        digest.update(pickle.dumps([self.name, self.isa_string,
+            [[resource.name, resource.instances] for resource in self.resources],
+            self.decoder_profile], protocol=4))
+
+        classes = [type(self)]
+
+        for tree in self.trees:
+            digest.update(tree.name.encode('utf-8'))
+            for subset in tree.subsets:
+                classes.append(type(subset))
+            for insn in tree.get_insns():
+                classes.append(type(insn))
+                digest.update(insn.get_signature())
+
+        for cls in dict.fromkeys(classes):
+            digest.update(get_source_digest(cls).encode('utf-8'))
+
+        return digest.hexdigest()
+
     def gen(self, isaFile, isaFileHeader):
 
         self.isaFile = isaFile
@@ -863,6 +1093,17 @@ class Instr(object):
             index += 1
         InstrNames.append(self.decodeFunc)
         self.len = len(encoding.strip())
+
+        # Encoding as integers, bit N of care_mask is set if bit N is discriminating, and then
+        # value gives its value
+        self.care_mask = 0
+        self.value = 0
+        for bit, value in enumerate(encoding):
+            if value == '0' or value == '1':
+                self.care_mask |= 1 << bit
+                if value == '1':
+                    self.value |= 1 << bit
+
         self.power = power
         if group != None: self.group = group
         else: self.group = defaultInstrGroup
@@ -966,6 +1207,15 @@ class Instr(object):
         self.dump(isaFile, '\n')
 
 
+    def get_signature(self):
+        # Everything which ends up in the generated decoder item. Arguments are simple objects
+        # without back references, so they can be serialized as they are.
+        return pickle.dumps([
+            self.get_full_name(), self.encoding, self.execFunc, self.quick_execFunc, self.decode,
+            self.getLabel(), self.len, self.latency, self.resource, self.resource_latency,
+            self.resource_bandwidth, self.power_group, self.is_macro_op, self.isa_tags, self.args
+        ], protocol=4)
+
     def getOptions(self):
         if self.group != None: return self.group.getOptions()
         else: return collections.OrderedDict({})
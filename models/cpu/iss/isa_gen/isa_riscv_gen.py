@@ -2817,6 +2817,17 @@ class RiscvIsa(Isa):
 
             full_name = os.path.join(builddir, self.full_name)
 
+            # The digest of the ISA description is kept next to the generated files, so that
+            # nothing is generated if the files are already there for the same ISA
+            digest = self.get_digest()
+            digest_path = f'{full_name}.digest'
+
+            if os.path.exists(f'{full_name}.cpp') and os.path.exists(f'{full_name}.hpp') and \
+                    os.path.exists(digest_path):
+                with open(digest_path, 'r') as file:
+                    if file.read() == digest:
+                        return
+
             with open(f'{full_name}.cpp.new', 'w') as isaFile:
                 with open(f'{full_name}.hpp.new', 'w') as isaFileHeader:
                     Isa.gen(self, isaFile, isaFileHeader)
@@ -2828,3 +2839,6 @@ class RiscvIsa(Isa):
             if not os.path.exists(f'{full_name}.hpp') or \
                     not filecmp.cmp(f'{full_name}.hpp.new', f'{full_name}.hpp', shallow=False):
                 shutil.move(f'{full_name}.hpp.new', f'{full_name}.hpp')
+
+            with open(digest_path, 'w') as file:
+                file.write(digest)
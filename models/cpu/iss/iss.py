@@ -53,6 +53,11 @@ class Iss(st.Component):
         starts it (default: False).
     boot_addr : int, optional
         Address of the first instruction (default: 0)
+    quantum : int, optional
+        Loosely-timed mode, where the core executes up to this number of instructions each time it
+        is activated, and synchronizes with the rest of the system only when the quantum is over,
+        when an access is not serviced immediately or when an interrupt is received. This trades
+        timing accuracy for simulation speed (default: None, one instruction per cycle).
 
     """
 
@@ -81,7 +86,8 @@ class Iss(st.Component):
             user=False,
             internal_atomics=False,
             timed=True,
-            scoreboard=False):
+            scoreboard=False,
+            quantum=None):
 
         super(Iss, self).__init__(parent, name)
 
@@ -105,6 +111,9 @@ class Iss(st.Component):
             'boot_addr': boot_addr,
         })
 
+        if quantum is not None:
+            self.add_property('quantum', quantum)
+
         if core == 'ri5ky':
             self.add_c_flags(['-DCONFIG_GVSOC_ISS_RI5KY=1'])
 
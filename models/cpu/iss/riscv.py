@@ -53,6 +53,18 @@ class RiscvCommon(st.Component):
         starts it (default: False).
     boot_addr : int, optional
         Address of the first instruction (default: 0)
+    decoder_profile : str, optional
+        A path to an instruction profile, as dumped by gvsoc_analyze_insn, used to optimize the
+        instruction decoder for the most executed instructions (default: None).
+    decode_snapshot : str, optional
+        A path to a directory where snapshots of the decoded instructions are stored, keyed by the
+        binaries and the ISA, so that next runs of the same binaries skip most of the instruction
+        decoding (default: None).
+    quantum : int, optional
+        Loosely-timed mode, where the core executes up to this number of instructions each time it
+        is activated, and synchronizes with the rest of the system only when the quantum is over,
+        when an access is not serviced immediately or when an interrupt is received. This trades
+        timing accuracy for simulation speed (default: None, one instruction per cycle).
 
     """
 
@@ -82,12 +94,18 @@ class RiscvCommon(st.Component):
             timed=True,
             scoreboard=False,
             cflags=None,
-            wrapper="pulp/cpu/iss/default_iss_wrapper.cpp"):
+            wrapper="pulp/cpu/iss/default_iss_wrapper.cpp",
+            decoder_profile=None,
+            decode_snapshot=None,
+            quantum=None):
 
         super().__init__(parent, name)
 
         self.isa = isa
 
+        if decoder_profile is not None:
+            self.isa.load_decoder_profile(decoder_profile)
+
         self.add_sources([
             isa.get_source()
         ])
@@ -136,6 +154,12 @@ class RiscvCommon(st.Component):
             'boot_addr': boot_addr,
         })
 
+        if decode_snapshot is not None:
+            self.add_property('decode_snapshot', decode_snapshot)
+
+        if quantum is not None:
+            self.add_property('quantum', quantum)
+
         if cflags is not None:
             self.add_c_flags(cflags)
 
@@ -274,6 +298,9 @@ class RiscvCommon(st.Component):
 
         return active
 
+    def get_gen_key(self):
+        return self.isa.get_digest()
+
     def gen(self, builddir, installdir):
         self.isa.gen(self, builddir, installdir)
 
@@ -109,6 +109,34 @@ Csr::Csr(Iss &iss)
 #endif
 }
 
+void Csr::checkpoint_io(vp::checkpoint *ckpt)
+{
+    for (auto reg: this->regs)
+    {
+        if (reg.second)
+        {
+            ckpt->io(*reg.second->value_p);
+        }
+    }
+
+    ckpt->io(this->depc);
+    ckpt->io(this->dcsr);
+#if defined(ISS_HAS_PERF_COUNTERS)
+    ckpt->io(this->pccr);
+    ckpt->io(this->pcer);
+    ckpt->io(this->pcmr);
+#endif
+    ckpt->io(this->stack_conf);
+    ckpt->io(this->stack_start);
+    ckpt->io(this->stack_end);
+    ckpt->io(this->scratch0);
+    ckpt->io(this->scratch1);
+    ckpt->io(&this->fcsr, sizeof(this->fcsr));
+    ckpt->io(this->mhartid);
+    ckpt->io(this->hwloop);
+    ckpt->io(this->hwloop_regs);
+}
+
 void Csr::reset(bool active)
 {
     if (active)
@@ -22,6 +22,7 @@
 #include "cpu/iss/include/iss.hpp"
 #include <string.h>
 #include <stdexcept>
+#include <unistd.h>
 
 extern iss_isa_tag_t __iss_isa_tags[];
 
@@ -35,10 +36,18 @@ void Decode::build()
     iss.top.traces.new_trace("decoder", &this->trace, vp::DEBUG);
     this->flush_cache_itf.set_sync_meth(&Decode::flush_cache_sync);
     this->iss.top.new_slave_port(this, "flush_cache", &this->flush_cache_itf);
+    this->flush_cache_range_itf.set_sync_meth(&Decode::flush_cache_range_sync);
+    this->iss.top.new_slave_port(this, "flush_cache_range", &this->flush_cache_range_itf);
     string isa = this->iss.top.get_config_str("isa");
     this->isa = strdup(isa.c_str());
     this->parse_isa();
     insn_cache_init(&this->iss);
+
+    js::config *snapshot_config = this->iss.top.get_js_config()->get("decode_snapshot");
+    if (snapshot_config != NULL)
+    {
+        this->snapshot_open(snapshot_config->get_str());
+    }
 }
 
 void Decode::reset(bool active)
@@ -49,6 +58,218 @@ void Decode::reset(bool active)
     }
 }
 
+void Decode::stop()
+{
+    if (this->snapshot_path != "")
+    {
+        this->snapshot_save();
+    }
+}
+
+
+
+static const char snapshot_magic[8] = {'G', 'V', 'D', 'E', 'C', 'S', '0', '2'};
+
+static uint64_t snapshot_hash(uint64_t hash, const void *data, size_t size)
+{
+    // FNV-1a
+    const uint8_t *bytes = (const uint8_t *)data;
+    for (size_t i = 0; i < size; i++)
+    {
+        hash = (hash ^ bytes[i]) * 0x100000001b3ULL;
+    }
+    return hash;
+}
+
+static const uint64_t snapshot_hash_init = 0xcbf29ce484222325ULL;
+
+void Decode::snapshot_index_item(iss_decoder_item_t *item)
+{
+    if (this->snapshot_item_ids.find(item) != this->snapshot_item_ids.end())
+    {
+        return;
+    }
+
+    this->snapshot_item_ids[item] = this->snapshot_items.size();
+    this->snapshot_items.push_back(item);
+
+    if (item->is_insn)
+    {
+        const char *label = item->u.insn.label;
+        this->snapshot_isa_hash = snapshot_hash(this->snapshot_isa_hash, label, strlen(label) + 1);
+    }
+    else
+    {
+        for (int i = 0; i < item->u.group.nb_groups; i++)
+        {
+            this->snapshot_index_item(item->u.group.groups[i]);
+        }
+    }
+}
+
+void Decode::snapshot_open(std::string dir)
+{
+    // The snapshot is only valid for the exact same binaries, since the opcodes are
+    // stored, and for the same decoder, since instructions are identified by their index
+    // in the decoder trees.
+    js::config *binaries = this->iss.top.get_js_config()->get("binaries");
+    if (binaries == NULL || binaries->get_elems().size() == 0)
+    {
+        this->trace.msg(vp::trace::LEVEL_INFO, "No binary specified, disabling decoder snapshot\n");
+        return;
+    }
+
+    this->snapshot_elf_hash = snapshot_hash_init;
+    for (auto x : binaries->get_elems())
+    {
+        FILE *file = fopen(x->get_str().c_str(), "rb");
+        if (file == NULL)
+        {
+            this->trace.msg(vp::trace::LEVEL_WARNING, "Could not open binary, disabling decoder snapshot (path: %s)\n",
+                x->get_str().c_str());
+            return;
+        }
+
+        uint8_t buffer[65536];
+        size_t size;
+        while ((size = fread(buffer, 1, sizeof(buffer), file)) > 0)
+        {
+            this->snapshot_elf_hash = snapshot_hash(this->snapshot_elf_hash, buffer, size);
+        }
+        fclose(file);
+    }
+
+    this->snapshot_isa_hash = snapshot_hash(snapshot_hash_init, this->isa, strlen(this->isa) + 1);
+    for (int i = 0; i < __iss_isa_set.nb_isa; i++)
+    {
+        this->snapshot_index_item(__iss_isa_set.isa_set[i].tree);
+    }
+
+    char name[64];
+    snprintf(name, sizeof(name), "/decode_%016" PRIx64 "_%016" PRIx64 ".bin",
+        this->snapshot_elf_hash, this->snapshot_isa_hash);
+    this->snapshot_path = dir + name;
+
+    this->snapshot_load();
+}
+
+void Decode::snapshot_load()
+{
+    FILE *file = fopen(this->snapshot_path.c_str(), "rb");
+    if (file == NULL)
+    {
+        this->trace.msg(vp::trace::LEVEL_INFO, "No decoder snapshot found (path: %s)\n",
+            this->snapshot_path.c_str());
+        return;
+    }
+
+    iss_decode_snapshot_header_t header;
+    bool valid = fread(&header, sizeof(header), 1, file) == 1 &&
+        memcmp(header.magic, snapshot_magic, sizeof(snapshot_magic)) == 0 &&
+        header.isa_hash == this->snapshot_isa_hash &&
+        header.elf_hash == this->snapshot_elf_hash;
+
+    for (uint64_t i = 0; valid && i < header.nb_pages; i++)
+    {
+        iss_decode_snapshot_page_t *page = new iss_decode_snapshot_page_t;
+        if (fread(page, sizeof(*page), 1, file) != 1 ||
+            this->snapshot_pages.find(page->index) != this->snapshot_pages.end())
+        {
+            delete page;
+            valid = false;
+            break;
+        }
+
+        // Drop the entries which do not refer to a decoder item, so that they do not need to
+        // be checked again when the instructions are decoded
+        for (int j = 0; j < INSN_PAGE_SIZE; j++)
+        {
+            if (page->entries[j].item > this->snapshot_items.size())
+            {
+                page->entries[j].item = 0;
+            }
+        }
+
+        this->snapshot_pages[page->index] = page;
+    }
+
+    valid = valid && fgetc(file) == EOF;
+
+    fclose(file);
+
+    if (!valid)
+    {
+        this->trace.msg(vp::trace::LEVEL_WARNING, "Ignoring invalid decoder snapshot (path: %s)\n",
+            this->snapshot_path.c_str());
+
+        for (auto &x : this->snapshot_pages)
+        {
+            delete x.second;
+        }
+        this->snapshot_pages.clear();
+    }
+    else
+    {
+        this->trace.msg(vp::trace::LEVEL_INFO, "Loaded decoder snapshot (path: %s, nb_pages: %ld)\n",
+            this->snapshot_path.c_str(), header.nb_pages);
+    }
+}
+
+iss_decode_snapshot_page_t *Decode::snapshot_page_get(uint64_t index)
+{
+    iss_decode_snapshot_page_t *&page = this->snapshot_pages[index];
+    if (page == NULL)
+    {
+        page = new iss_decode_snapshot_page_t();
+        page->index = index;
+    }
+    this->snapshot_last_page = page;
+    return page;
+}
+
+inline iss_decode_snapshot_entry_t *Decode::snapshot_entry_get(iss_reg_t pc)
+{
+    uint64_t index = pc >> INSN_PAGE_BITS;
+    iss_decode_snapshot_page_t *page = this->snapshot_last_page;
+    if (page == NULL || page->index != index)
+    {
+        page = this->snapshot_page_get(index);
+    }
+    return &page->entries[(pc >> 1) & INSN_PAGE_MASK];
+}
+
+void Decode::snapshot_save()
+{
+    std::string tmp_path = this->snapshot_path + ".tmp";
+    FILE *file = fopen(tmp_path.c_str(), "wb");
+    if (file == NULL)
+    {
+        this->trace.msg(vp::trace::LEVEL_WARNING, "Could not write decoder snapshot (path: %s)\n", tmp_path.c_str());
+        return;
+    }
+
+    // The pages contain both the entries loaded from the previous runs and the ones decoded
+    // in this one, so that the snapshot covers all the paths taken so far.
+    iss_decode_snapshot_header_t header;
+    memcpy(header.magic, snapshot_magic, sizeof(snapshot_magic));
+    header.isa_hash = this->snapshot_isa_hash;
+    header.elf_hash = this->snapshot_elf_hash;
+    header.nb_pages = this->snapshot_pages.size();
+
+    bool error = fwrite(&header, sizeof(header), 1, file) != 1;
+    for (auto &x : this->snapshot_pages)
+    {
+        error |= fwrite(x.second, sizeof(*x.second), 1, file) != 1;
+    }
+    error |= fclose(file) != 0;
+
+    if (error || rename(tmp_path.c_str(), this->snapshot_path.c_str()) != 0)
+    {
+        this->trace.msg(vp::trace::LEVEL_WARNING, "Could not write decoder snapshot (path: %s)\n", this->snapshot_path.c_str());
+        unlink(tmp_path.c_str());
+    }
+}
+
 uint64_t Decode::decode_ranges(iss_opcode_t opcode, iss_decoder_range_set_t *range_set, bool is_signed)
 {
     int nb_ranges = range_set->nb_ranges;
@@ -293,6 +514,15 @@ int Decode::decode_opcode_group(iss_insn_t *insn, iss_reg_t pc, iss_opcode_t opc
     iss_opcode_t group_opcode = (opcode >> item->u.group.bit) & ((1ULL << item->u.group.width) - 1);
     iss_decoder_item_t *group_item_other = NULL;
 
+    if (item->u.group.table)
+    {
+        iss_decoder_item_t *group_item = item->u.group.table[group_opcode];
+        if (group_item)
+            return this->decode_item(insn, pc, opcode, group_item);
+
+        return -1;
+    }
+
     for (int i = 0; i < item->u.group.nb_groups; i++)
     {
         iss_decoder_item_t *group_item = item->u.group.groups[i];
@@ -392,7 +622,34 @@ bool Decode::decode_pc(iss_insn_t *insn, iss_reg_t pc)
 
     this->trace.msg("Got opcode (opcode: 0x%lx)\n", opcode);
 
-    int err = this->decode_opcode(insn, pc, opcode);
+    int err = -1;
+    iss_decode_snapshot_entry_t *entry = NULL;
+    if (this->snapshot_path != "")
+    {
+        // Instructions found in the snapshot do not need to go through the decoder trees.
+        // The opcode is checked so that code modified since the snapshot was taken falls back
+        // to the normal decoding.
+        entry = this->snapshot_entry_get(pc);
+        if (entry->item != 0 && entry->opcode == (uint64_t)opcode)
+        {
+            err = this->decode_insn(insn, pc, opcode, this->snapshot_items[entry->item - 1]);
+        }
+    }
+
+    if (err == -1)
+    {
+        err = this->decode_opcode(insn, pc, opcode);
+
+        if (entry != NULL && err == 0)
+        {
+            auto id = this->snapshot_item_ids.find(insn->decoder_item);
+            if (id != this->snapshot_item_ids.end())
+            {
+                entry->opcode = opcode;
+                entry->item = id->second + 1;
+            }
+        }
+    }
 
     if (err == -1)
     {
@@ -69,6 +69,9 @@ void Exec::build()
 
     this->bootaddr_offset = this->iss.top.get_config_int("bootaddr_offset");
 
+    js::config *quantum_config = this->iss.top.get_js_config()->get("quantum");
+    this->quantum = quantum_config ? quantum_config->get_int() : 0;
+
 
     this->current_insn = 0;
     this->stall_insn = 0;
@@ -116,6 +119,35 @@ void Exec::reset(bool active)
 
 
 
+void Exec::checkpoint_io(vp::checkpoint *ckpt)
+{
+    ckpt->io(this->current_insn);
+    ckpt->io(this->loop_count);
+    ckpt->io(this->stall_insn);
+    ckpt->io(this->hwloop_start_insn);
+    ckpt->io(this->hwloop_end_insn);
+    ckpt->io(this->hwloop_next_insn);
+    ckpt->io(this->elw_interrupted);
+    ckpt->io(this->cache_sync);
+    ckpt->io(this->debug_mode);
+    ckpt->io(this->elw_insn);
+    ckpt->io(this->skip_irq_check);
+    ckpt->io(this->has_exception);
+    ckpt->io(this->exception_pc);
+    ckpt->io(this->insn_table_index);
+    ckpt->io(this->irq_locked);
+    ckpt->io(this->clock_active);
+
+    if (ckpt->is_restore())
+    {
+        // The memory has been restored and the instruction handler may not match the restored
+        // state, drop the decoded instructions and let the full handler select the right one
+        iss_cache_flush(&this->iss);
+        this->iss.prefetcher.flush();
+        this->instr_event->meth_set(&this->iss, &Exec::exec_instr_check_all);
+    }
+}
+
 void Exec::icache_flush()
 {
     if (this->flush_cache_req_itf.is_bound())
@@ -151,28 +183,6 @@ void Exec::dbg_unit_step_check()
 }
 
 
-void Exec::exec_instr_untimed(void *__this, vp::clock_event *event)
-{
-    // TODO such a loop could be used for untimed ISS variant
-    abort();
-    // Iss *const iss = (Iss *)__this;
-    // iss->exec.trace.msg(vp::trace::LEVEL_TRACE, "Handling instruction with fast handler\n");
-    // iss->exec.loop_count = 64;
-
-    // iss_insn_t *insn = iss->exec.current_insn;
-    // while(1)
-    // {
-    //     bool stalled;
-
-    //     // Execute the instruction and replace the current one with the new one
-    //     insn = insn->fast_handler(iss, insn);
-    //     stalled = iss->exec.stalled.get();
-    //     iss->exec.current_insn = insn;
-    //     if (stalled) break;
-    // }
-}
-
-
 void Exec::exec_instr(void *__this, vp::clock_event *event)
 {
     Iss *const iss = (Iss *)__this;
@@ -201,6 +211,52 @@ void Exec::exec_instr(void *__this, vp::clock_event *event)
 }
 
 
+void Exec::exec_instr_quantum(void *__this, vp::clock_event *event)
+{
+    Iss *const iss = (Iss *)__this;
+    Exec *_this = &iss->exec;
+
+    _this->trace.msg(vp::trace::LEVEL_TRACE, "Handling instructions with quantum handler\n");
+
+    // Execute instructions back to back until the quantum is over or until the engine must be
+    // synchronized, which is the case when a request is not serviced synchronously, since it stalls
+    // the core, or when an IRQ or anything else switches the core to the full handler.
+    int count = 0;
+    while (count < _this->quantum)
+    {
+        iss_reg_t pc = _this->current_insn;
+
+#if defined(CONFIG_GVSOC_ISS_TIMED)
+        if (!iss->prefetcher.fetch(pc)) break;
+#endif
+
+        iss_insn_t *insn = insn_cache_get_insn(iss, pc);
+        if (insn == NULL) break;
+
+        _this->insn_exec_profiling();
+
+        _this->current_insn = insn->fast_handler(iss, insn, pc);
+
+        _this->insn_exec_power(insn);
+
+        count++;
+
+        if (_this->stalled.get() || event->meth_get() != &Exec::exec_instr_quantum)
+        {
+            break;
+        }
+    }
+
+    // Instructions executed ahead of time take at least one cycle each, they are paid back by
+    // skipping the next activations. When the core is stalled, the event is disabled and the
+    // local time is dropped.
+    if (count > 1 && !_this->stalled.get())
+    {
+        event->stall_cycle_inc(count - 1);
+    }
+}
+
+
 // TODO HW loop methods could be moved to ri5cy specific code by using inheritance
 void Exec::hwloop_set_start(int index, iss_reg_t pc)
 {
@@ -269,7 +325,8 @@ void Exec::exec_instr_check_all(void *__this, vp::clock_event *event)
     // if HW counters are disabled as they are checked with the slow handler
     if (_this->can_switch_to_fast_mode())
     {
-        _this->instr_event->meth_set(&_this->iss, &Exec::exec_instr);
+        _this->instr_event->meth_set(&_this->iss,
+            _this->quantum > 1 ? &Exec::exec_instr_quantum : &Exec::exec_instr);
     }
 
     _this->insn_exec_profiling();
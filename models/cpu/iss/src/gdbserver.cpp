@@ -245,19 +245,6 @@ void Gdbserver::breakpoint_stub_insert(iss_insn_t *insn, iss_reg_t pc)
 
 
 
-void Gdbserver::breakpoint_stub_remove(iss_insn_t *insn, iss_reg_t pc)
-{
-    insn->breakpoints.erase(std::remove(insn->breakpoints.begin(), insn->breakpoints.end(), pc), insn->breakpoints.end());
-
-    if (insn->breakpoints.size() == 0)
-    {
-        insn->handler = insn->breakpoint_saved_handler;
-        insn->fast_handler = insn->breakpoint_saved_fast_handler;
-    }
-}
-
-
-
 bool Gdbserver::breakpoint_check_pc(iss_addr_t pc)
 {
     for (auto x: this->breakpoints)
@@ -285,17 +272,16 @@ void Gdbserver::decode_insn(iss_insn_t *insn, iss_addr_t pc)
 
 void Gdbserver::enable_breakpoint(iss_addr_t addr)
 {
-    // Enabling the breakpoint is done by inserting a stub as the instruction handler
-    // so that it checks the breakpoint and call the real handler.
-    // If the instruction is already decoded, we have to insert the stub, otherwise,
-    // the decoder will call us when the instruction is decoded to add it.
+    // Enabling the breakpoint is done by invalidating the instruction, so that the decoder
+    // calls us to insert a stub as the instruction handler, which checks the breakpoint and
+    // calls the real handler.
     // If the cache returns NULL, it means it is currently translating the virtual address,
     // which means it is not decoded yet.
     iss_insn_t *insn = insn_cache_get_insn(&this->iss, addr);
 
     if (insn != NULL && insn_cache_is_decoded(&this->iss, insn))
     {
-        this->breakpoint_stub_insert(insn, addr);
+        iss_cache_flush_insn(&this->iss, insn);
     }
 }
 
@@ -303,10 +289,12 @@ void Gdbserver::enable_breakpoint(iss_addr_t addr)
 
 void Gdbserver::disable_breakpoint(iss_addr_t addr)
 {
+    // Same as for enabling, the instruction is decoded again, without the stub this time
     iss_insn_t *insn = insn_cache_get_insn(&this->iss, addr);
-    if (insn_cache_is_decoded(&this->iss, insn))
+
+    if (insn != NULL && insn_cache_is_decoded(&this->iss, insn))
     {
-        this->breakpoint_stub_remove(insn, addr);
+        iss_cache_flush_insn(&this->iss, insn);
     }
 }
 
@@ -21,9 +21,18 @@
 
 #include "cpu/iss/include/iss.hpp"
 #include <string.h>
+#include <algorithm>
 
 static void insn_block_init(Iss *iss, iss_insn_block_t *b, iss_addr_t pc);
 
+static void insn_cache_tlb_flush(iss_insn_cache_t *cache)
+{
+    for (int i=0; i<INSN_PAGE_TLB_SIZE; i++)
+    {
+        cache->tlb_page[i] = NULL;
+    }
+}
+
 static void flush_cache(Iss *iss, iss_insn_cache_t *cache)
 {
     iss->prefetcher.flush();
@@ -36,6 +45,7 @@ static void flush_cache(Iss *iss, iss_insn_cache_t *cache)
     }
 
     cache->pages.clear();
+    insn_cache_tlb_flush(cache);
 
     iss_cache_vflush(iss);
 
@@ -53,6 +63,7 @@ int insn_cache_init(Iss *iss)
     cache->current_insn_page = NULL;
     cache->first_page = NULL;
     cache->first_free_page = NULL;
+    insn_cache_tlb_flush(cache);
     return 0;
 }
 
@@ -82,6 +93,69 @@ void iss_cache_flush(Iss *iss)
     iss->irq.cache_flush();
 }
 
+void iss_cache_flush_insn(Iss *iss, iss_insn_t *insn)
+{
+    if (insn->expand_table)
+    {
+        std::vector<iss_insn_t *> &insn_tables = iss->decode.insn_tables;
+        insn_tables.erase(std::remove(insn_tables.begin(), insn_tables.end(), insn->expand_table),
+            insn_tables.end());
+        delete[] insn->expand_table;
+    }
+
+    // Breakpoints and hardware loop stubs are inserted again when the instruction is decoded
+    insn->breakpoints.clear();
+    insn_init(insn, insn->addr);
+}
+
+static void flush_page_range(Iss *iss, iss_insn_page_t *page, iss_addr_t start, iss_addr_t end)
+{
+    for (int i=0; i<INSN_PAGE_SIZE; i++)
+    {
+        iss_insn_t *insn = &page->insns[i];
+        if (insn->addr >= start && insn->addr < end)
+        {
+            iss_cache_flush_insn(iss, insn);
+        }
+    }
+}
+
+void iss_cache_flush_range(Iss *iss, iss_addr_t addr, iss_addr_t size)
+{
+    iss_insn_cache_t *cache = &iss->decode.insn_cache;
+
+    // Also take the instruction starting just before the range, since it may overlap it
+    iss_addr_t start = addr >= 2 ? addr - 2 : 0;
+    iss_addr_t end = addr + size < addr ? (iss_addr_t)-1 : addr + size;
+    iss_reg_t first_index = start >> INSN_PAGE_BITS;
+    iss_reg_t last_index = (end - 1) >> INSN_PAGE_BITS;
+
+    iss->prefetcher.flush();
+
+    if (last_index - first_index >= cache->pages.size())
+    {
+        // Big range, it is faster to go through the pages which are in the cache
+        for (auto x: cache->pages)
+        {
+            if (x.second != NULL && x.first >= first_index && x.first <= last_index)
+            {
+                flush_page_range(iss, x.second, start, end);
+            }
+        }
+    }
+    else
+    {
+        for (iss_reg_t index=first_index; index<=last_index; index++)
+        {
+            auto x = cache->pages.find(index);
+            if (x != cache->pages.end() && x->second != NULL)
+            {
+                flush_page_range(iss, x->second, start, end);
+            }
+        }
+    }
+}
+
 void iss_cache_vflush(Iss *iss)
 {
     iss_insn_cache_t *cache = &iss->decode.insn_cache;
@@ -96,15 +170,30 @@ void Decode::flush_cache_sync(void *__this, bool active)
     iss_cache_flush(&_this->iss);
 }
 
+void Decode::flush_cache_range_sync(void *__this, vp::io_req *req)
+{
+    Decode *_this = (Decode *)__this;
+    iss_cache_flush_range(&_this->iss, req->get_addr(), req->get_size());
+}
+
 
 
 iss_insn_page_t *insn_cache_page_get(Iss *iss, iss_reg_t paddr)
 {
     iss_insn_cache_t *cache = &iss->decode.insn_cache;
     iss_reg_t index = paddr >> INSN_PAGE_BITS;
+    int tlb_index = index & INSN_PAGE_TLB_MASK;
+
+    if (likely(cache->tlb_page[tlb_index] != NULL && cache->tlb_index[tlb_index] == index))
+    {
+        return cache->tlb_page[tlb_index];
+    }
+
     iss_insn_page_t *page = cache->pages[index];
     if (page != NULL)
     {
+        cache->tlb_index[tlb_index] = index;
+        cache->tlb_page[tlb_index] = page;
         return page;
     }
 
@@ -119,6 +208,8 @@ iss_insn_page_t *insn_cache_page_get(Iss *iss, iss_reg_t paddr)
     }
     
     cache->pages[index] = page;
+    cache->tlb_index[tlb_index] = index;
+    cache->tlb_page[tlb_index] = page;
 
     for (int i=0; i<INSN_PAGE_SIZE; i++)
     {
@@ -48,6 +48,18 @@ void Irq::build()
 }
 
 
+void Irq::checkpoint_io(vp::checkpoint *ckpt)
+{
+    // irq_enable is a component register, already saved by the framework
+    ckpt->io(this->vectors);
+    ckpt->io(this->debug_saved_irq_enable);
+    ckpt->io(this->req_irq);
+    ckpt->io(this->req_debug);
+    ckpt->io(this->debug_handler);
+    ckpt->io(this->irq_req);
+    ckpt->io(this->irq_req_value);
+}
+
 void Irq::reset(bool active)
 {
     if (active)
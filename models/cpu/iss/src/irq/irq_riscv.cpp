@@ -53,6 +53,15 @@ void Irq::build()
     this->iss.top.new_slave_port(this, "sei", &this->sei_itf);
 }
 
+void Irq::checkpoint_io(vp::checkpoint *ckpt)
+{
+    ckpt->io(this->irq_enable.get_bytes(), this->irq_enable.nb_bytes);
+    ckpt->io(this->debug_saved_irq_enable);
+    ckpt->io(this->req_irq);
+    ckpt->io(this->req_debug);
+    ckpt->io(this->debug_handler);
+}
+
 void Irq::reset(bool active)
 {
     if (active)
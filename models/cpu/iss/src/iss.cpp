@@ -68,6 +68,11 @@ void IssWrapper::start()
     this->iss.gdbserver.start();
 }
 
+void IssWrapper::stop()
+{
+    this->iss.decode.stop();
+}
+
 
 
 void IssWrapper::reset(bool active)
@@ -90,6 +95,16 @@ void IssWrapper::reset(bool active)
 #endif
 }
 
+void IssWrapper::checkpoint_io(vp::checkpoint *ckpt)
+{
+    // The state of the core is saved between 2 instructions, requests pending in the memory
+    // hierarchy are not part of it
+    this->iss.regfile.checkpoint_io(ckpt);
+    this->iss.csr.checkpoint_io(ckpt);
+    this->iss.irq.checkpoint_io(ckpt);
+    this->iss.exec.checkpoint_io(ckpt);
+}
+
 IssWrapper::IssWrapper(js::config *config)
     : vp::component(config), iss(*this)
 {
@@ -29,6 +29,17 @@ Regfile::Regfile(Iss &iss)
 }
 
 
+void Regfile::checkpoint_io(vp::checkpoint *ckpt)
+{
+    ckpt->io(this->regs);
+    ckpt->io(this->fregs);
+#ifdef CONFIG_GVSOC_ISS_SCOREBOARD
+    ckpt->io(this->scoreboard_reg_timestamp);
+    ckpt->io(this->scoreboard_freg_timestamp);
+#endif
+}
+
+
 void Regfile::reset(bool active)
 {
     if (active)
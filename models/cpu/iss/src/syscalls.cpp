@@ -657,6 +657,32 @@ void Syscalls::handle_riscv_ebreak()
         break;
     }
 
+    case 0x10E:
+    {
+        iss_reg_t args[1];
+        if (this->user_access(this->iss.regfile.regs[11], (uint8_t *)args, sizeof(args), false))
+        {
+            this->iss.regfile.regs[10] = -1;
+            return;
+        }
+
+        std::string path = this->read_user_string(args[0]);
+        if (path == "")
+        {
+            this->iss.top.warning.force_warning("Invalid user string while saving checkpoint (addr: 0x%x)\n", args[0]);
+            this->iss.regfile.regs[10] = -1;
+        }
+        else
+        {
+            // The checkpoint is saved at the end of the current timestamp, once this instruction
+            // is over
+            this->iss.top.get_engine()->checkpoint_req(path);
+            this->iss.regfile.regs[10] = 0;
+        }
+
+        break;
+    }
+
     default:
         this->iss.top.warning.force_warning("Unknown ebreak call (id: %d)\n", id);
         break;
@@ -118,6 +118,7 @@ public:
     Plic(js::config *config);
 
     int build();
+    void checkpoint_io(vp::checkpoint *ckpt);
 
 private:
     static vp::io_req_status_e req(void *__this, vp::io_req *req);
@@ -215,6 +216,21 @@ int Plic::build()
 }
 
 
+void Plic::checkpoint_io(vp::checkpoint *ckpt)
+{
+    for (plic_context_t &context: this->contexts)
+    {
+        ckpt->io(context.priority_threshold);
+        ckpt->io(context.enable);
+        ckpt->io(context.pending);
+        ckpt->io(context.pending_priority);
+        ckpt->io(context.claimed);
+    }
+    ckpt->io(this->priority);
+    ckpt->io(this->level);
+}
+
+
 void Plic::irq_sync(void *__this, bool active, int port)
 {
     Plic *_this = (Plic *)__this;
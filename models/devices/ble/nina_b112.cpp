@@ -504,6 +504,8 @@ void Nina_b112::tx_clk_reg(vp::component *__this, vp::component *clock)
 
 int Nina_b112::build()
 {
+    this->checkpoint_unsupported();
+
     traces.new_trace("trace", &trace, vp::DEBUG);
 
     /* Initialize clocks and ports */
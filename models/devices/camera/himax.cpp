@@ -500,6 +500,8 @@ void Himax::clock_handler(void *__this, vp::clock_event *event)
 
 int Himax::build()
 {
+    this->checkpoint_unsupported();
+
     traces.new_trace("trace", &trace, vp::DEBUG);
 
     this->new_master_port("cpi", &this->cpi_itf);
@@ -997,6 +997,8 @@ void Mx25::reset(bool active)
 
 int Mx25::build()
 {
+    this->checkpoint_unsupported();
+
     // This method is called when the simulated system is built.
     // We just need here to take care of anything which must be done once at platform startup.
 
@@ -438,6 +438,8 @@ uint8_t Fxl6408::handle_reg_read(uint8_t address)
 
 int Fxl6408::build()
 {
+    this->checkpoint_unsupported();
+
     traces.new_trace("trace", &trace, vp::DEBUG);
 
     this->i2c_itf.set_sync_meth(&Fxl6408::i2c_sync);
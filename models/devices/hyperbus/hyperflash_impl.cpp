@@ -487,6 +487,8 @@ void Hyperflash::cs_sync(void *__this, int cs, int value)
 
 int Hyperflash::build()
 {
+  this->checkpoint_unsupported();
+
   traces.new_trace("trace", &trace, vp::DEBUG);
 
   in_itf.set_sync_cycle_meth(&Hyperflash::sync_cycle);
@@ -159,6 +159,8 @@ void Hyperram::cs_sync(void *__this, int cs, int value)
 
 int Hyperram::build()
 {
+  this->checkpoint_unsupported();
+
   traces.new_trace("trace", &trace, vp::DEBUG);
 
   in_itf.set_sync_cycle_meth(&Hyperram::sync_cycle);
@@ -42,6 +42,8 @@ I2c_corruptor::I2c_corruptor(js::config* config)
     is_started(false)
 {
     assert(NULL != config);
+    this->checkpoint_unsupported();
+
     /* set helper callback */
     this->i2c_helper.register_callback(std::bind(&I2c_corruptor::i2c_helper_callback,
                 this,
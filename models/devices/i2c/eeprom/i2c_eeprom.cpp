@@ -118,6 +118,8 @@ I2c_eeprom::I2c_eeprom(js::config* config)
                 std::placeholders::_1)
             )
 {
+    this->checkpoint_unsupported();
+
     this->page_size = 8;
     this->number_of_pages = 128;
     this->i2c_address = 80;
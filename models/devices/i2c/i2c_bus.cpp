@@ -59,6 +59,8 @@ I2c_bus::I2c_bus(js::config *config)
 
 int I2c_bus::build()
 {
+    this->checkpoint_unsupported();
+
     traces.new_trace("trace", &trace, vp::DEBUG);
 
     this->in.set_sync_meth_demuxed(&I2c_bus::sync);
@@ -242,6 +242,8 @@ bool Jtag::open_proxy() {
 
 int Jtag::build()
 {
+    this->checkpoint_unsupported();
+
     traces.new_trace("trace", &trace, vp::DEBUG);
 
     this->jtag_itf.set_sync_meth(&Jtag::sync);
@@ -455,6 +455,8 @@ void Aps::reset(bool active)
 
 int Aps::build()
 {
+    this->checkpoint_unsupported();
+
     // This method is called when the simulated system is built.
     // We just need here to take care of anything which must be done once at platform startup.
 
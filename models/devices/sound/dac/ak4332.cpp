@@ -593,6 +593,8 @@ uint8_t Ak4332::handle_reg_read(uint8_t address)
 
 int Ak4332::build()
 {
+    this->checkpoint_unsupported();
+
     traces.new_trace("trace", &trace, vp::DEBUG);
 
     this->i2c_itf.set_sync_meth(&Ak4332::i2c_sync);
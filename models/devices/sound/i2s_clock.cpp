@@ -57,6 +57,8 @@ I2s_clock::I2s_clock(js::config *config)
 
 int I2s_clock::build()
 {
+    this->checkpoint_unsupported();
+
     this->new_master_port("i2s", &this->i2s_itf);
     this->new_master_port("clock_cfg", &this->clock_cfg);
 
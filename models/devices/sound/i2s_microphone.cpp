@@ -285,6 +285,8 @@ void Microphone::ws_in_sync(void *__this, int sck, int ws, int sd, bool full_dup
 
 int Microphone::build()
 {
+    this->checkpoint_unsupported();
+
     traces.new_trace("trace", &trace, vp::DEBUG);
 
     this->new_master_port("i2s", &this->i2s_itf);
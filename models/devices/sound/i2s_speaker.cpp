@@ -176,6 +176,8 @@ Speaker::Speaker(js::config *config)
 
 int Speaker::build()
 {
+    this->checkpoint_unsupported();
+
     traces.new_trace("trace", &trace, vp::DEBUG);
 
     this->new_master_port("i2s", &this->i2s_itf);
@@ -446,6 +446,8 @@ void spiflash::cs_sync(void *__this, bool active)
   
 int spiflash::build()
 {
+  this->checkpoint_unsupported();
+
   traces.new_trace("trace", &trace, vp::DEBUG);
 
   this->in_itf.set_sync_meth(&spiflash::sync);
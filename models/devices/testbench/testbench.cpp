@@ -221,6 +221,8 @@ Testbench::Testbench(js::config *config)
 
 int Testbench::build()
 {
+    this->checkpoint_unsupported();
+
     traces.new_trace("trace", &trace, vp::DEBUG);
 
     this->ctrl_type = get_js_config()->get("ctrl_type")->get_str();
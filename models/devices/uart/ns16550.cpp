@@ -112,6 +112,7 @@ public:
     int build();
     void reset(bool active);
     void stop();
+    void checkpoint_io(vp::checkpoint *ckpt);
 
 private:
     static vp::io_req_status_e req(void *__this, vp::io_req *req);
@@ -198,6 +199,23 @@ void Ns16550::reset(bool active)
 {
 }
 
+
+
+void Ns16550::checkpoint_io(vp::checkpoint *ckpt)
+{
+    // Received bytes are not saved, they come from the host terminal
+    ckpt->io(this->dll);
+    ckpt->io(this->dlm);
+    ckpt->io(this->iir);
+    ckpt->io(this->ier);
+    ckpt->io(this->fcr);
+    ckpt->io(this->lcr);
+    ckpt->io(this->mcr);
+    ckpt->io(this->lsr);
+    ckpt->io(this->msr);
+    ckpt->io(this->scr);
+}
+
 vp::io_req_status_e Ns16550::req(void *__this, vp::io_req *req)
 {
     Ns16550 *_this = (Ns16550 *)__this;
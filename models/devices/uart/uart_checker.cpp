@@ -111,6 +111,8 @@ Uart_checker::Uart_checker(js::config *config)
 
 int Uart_checker::build()
 {
+    this->checkpoint_unsupported();
+
     traces.new_trace("trace", &trace, vp::DEBUG);
 
     this->new_master_port("clock_cfg", &clock_cfg);
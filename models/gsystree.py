@@ -26,10 +26,22 @@ from importlib import import_module
 import gapylib.target
 import gv.gui
 import hashlib
+import inspect
+import functools
+import heapq
+import multiprocessing
 
 
 generated_components = {}
 
+# Components whose code is generated by the worker processes when gen_all is done in parallel.
+# Workers are forked after this list is filled, so they only need an index to find the component.
+gen_components = []
+
+
+def gen_component(index, builddir, installdir):
+    gen_components[index].gen(builddir, installdir)
+
 
 class GeneratedComponent(object):
 
@@ -74,6 +86,199 @@ def get_generated_component(sources, cflags):
     return generated_components[comp_name]
 
 
+# Property names are split each time a property is accessed, which happens very often while
+# the system is built, and always with the same few names, so keep the result.
+@functools.lru_cache(maxsize=None)
+def get_property_path(name):
+    return tuple(name.split('/'))
+
+
+class OptionsIndex(object):
+    """
+    This class indexes a list of options so that the options applying to a sub-component can be
+    found without checking all of them.
+
+    Options are indexed by their first item which is not a wildcard. Options starting with a
+    wildcard are also kept apart since they apply to any sub-component.
+
+    Attributes
+    ----------
+    options : list
+        List of options, each one being the list of the path items followed by the value.
+    """
+
+    def __init__(self, options):
+        self.named = {}
+        self.wildcards = []
+
+        for index, option in enumerate(options):
+            option_name = None
+            name_pos = 0
+            for item in option:
+                if item != "*" and item != "**":
+                    option_name = item
+                    break
+                name_pos += 1
+
+            entry = (index, option_name, name_pos, option)
+
+            if option_name is not None:
+                self.named.setdefault(option_name, []).append(entry)
+
+            if option[0] == "*" or option[0] == "**":
+                self.wildcards.append(entry)
+
+    def get_child_options(self, name):
+        """Return the options which should be propagated to a sub-component.
+
+        Parameters
+        ----------
+        name : str
+            Name of the sub-component.
+
+        Returns
+        -------
+        list
+            The options, with the path relative to the sub-component, in the same order as the
+            original options.
+        """
+        comp_options = []
+        last_index = None
+
+        # Both lists are sorted by option index, merge them to keep the options order.
+        # An option starting with a wildcard and naming this component appears in both.
+        for index, option_name, name_pos, option in heapq.merge(self.named.get(name, []), self.wildcards,
+                key=lambda entry: entry[0]):
+            if index == last_index:
+                continue
+            last_index = index
+
+            if option_name == name:
+                comp_options.append(option[name_pos + 1:])
+            elif option[0] == "*":
+                comp_options.append(option[1:])
+            else:
+                comp_options.append(option)
+
+        return comp_options
+
+
+class ConfigCache(object):
+    """
+    This class implements a persistent cache for the configuration generated by Component.get_config.
+
+    The cache is a directory containing one JSON file per entry. An entry is identified by a key
+    computed from the Python sources of the component classes, the options and any additional
+    information given by the caller. Each entry also records the digest of every file which was read
+    while the configuration was generated (JSON files, generators), so that the entry is discarded as
+    soon as one of them is modified.
+
+    Attributes
+    ----------
+    path : str
+        Directory where the cache entries are stored.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def get_key(self, component, options=None, extra=None):
+        """Compute the cache key of a component hierarchy.
+
+        Parameters
+        ----------
+        component : Component
+            Top component of the hierarchy.
+        options : list, optional
+            Options of forms key=value given to the hierarchy.
+        extra : object, optional
+            Any additional information, converted to string, which can impact the configuration.
+
+        Returns
+        -------
+        str
+            The key.
+        """
+        key = hashlib.sha256()
+
+        sources = component.get_config_sources()
+        sources.add(os.path.abspath(js.__file__))
+
+        for source in sorted(sources):
+            key.update(source.encode('utf-8'))
+            key.update(self.__get_file_digest(source).encode('utf-8'))
+
+        if options is not None:
+            for option in options:
+                key.update(option.encode('utf-8'))
+
+        if extra is not None:
+            key.update(str(extra).encode('utf-8'))
+
+        return key.hexdigest()
+
+    def load(self, key):
+        """Load a cached configuration.
+
+        Parameters
+        ----------
+        key : str
+            Key of the entry, as returned by get_key.
+
+        Returns
+        -------
+        dict
+            The configuration or None if there is no valid entry for this key.
+        """
+        try:
+            with open(self.__get_entry_path(key), 'r') as fd:
+                entry = json.load(fd, object_pairs_hook=collections.OrderedDict)
+        except (OSError, ValueError):
+            return None
+
+        for path, digest in entry['deps'].items():
+            if self.__get_file_digest(path) != digest:
+                return None
+
+        return entry['config']
+
+    def store(self, key, config, deps):
+        """Store a configuration into the cache.
+
+        Parameters
+        ----------
+        key : str
+            Key of the entry, as returned by get_key.
+        config : dict
+            Configuration returned by Component.get_config.
+        deps : list
+            Paths of the files which were read to produce the configuration.
+        """
+        os.makedirs(self.path, exist_ok=True)
+
+        entry = {
+            'deps': { path: self.__get_file_digest(path) for path in deps },
+            'config': config
+        }
+
+        # Write to a temporary file first so that concurrent runs never see a partial entry
+        entry_path = self.__get_entry_path(key)
+        tmp_path = f'{entry_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as fd:
+            json.dump(entry, fd)
+        os.replace(tmp_path, entry_path)
+
+    def __get_entry_path(self, key):
+        return os.path.join(self.path, key + '.json')
+
+    def __get_file_digest(self, path):
+        try:
+            with open(path, 'rb') as fd:
+                return hashlib.sha256(fd.read()).hexdigest()
+        except OSError:
+            return None
+
+
 class Port():
 
     def __init__(self, comp, name):
@@ -153,6 +358,7 @@ class Component(object):
         self.build_done = False
         self.finalize_done = False
         self.options = []
+        self.options_index = None
         self.comp_options = {}
         self.is_top = is_top
         self.vcd_group_create = True
@@ -302,23 +508,14 @@ class Component(object):
         component.name = name
 
         # Determine the set of options which should be propagated to the sub-component
-        # based on the path
-        comp_options = []
-        for option in self.options:
-            option_name = None
-            name_pos = 0
-            for item in option:
-                if item != "*" and item != "**":
-                    option_name = item
-                    break
-                name_pos += 1
-
-            if option_name == name:
-                comp_options.append(option[name_pos + 1:])
-            elif option[0] == "*":
-                comp_options.append(option[1:])
-            elif option[0] == "**":
-                comp_options.append(option)
+        # based on the path. The options are indexed the first time so that this does not
+        # depend on the number of options.
+        if len(self.options) != 0:
+            if self.options_index is None:
+                self.options_index = OptionsIndex(self.options)
+            comp_options = self.options_index.get_child_options(name)
+        else:
+            comp_options = []
 
         if len(comp_options) != 0:
 
@@ -358,14 +555,15 @@ class Component(object):
             
         """
         properties = self.properties
+        path = get_property_path(name)
 
-        for item in name.split('/')[:-1]:
+        for item in path[:-1]:
             if properties.get(item) is None:
                 properties[item] = {}
 
             properties = properties.get(item)
 
-        properties[name.split('/')[-1]] = property
+        properties[path[-1]] = property
 
         return self.get_property(name, format=format)
 
@@ -388,17 +586,19 @@ class Component(object):
         option_property = None
 
         comp_options = self.comp_options
+        path = get_property_path(name)
 
-        for item in name.split('/'):
-            if comp_options.get(item) is None:
-                option_property = None
-                break
-            else:
-                option_property = comp_options.get(item)
-            comp_options = comp_options.get(item)
+        if len(comp_options) != 0:
+            for item in path:
+                if comp_options.get(item) is None:
+                    option_property = None
+                    break
+                else:
+                    option_property = comp_options.get(item)
+                comp_options = comp_options.get(item)
 
         property = None
-        for item in name.split('/'):
+        for item in path:
             if property is None:
                 property = self.properties.get(item)
             else:
@@ -460,7 +660,11 @@ class Component(object):
             The resulting dictionary
         """
 
-        with open(self.get_file_path(path), 'r') as fd:
+        path = self.get_file_path(path)
+
+        js.imported_files.add(os.path.abspath(path))
+
+        with open(path, 'r') as fd:
             return json.load(fd)
 
     def add_sources(self, sources):
@@ -474,8 +678,42 @@ class Component(object):
         self.add_property('vp_component', name)
 
     def get_generated_components(self):
+        # Generated components are only registered when the hierarchy is built, which may have been
+        # skipped if the configuration came from the cache
+        if not self.build_done:
+            self.__build()
+
         return generated_components
 
+    def get_config_sources(self, sources=None):
+        """Return the Python source files of the component classes.
+
+        The whole hierarchy is walked and the source files of all the classes the components
+        inherit from are returned. This is used to detect when a cached configuration is outdated.
+
+        Returns
+        -------
+        set
+            The set of absolute source paths
+        """
+        if sources is None:
+            sources = set()
+
+        for cls in type(self).__mro__:
+            if cls is object:
+                continue
+            try:
+                source = inspect.getsourcefile(cls)
+            except TypeError:
+                source = None
+            if source is not None:
+                sources.add(os.path.abspath(source))
+
+        for component in self.components.values():
+            component.get_config_sources(sources)
+
+        return sources
+
     def get_component_list(self, c_flags=None):
         result = []
 
@@ -513,30 +751,33 @@ class Component(object):
 
         config = {}
 
+        # The configurations coming from JSON files and from the childs are freshly generated
+        # and are not used anywhere else, so they are merged without copying them.
         for json_config_file in self.json_config_files:
-            config = self.__merge_properties(config, js.import_config_from_file(json_config_file, find=True, interpret=True, gen=True).get_dict())
+            config = self.__merge_properties(config, js.import_config_from_file(json_config_file, find=True, interpret=True, gen=True).get_dict(), copy=False)
 
         for component_name, component in self.components.items():
-            component_config = { component_name: component.get_config() }
-            config = self.__merge_properties(config, component_config)
+            config[component_name] = self.__merge_properties(config.get(component_name),
+                component.get_config(), is_root=False, copy=False)
 
         #config = self.merge_options(config, self.comp_options, self.properties)
 
         config = self.__merge_properties(config, self.properties, self.comp_options)
 
         if len(self.bindings) != 0:
-            if config.get('bindings') is None:
-                config['bindings'] = []
+            # Build a new list since the existing one may be shared with the properties
+            bindings = list(config.get('bindings') or [])
             for binding in self.bindings:
                 master_name = 'self' if binding[0] == self else binding[0].name
                 slave_name = 'self' if binding[2] == self else binding[2].name
-                config['bindings'].append([ '%s->%s' % (master_name, binding[1]), '%s->%s' % (slave_name, binding[3])])
+                bindings.append([ '%s->%s' % (master_name, binding[1]), '%s->%s' % (slave_name, binding[3])])
+            config['bindings'] = bindings
 
         if len(self.components.values()) != 0:
-            config = self.__merge_properties(config, { 'components' : list(self.components.keys()) })
+            config['components'] = list(self.components.keys())
 
         if len(self.ports) != 0:
-            config = self.__merge_properties(config, { 'ports' : list(self.ports.keys()) })
+            config['ports'] = list(self.ports.keys())
 
         return config
 
@@ -677,6 +918,7 @@ class Component(object):
                     self.comp_options[name] = value
 
         self.options = options
+        self.options_index = None
 
     def __add_port(self, name):
         port = self.ports.get(name)
@@ -723,43 +965,61 @@ class Component(object):
 
         self.finalize_done = True
 
-    def __merge_properties(self, dst, src, options=None, is_root=True):
+    def __merge_properties(self, dst, src, options=None, is_root=True, copy=True):
+        # Merge src and options into dst and return the result.
+        # dst can be None when there is nothing yet at this level, in which case the result is
+        # allocated only if needed.
+        # When copy is False, src is owned by the caller (e.g. the configuration returned by a
+        # child) and its sub-trees can be reused as they are instead of being duplicated,
+        # which avoids copying the whole child hierarchy at each level.
 
         if type(src) == dict or type(src) == collections.OrderedDict:
 
-            # Copy the source dictionary so that we can append the options
-            # which do not appears in src
-            src_merged = src.copy()
+            if options is None or is_root:
+                # src can only be adopted as it is if there is no option to apply to it
+                if dst is None and not copy and options is None:
+                    return src
 
-            # Copy all the options which do not appear in src
-            if options is not None:
-                for name, value in options.items():
-                    if src_merged.get(name) is None and not is_root:
-                        src_merged[name] = value
-
-            # And merge dst, src and options
-            for name, value in src_merged.items():
-                if dst.get(name) is None:
-                    new_dst = {}
-                else:
-                    new_dst = dst.get(name)
+                if dst is None:
+                    dst = {}
 
-                if options is not None:
-                    new_options = options.get(name)
-                else:
-                    new_options = None
+                for name, value in src.items():
+                    new_options = options.get(name) if options is not None else None
+                    dst[name] = self.__merge_properties(dst.get(name), value, new_options,
+                        is_root=False, copy=copy)
 
-                dst[name] = self.__merge_properties(new_dst, value, new_options, is_root=False)
+                return dst
+
+            if dst is None:
+                dst = {}
+
+            for name, value in src.items():
+                new_options = options.get(name)
+
+                # Options also overwrite properties which are explicitly set to None
+                if value is None and new_options is not None:
+                    value = new_options
+
+                dst[name] = self.__merge_properties(dst.get(name), value, new_options,
+                    is_root=False, copy=copy)
+
+            # Add all the options which do not appear in src
+            for name, value in options.items():
+                if name not in src:
+                    dst[name] = self.__merge_properties(dst.get(name), value, value,
+                        is_root=False)
 
             return dst
 
         elif type(src) == list:
+            if options is None:
+                return src.copy() if copy else src
+
             result = src.copy()
-            if options is not None:
-                if type(options) == list:
-                    result += options
-                else:
-                    result.append(options)
+            if type(options) == list:
+                result += options
+            else:
+                result.append(options)
 
             return result
 
@@ -850,11 +1110,60 @@ class Component(object):
 
         return self.parent.get_target_property(name)
 
-    def gen_all(self, builddir, installdir):
-        self.gen(builddir, installdir)
+    def gen_all(self, builddir, installdir, jobs=1):
+        """Generate the code of the whole hierarchy.
+
+        Components with the same generation key are generated only once.
+
+        Parameters
+        ----------
+        builddir : str
+            Directory where the code should be generated.
+        installdir : str
+            Install directory.
+        jobs : int, optional
+            Number of processes used to generate the components in parallel.
+        """
+        components = self.__get_gen_list([], set())
+
+        if jobs <= 1 or len(components) <= 1:
+            for component in components:
+                component.gen(builddir, installdir)
+            return
+
+        gen_components[:] = components
+
+        # Fork the workers so that they inherit the hierarchy instead of having to pickle it
+        with multiprocessing.get_context('fork').Pool(min(jobs, len(components))) as pool:
+            pool.starmap(gen_component,
+                [(index, builddir, installdir) for index in range(0, len(components))])
+
+        gen_components.clear()
+
+    def get_gen_key(self):
+        """Return the generation key.
+
+        Components returning the same key generate the same code, so that it is generated only
+        once. This should be overloaded by components implementing gen.
+
+        Returns
+        -------
+        str
+            The key, or None if the component should always be generated
+        """
+        return None
+
+    def __get_gen_list(self, components, keys):
+        key = self.get_gen_key()
+        if key is None or key not in keys:
+            if key is not None:
+                keys.add(key)
+            components.append(self)
+
         for child in self.components.values():
-            child.gen_all(builddir, installdir)
+            child.__get_gen_list(components, keys)
 
+        return components
 
     def gen(self, builddir, installdir):
         pass
\ No newline at end of file
@@ -18,10 +18,67 @@ import socket
 import threading
 import socket
 import os
+import json
+import struct
+import asyncio
 
 
 
 
+# Binary protocol frames, made of a header (request, type, size) followed by size bytes
+_FRAME_HEADER = struct.Struct('<iII')
+_FRAME_CMD = 0
+_FRAME_REPLY = 1
+_FRAME_PAYLOAD = 2
+_FRAME_EXIT = 3
+
+# Time in seconds given to the server to acknowledge the binary protocol. Older servers ignore
+# the request without replying, in which case the text protocol is kept.
+_PROTOCOL_TIMEOUT = 5.0
+
+# Descriptor of an access of vectored router commands (address, size)
+_ACCESS_DESC = struct.Struct('<QQ')
+
+
+def _access_descs(accesses):
+    return b''.join([ _ACCESS_DESC.pack(addr, size) for addr, size in accesses ])
+
+
+def _check_access(reply, payload=None, size=None):
+    # Router accesses reply err=<status>, reads also send the data as a payload, which is only
+    # valid if the access succeeded and has the size of the access
+    if reply is None or reply.rstrip('\n') != 'err=0':
+        raise RuntimeError('Memory access failed (reply: %s)' % (reply.rstrip('\n') if reply is not None else None))
+
+    if payload is not None and len(payload) != size:
+        raise RuntimeError('Memory access returned %d bytes instead of %d' % (len(payload), size))
+
+
+# NumPy is only imported by the array helpers, so that it is only needed when they are used
+
+def _array_view(array):
+    # Returns the bytes of the array as they must be in memory, without copy if it is already
+    # contiguous and little endian
+    import numpy
+    array = numpy.asarray(array)
+    array = numpy.ascontiguousarray(array, dtype=array.dtype.newbyteorder('<'))
+    return memoryview(array.reshape(-1).view(numpy.uint8))
+
+
+def _array_mismatches(actual, expected, atol):
+    import numpy
+    # 0-d arrays are promoted so that indexing always gets a tuple of coordinates
+    actual = numpy.atleast_1d(actual)
+    expected = numpy.atleast_1d(expected)
+    if atol == 0 and not numpy.issubdtype(expected.dtype, numpy.inexact):
+        mismatch = actual != expected
+    else:
+        mismatch = ~numpy.isclose(actual, expected, rtol=0, atol=atol, equal_nan=True)
+
+    return [ (tuple(int(x) for x in index), actual[tuple(index)].item(), expected[tuple(index)].item())
+        for index in numpy.argwhere(mismatch) ]
+
+
 class Proxy(object):
     """
     A class used to control GVSOC through the socket proxy
@@ -30,6 +87,9 @@ class Proxy(object):
         a string giving the hostname where the proxy is running
     :param port: int,
         the port where to connect
+    :param binary: bool,
+        use the binary protocol, which is cheaper to parse, instead of the text one. The text one is
+        kept if the server does not support it.
     """
 
     class _Socket_proxy_reader_thread(threading.Thread):
@@ -37,14 +97,20 @@ class Proxy(object):
         def __init__(self, socket):
             super(Proxy._Socket_proxy_reader_thread, self).__init__()
             self.socket = socket
+            # Replies are read through a buffered file, so that the socket is read by big chunks
+            self.file = socket.makefile('rb')
             self.lock = threading.Lock()
             self.condition = threading.Condition(self.lock)
             self.replies = {}
             self.matches = {}
             self.payloads = {}
+            self.payload_buffers = {}
             self.running = False
             self.timestamp = 0
             self.exit_callback = None
+            self.binary = False
+            self.protocol_req = None
+            self.closed = False
 
         def __quit(self, status):
             self.lock.acquire()
@@ -56,85 +122,170 @@ class Proxy(object):
                 os._exit(status)
                 exit(status)
 
-        def run(self):
-            while True:
-                reply = ""
-                try:
-                    while True:
-                        byte = self.socket.recv(1).decode('utf-8')
-                        # if not byte:
-                        #     self.__quit(-1)
-                        #     return
-                        reply += byte
-                        if byte == '\n':
-                            break
-                except:
-                    # self.__quit(-1)
-                    return
+        def __recv_into(self, view):
+            pos = 0
+            size = len(view)
+            while pos < size:
+                nb_bytes = self.file.readinto(view[pos:])
+                if not nb_bytes:
+                    raise ConnectionError('Proxy connection closed')
+                pos += nb_bytes
+
+        def __recv(self, size):
+            data = bytearray(size)
+            self.__recv_into(memoryview(data))
+            return data
+
+        def __recv_payload(self, req, size):
+            # The payload goes directly to the buffer registered by the command, if any, to avoid
+            # copies of big payloads
+            self.lock.acquire()
+            buffer = self.payload_buffers.pop(req, None)
+            self.lock.release()
 
-                req = None
+            if buffer is None or len(buffer) != size:
+                buffer = self.__recv(size)
+            else:
+                self.__recv_into(buffer)
+
+            self.__payload(req, buffer)
+
+        def __reply(self, req, msg, is_stop=None, is_run=None):
+            self.lock.acquire()
+
+            if is_stop is not None:
+                self.timestamp = is_stop
+                self.running = False
+            elif is_run is not None:
+                self.running = True
+
+            self.replies[req] = msg
+            self.condition.notify_all()
+            self.lock.release()
+
+        def __payload(self, req, payload):
+            callback = self.matches.get('%s' % req)
+            if callback is not None:
+                callback[0](payload, *callback[1], **callback[2])
+            else:
+                self.lock.acquire()
+                self.payloads[req] = payload
+                self.condition.notify_all()
+                self.lock.release()
+
+        def __read_frame(self):
+            req, frame_type, size = _FRAME_HEADER.unpack(self.__recv(_FRAME_HEADER.size))
+            if frame_type == _FRAME_PAYLOAD:
+                self.__recv_payload(req, size)
+                return
+
+            data = self.__recv(size)
+
+            if frame_type == _FRAME_EXIT:
+                self.__quit(int(data))
+
+            else:
+                msg = data.decode('utf-8')
                 is_stop = None
                 is_run = None
-                msg = ""
-                err = None
-                err_msg = None
+                if req == -1:
+                    if msg.find('stopped') == 0:
+                        is_stop = int(msg.split('=')[1])
+                    elif msg.find('running') == 0:
+                        is_run = int(msg.split('=')[1])
 
-                for arg in reply.split(';'):
-                    name, value = arg.split('=', 1)
-                    if name == 'req':
-                        req = int(value)
-                    elif name == 'exit':
-                        self.__quit(int(value))
-                    elif name == 'msg':
-                        msg = value
-                        if msg.find('stopped') == 0:
-                            is_stop = int(value.split('=')[1])
-                        elif msg.find('running') == 0:
-                            is_run = int(value.split('=')[1])
+                self.__reply(req, msg, is_stop, is_run)
 
-                    elif name == 'err':
-                        err = value
+        def run(self):
+            try:
+                while self.__read():
+                    pass
+            except OSError:
+                # The connection was closed or broken. Other exceptions, like the ones from user
+                # callbacks, are not hidden.
+                pass
+            finally:
+                # Wake-up everything which is waiting for the simulator, since nothing will come
+                # anymore
+                self.lock.acquire()
+                self.closed = True
+                self.condition.notify_all()
+                self.lock.release()
 
-                    elif name == 'err_msg':
-                        err_msg = value
+        def __read(self):
+            if self.binary:
+                self.__read_frame()
+                return True
 
-                    elif name == 'payload':
-                        callback = self.matches.get('%s' % req)
-                        if callback is not None:
-                            callback[0](*callback[1], **callback[2])
+            reply = self.file.readline()
 
-                        else:
+            if not reply:
+                # self.__quit(-1)
+                return False
 
-                            payload = bytearray()
-                            size = int(value)
-                            while len(payload) < size:
-                                response = self.socket.recv(size - len(payload))
-                                payload += response
+            reply = reply.decode('utf-8')
 
-                            self.lock.acquire()
-                            self.payloads[req] = payload
-                            self.condition.notify_all()
-                            self.lock.release()
+            req = None
+            is_stop = None
+            is_run = None
+            msg = ""
+            err = None
+            err_msg = None
+            # Payload lines come before the reply of their command and are not replies
+            is_reply = True
 
-                if req is None:
-                    raise RuntimeError('Unknown reply: ' + req)
+            for arg in reply.split(';'):
+                name, value = arg.split('=', 1)
+                if name == 'req':
+                    req = int(value)
+                elif name == 'exit':
+                    self.__quit(int(value))
+                elif name == 'msg':
+                    msg = value
+                    if msg.find('stopped') == 0:
+                        is_stop = int(value.split('=')[1])
+                    elif msg.find('running') == 0:
+                        is_run = int(value.split('=')[1])
 
-                self.lock.acquire()
+                elif name == 'err':
+                    err = value
 
-                if is_stop is not None:
-                    self.timestamp = is_stop
-                    self.running = False
-                elif is_run is not None:
-                    self.running = True
+                elif name == 'err_msg':
+                    err_msg = value
 
-                self.replies[req] = msg
-                self.condition.notify_all()
+                elif name == 'payload':
+                    self.__recv_payload(req, int(value))
+                    is_reply = False
+
+            if req is None:
+                raise RuntimeError('Unknown reply: ' + req)
+
+            # The server switches to the binary protocol right after acknowledging it
+            if req == self.protocol_req and msg.rstrip('\n') == 'binary':
+                self.binary = True
+
+            if is_reply:
+                self.__reply(req, msg, is_stop, is_run)
+
+            return True
+
+        def set_payload_buffer(self, req, buffer):
+            self.lock.acquire()
+            self.payload_buffers[req] = buffer
+            self.lock.release()
+
+        def __wait(self, predicate, timeout=None):
+            # Must be called with the lock held. Returns False if the timeout expired.
+            if not self.condition.wait_for(lambda: predicate() or self.closed, timeout):
+                return False
+            if not predicate():
                 self.lock.release()
+                raise ConnectionError('Proxy connection closed')
+            return True
 
         def _get_payload(self, req):
             self.lock.acquire()
-            while self.payloads.get(req) is None:
-                self.condition.wait()
+            self.__wait(lambda: self.payloads.get(req) is not None)
             payload = self.payloads[req]
             del self.payloads[req]
             self.lock.release()
@@ -143,11 +294,12 @@ class Proxy(object):
 
 
 
-        def wait_reply(self, req):
+        def wait_reply(self, req, timeout=None):
 
             self.lock.acquire()
-            while self.replies.get(req) is None:
-                self.condition.wait()
+            if not self.__wait(lambda: self.replies.get(req) is not None, timeout):
+                self.lock.release()
+                return None
             reply = self.replies[req]
             del self.replies[req]
 
@@ -157,20 +309,17 @@ class Proxy(object):
 
         def wait_stopped(self, timestamp=None):
             self.lock.acquire()
-            while self.running or (timestamp is not None and self.timestamp < timestamp):
-                self.condition.wait()
+            self.__wait(lambda: not self.running and (timestamp is None or self.timestamp >= timestamp))
             self.lock.release()
 
         def wait_timestamp(self, timestamp):
             self.lock.acquire()
-            while self.timestamp < timestamp:
-                self.condition.wait()
+            self.__wait(lambda: self.timestamp >= timestamp)
             self.lock.release()
 
         def wait_running(self):
             self.lock.acquire()
-            while not self.running:
-                self.condition.wait()
+            self.__wait(lambda: self.running)
             self.lock.release()
 
 
@@ -199,17 +348,45 @@ class Proxy(object):
             self.lock.release()
 
 
-    def __init__(self, host: str = 'localhost', port: int = 42951):
+    class _Batch(object):
+
+        def __init__(self, proxy):
+            self.proxy = proxy
+
+        def __enter__(self):
+            self.proxy._batch_enter()
+            return self
+
+        def __exit__(self, *args):
+            self.proxy._batch_exit()
+
+
+    def __init__(self, host: str = 'localhost', port: int = 42951, binary: bool = True):
         self.req_id = 0
 
         self.lock = threading.Lock()
+        self.binary = False
+
+        # Commands sent during a batch are accumulated here, and the requests whose reply is only
+        # needed at the end of the batch are accumulated in the list
+        self.batch_depth = 0
+        self.batch_buffer = None
+        self.batch_reqs = []
 
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.socket.connect((host, port))
+        # Commands are small and the simulator waits for them, don't let them be delayed
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
 
         self.reader = self._Socket_proxy_reader_thread(self.socket)
         self.reader.start()
 
+        if binary:
+            self.reader.protocol_req = self.req_id
+            req = self._send_cmd('protocol binary', wait_reply=False)
+            reply = self.reader.wait_reply(req, timeout=_PROTOCOL_TIMEOUT)
+            self.binary = reply is not None and reply.rstrip('\n') == 'binary'
+
     def _get_req(self):
         self.lock.acquire()
         req = self.req_id
@@ -218,23 +395,114 @@ class Proxy(object):
 
         return req
 
-    def _send_cmd(self, cmd, wait_reply=True, keep_lock=False):
+    def _send(self, data):
+        if self.batch_buffer is not None:
+            self.batch_buffer += data
+            # Bound the memory used by big batches
+            if len(self.batch_buffer) >= 1 << 20:
+                self._flush()
+        else:
+            self.socket.sendall(data)
+
+    def _flush(self):
+        if self.batch_buffer:
+            self.socket.sendall(self.batch_buffer)
+            self.batch_buffer = bytearray()
+
+    def _send_cmd(self, cmd, wait_reply=True, keep_lock=False, payload=None, payload_buffer=None):
         self.lock.acquire()
         req = self.req_id
         self.req_id += 1
-        self.socket.send(('req=%d;cmd=%s\n' % (req, cmd)).encode('ascii'))
+
+        # The payload of the reply will be received directly into this buffer
+        if payload_buffer is not None:
+            self.reader.set_payload_buffer(req, payload_buffer)
+
+        cmd = cmd.encode('ascii')
+        if self.binary:
+            data = _FRAME_HEADER.pack(req, _FRAME_CMD, len(cmd)) + cmd
+        else:
+            data = b'req=%d;cmd=%s\n' % (req, cmd)
+
+        # The payload is read by the command, right after it. Small ones are sent in the same
+        # write as the command, to not pay one more network round-trip for them.
+        if payload is not None and len(payload) < 1 << 16:
+            self._send(data + payload)
+        else:
+            self._send(data)
+            if payload is not None:
+                self._send(payload)
 
         if not keep_lock:
             self.lock.release()
 
         if wait_reply:
-            return self.reader.wait_reply(req)
+            return self._wait_reply(req)
         else:
             return req
 
     def _unlock_cmd(self):
         self.lock.release()
 
+    def _wait_reply(self, req, deferrable=False, check=None):
+        # Commands whose reply is not needed are not waited during a batch, their replies are
+        # waited for at the end of the batch, and given to the check function there
+        if deferrable and self.batch_depth > 0:
+            self.batch_reqs.append((req, check))
+            return None
+
+        self._flush()
+        reply = self.reader.wait_reply(req)
+        if check is not None:
+            check(reply)
+        return reply
+
+    def _get_payload(self, req):
+        self._flush()
+        return self.reader._get_payload(req)
+
+    def _batch_enter(self):
+        if self.batch_depth == 0:
+            self.batch_buffer = bytearray()
+        self.batch_depth += 1
+
+    def _batch_exit(self):
+        self.batch_depth -= 1
+        if self.batch_depth == 0:
+            self._flush()
+            self.batch_buffer = None
+            # All the replies are waited for before raising the first error, so that the next
+            # commands do not get the replies of the batch
+            error = None
+            for req, check in self.batch_reqs:
+                reply = self.reader.wait_reply(req)
+                if check is not None and error is None:
+                    try:
+                        check(reply)
+                    except RuntimeError as e:
+                        error = e
+            self.batch_reqs = []
+            if error is not None:
+                raise error
+
+    def batch(self):
+        """Batch commands.
+
+        This returns a context manager. The commands sent inside it are accumulated and sent
+        together, and the ones whose result is not needed, like memory writes, do not wait for
+        their reply, so that many requests are in flight in a single round-trip. The replies are
+        waited for at the end of the batch. Commands returning a result, like memory reads, send
+        the accumulated commands and wait for their own reply.
+        A batch must only be used by the thread which created it.
+
+        Example::
+
+            with proxy.batch():
+                for addr, value in values:
+                    router.mem_write_int(addr, 4, value)
+        """
+        return Proxy._Batch(self)
+
     def wait_stop(self):
         """Wait until execution stops.
 
@@ -322,6 +590,66 @@ class Proxy(object):
 
 
 
+    def checkpoint(self, path: str):
+        """Save the simulation state into a checkpoint.
+
+        The checkpoint is a directory which can be given to the runner with option --restore
+        to start a new simulation from this state. Execution must be stopped.
+
+        :param path: The path of the checkpoint directory, created if it does not exist.
+
+        :raises: RuntimeError, if the checkpoint could not be saved.
+        """
+        error = self._send_cmd('checkpoint %s' % os.path.abspath(path)).rstrip('\n')
+        if error != '':
+            raise RuntimeError('Failed to save checkpoint: ' + error)
+
+    def profile(self) -> dict:
+        """Get the profiling report.
+
+        Profiling must have been enabled with the runner option --profiling. The report gives,
+        for each component, the number of callbacks executed by the engines and the host time
+        spent in them, in nanoseconds.
+
+        :return: A dictionary, keyed by component path, of dictionaries with keys "count" and "ns".
+
+        :raises: RuntimeError, if profiling is not enabled.
+        """
+        req = self._send_cmd('profile', wait_reply=False)
+        report = self._get_payload(req)
+        self._wait_reply(req)
+
+        if len(report) == 0:
+            raise RuntimeError('Profiling is not enabled')
+
+        return json.loads(report.decode('utf-8'))
+
+    def fork(self, nb: int) -> list:
+        """Fork the simulation into several copies.
+
+        Each copy is a new process starting from the current state, with its own proxy, so that
+        it can be configured and run independently, for example to sweep parameters after a
+        common prefix. The copies are stopped until they are run.
+
+        Example::
+
+            for child, frequency in zip(proxy.fork(3), [ 100000000, 200000000, 400000000 ]):
+                Clock_domain(child, '**/soc_clock').set_frequency(frequency)
+                child.run(1000000000)
+
+        :param nb: The number of copies.
+
+        :return: A list of Proxy objects, one per copy.
+
+        :raises: RuntimeError, if the simulation could not be forked.
+        """
+        reply = self._send_cmd('fork %d' % nb).rstrip('\n')
+        if reply.find('ports=') != 0:
+            raise RuntimeError('Failed to fork simulation: ' + reply)
+
+        host = self.socket.getpeername()[0]
+        return [ Proxy(host, int(port)) for port in reply.split('=', 1)[1].split(',') ]
+
     def quit(self, status: int = 0):
         """Exit simulation.
 
@@ -379,14 +707,9 @@ class Router(object):
         """
         cmd = 'component %s mem_write 0x%x 0x%x' % (self.component, addr, size)
 
-        # Since we need to send a command and right after the data,
-        # we have to keep the command queue locked to avoid mixing our data
-        # with another command
-        req = self.proxy._send_cmd(cmd, keep_lock=True, wait_reply=False)
-        self.proxy.socket.send(values)
-        self.proxy._unlock_cmd()
+        req = self.proxy._send_cmd(cmd, wait_reply=False, payload=values)
 
-        self.proxy.reader.wait_reply(req)
+        self.proxy._wait_reply(req, deferrable=True)
 
     def mem_read(self, addr: int, size: int) -> bytes:
         """Inject a memory read.
@@ -402,20 +725,19 @@ class Router(object):
         :raises: RuntimeError, if the access generates an error in the architecture.
         """
 
-        # Since we need to send a command and right after we receive the data,
-        # we have to keep the command queue locked to avoid mixing our data
-        # with another command
         self.read_size = size
-        cmd = 'component %s mem_read 0x%x 0x%x' % (self.component, addr, size)
-        req = self.proxy._send_cmd(cmd, keep_lock=True, wait_reply=False)
-
-        reply = self.proxy.reader._get_payload(req)
+        reply = bytearray(size)
+        self._mem_read_into(addr, memoryview(reply))
+        return reply
 
-        self.proxy._unlock_cmd()
+    def _mem_read_into(self, addr, view):
+        cmd = 'component %s mem_read 0x%x 0x%x' % (self.component, addr, len(view))
+        req = self.proxy._send_cmd(cmd, wait_reply=False, payload_buffer=view)
 
-        self.proxy.reader.wait_reply(req)
+        payload = self.proxy._get_payload(req)
 
-        return reply
+        # The view is only filled if the payload has its size
+        _check_access(self.proxy._wait_reply(req), payload, len(view))
 
 
     def mem_write_int(self, addr: int, size: int, value: int):
@@ -448,7 +770,148 @@ class Router(object):
         values = self.mem_read(addr, size)
         return int.from_bytes(values, byteorder='little')
 
+    def mem_write_v(self, accesses: list):
+        """Inject several memory writes in one command.
+
+        The accesses are sent together in a single command, which is much faster than one
+        mem_write per access when there are many of them.
+
+        :param accesses: list, A list of (addr, values) tuples, where values is any object supporting
+            the buffer protocol, like bytes or a NumPy array, giving the bytes to be written.
+
+        :raises: RuntimeError, if the access generates an error in the architecture. In a batch, the
+            error is raised at the end of the batch.
+        """
+        views = [ memoryview(values).cast('B') for addr, values in accesses ]
+        descs = _access_descs([ (addr, len(view)) for (addr, values), view in zip(accesses, views) ])
+        payload = b''.join([ descs ] + views)
+
+        cmd = 'component %s mem_write_v %d' % (self.component, len(accesses))
+
+        req = self.proxy._send_cmd(cmd, wait_reply=False, payload=payload)
+
+        self.proxy._wait_reply(req, deferrable=True, check=_check_access)
+
+    def mem_read_v(self, accesses: list, buffer=None) -> list:
+        """Inject several memory reads in one command.
+
+        The accesses are sent together in a single command, and the data of all of them is
+        received directly into one buffer.
+
+        :param accesses: list, A list of (addr, size) tuples.
+        :param buffer: optional, A writable object supporting the buffer protocol, like a NumPy array,
+            where the data of all the accesses is received, one after the other. Its size must be
+            the sum of the sizes of the accesses. A bytearray is allocated if it is None.
+
+        :return: list, One memoryview per access, giving its data in the buffer. Use numpy.frombuffer
+            to see them as NumPy arrays.
+
+        :raises: RuntimeError, if the access generates an error in the architecture.
+        """
+        total_size = sum([ size for addr, size in accesses ])
+        if buffer is None:
+            buffer = bytearray(total_size)
+        view = memoryview(buffer).cast('B')
+        if len(view) != total_size:
+            raise RuntimeError('Buffer size (%d) is not the size of the accesses (%d)' % (len(view), total_size))
+
+        cmd = 'component %s mem_read_v %d' % (self.component, len(accesses))
+        req = self.proxy._send_cmd(cmd, wait_reply=False, payload=_access_descs(accesses),
+            payload_buffer=view)
+
+        payload = self.proxy._get_payload(req)
+
+        _check_access(self.proxy._wait_reply(req), payload, total_size)
+
+        result = []
+        offset = 0
+        for addr, size in accesses:
+            result.append(view[offset:offset + size])
+            offset += size
+
+        return result
+
+    def write_array(self, addr: int, array):
+        """Write a NumPy array.
+
+        The array is written in little endian byte ordering. Its buffer is sent directly, without
+        copy if it is contiguous and little endian.
+
+        :param addr: int, The address where the array is written.
+        :param array: numpy.ndarray, The array to be written.
+
+        :raises: RuntimeError, if the access generates an error in the architecture.
+        """
+        view = _array_view(array)
+        self.mem_write(addr, len(view), view)
+
+    def read_array(self, addr: int, shape, dtype):
+        """Read a NumPy array.
+
+        The data is received directly into the returned array.
+
+        :param addr: int, The address where the array is read.
+        :param shape: int or tuple, The shape of the array.
+        :param dtype: The NumPy data type of the elements, stored in little endian byte ordering.
+
+        :return: numpy.ndarray, The array read.
+
+        :raises: RuntimeError, if the access generates an error in the architecture, or if the data
+            received does not have the size of the array.
+        """
+        import numpy
+        array = numpy.empty(shape, dtype=numpy.dtype(dtype).newbyteorder('<'))
+        self._mem_read_into(addr, memoryview(array.reshape(-1).view(numpy.uint8)))
+        return array
+
+    def compare(self, addr: int, expected, atol=0) -> list:
+        """Compare memory with a NumPy array.
+
+        The memory is read as an array of the same shape and type as the expected one and compared
+        element by element.
+
+        :param addr: int, The address where the array is read.
+        :param expected: numpy.ndarray, The expected array.
+        :param atol: optional, The absolute tolerance of the comparison. Elements must be equal if it is 0,
+            except for floating-point ones, where NaNs are considered equal.
+
+        :return: list, The mismatches, as (index, actual, expected) tuples, empty if the memory matches.
+
+        :raises: RuntimeError, if the access generates an error in the architecture.
+        """
+        import numpy
+        expected = numpy.asarray(expected)
+        return _array_mismatches(self.read_array(addr, expected.shape, expected.dtype), expected, atol)
+
+
+
+
+class Clock_domain(object):
+    """
+    A class used to control a clock domain
+
+    :param proxy: The proxy object. This class will use it to send command to GVSOC through the proxy connection.
+    :param path: The path to the clock domain in the architecture.
+    """
 
+    def __init__(self, proxy: Proxy, path: str):
+        self.proxy = proxy
+        self.path = path
+        self.component = proxy._get_component(path)
+
+    def set_frequency(self, frequency: int):
+        """Change the frequency of the clock domain.
+
+        The new frequency is applied from the current time, for example to give a different
+        frequency to each copy of a forked simulation.
+
+        :param frequency: int, The new frequency in Hz.
+
+        :raises: RuntimeError, if the frequency could not be changed.
+        """
+        reply = self.proxy._send_cmd('component %s set_frequency %d' % (self.component, frequency))
+        if reply.rstrip('\n') != 'err=0':
+            raise RuntimeError('Failed to set frequency of clock domain %s' % self.path)
 
 
 class Testbench(object):
@@ -562,14 +1025,9 @@ class Testbench_uart(object):
         """
         cmd = 'component %s uart tx %d %d' % (self.testbench, self.id, len(values))
 
-        # Since we need to send a command and right after the data,
-        # we have to keep the command queue locked to avoid mixing our data
-        # with another command
-        req = self.proxy._send_cmd(cmd, keep_lock=True, wait_reply=False)
-        self.proxy.socket.send(values)
-        self.proxy._unlock_cmd()
+        req = self.proxy._send_cmd(cmd, wait_reply=False, payload=values)
 
-        self.proxy.reader.wait_reply(req)
+        self.proxy._wait_reply(req)
 
     def rx(self, size=None):
         """Read data from the uart.
@@ -592,7 +1050,8 @@ class Testbench_uart(object):
             size = len(self.pending_rx_bytes)
 
         reply = self.pending_rx_bytes[0:size]
-        self.pending_rx_bytes = self.pending_rx_bytes[size:]
+        # Removing from the start of a bytearray does not copy the remaining bytes
+        del self.pending_rx_bytes[0:size]
 
         self.lock.release()
 
@@ -623,11 +1082,10 @@ class Testbench_uart(object):
         self.proxy._send_cmd(cmd)
 
 
-    def __handle_rx(self):
+    def __handle_rx(self, reply):
         self.lock.acquire()
-        reply = self.proxy.socket.recv(1)
         if self.callback is not None:
-            self.callback[0](1, reply, *self.callback[1], **self.callback[2])
+            self.callback[0](len(reply), bytes(reply), *self.callback[1], **self.callback[2])
         else:
             self.pending_rx_bytes += reply
             self.condition.notify()
@@ -936,3 +1394,679 @@ class Testbench_i2s(object):
         options += ' stop_tx=%d' % stop_tx
         cmd = 'component %s i2s slot_stop %s' % (self.testbench, options)
         self.proxy._send_cmd(cmd)
+
+
+
+class _Command_recorder(object):
+    # Used as proxy by the synchronous classes to get the commands they would send, so that the
+    # asynchronous ones can send them without duplicating how they are built
+
+    def __init__(self):
+        self.cmds = []
+
+    def _send_cmd(self, cmd, *args, **kwargs):
+        self.cmds.append(cmd)
+
+
+class AsyncProxy(object):
+    """
+    A class used to control GVSOC through the socket proxy from asyncio code
+
+    Contrary to Proxy, no thread is used. The replies are read by a task of the event loop, so
+    that one process can control many GVSOC instances concurrently. Instances must be created with
+    AsyncProxy.connect.
+
+    Example::
+
+        async def main(ports):
+            proxies = [ await AsyncProxy.connect('localhost', port) for port in ports ]
+            await asyncio.gather(*[ proxy.run(1000000000) for proxy in proxies ])
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.req_id = 0
+        self.reader = reader
+        self.writer = writer
+        # The protocol used for sending commands and the one used for reading replies are
+        # switched separately, when the server acknowledges the switch
+        self.binary = False
+        self.binary_replies = False
+        self.protocol_req = None
+        self.replies = {}
+        self.payloads = {}
+        self.streams = {}
+        self.running = False
+        self.timestamp = 0
+        self.closed = False
+        self.exit_status = None
+        self.state = asyncio.Condition()
+        self.reader_task = asyncio.ensure_future(self._read_loop())
+
+    @classmethod
+    async def connect(cls, host: str = 'localhost', port: int = 42951, binary: bool = True):
+        """Connect to the proxy.
+
+        :param host: str, The hostname where the proxy is running.
+        :param port: int, The port where to connect.
+        :param binary: bool, Use the binary protocol, which is cheaper to parse, instead of the text one. The text one is kept if the server does not support it.
+
+        :return: AsyncProxy, The connected proxy.
+        """
+        reader, writer = await asyncio.open_connection(host, port)
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            # Commands are small and the simulator waits for them, don't let them be delayed
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        proxy = cls(reader, writer)
+
+        if binary:
+            proxy.protocol_req = proxy.req_id
+            try:
+                proxy.binary = await asyncio.wait_for(proxy._cmd('protocol binary'),
+                    _PROTOCOL_TIMEOUT) == 'binary'
+            except asyncio.TimeoutError:
+                pass
+
+        return proxy
+
+    def _get_req(self):
+        req = self.req_id
+        self.req_id += 1
+        return req
+
+    def _send_cmd(self, cmd, payload=None, wait_payload=False):
+        if self.closed:
+            raise ConnectionError('Proxy connection closed')
+
+        req = self._get_req()
+
+        loop = asyncio.get_event_loop()
+        self.replies[req] = loop.create_future()
+        if wait_payload:
+            self.payloads[req] = loop.create_future()
+
+        # No await in between, so that the commands of concurrent tasks are not interleaved
+        cmd = cmd.encode('ascii')
+        if self.binary:
+            self.writer.write(_FRAME_HEADER.pack(req, _FRAME_CMD, len(cmd)) + cmd)
+        else:
+            self.writer.write(b'req=%d;cmd=%s\n' % (req, cmd))
+
+        if payload is not None:
+            self.writer.write(payload)
+
+        return req
+
+    async def _wait(self, futures, req):
+        future = futures[req]
+        try:
+            await self.writer.drain()
+            return await future
+        finally:
+            del futures[req]
+
+    async def _wait_reply(self, req):
+        return await self._wait(self.replies, req)
+
+    async def _get_payload(self, req):
+        return await self._wait(self.payloads, req)
+
+    async def _cmd(self, cmd, payload=None):
+        return await self._wait_reply(self._send_cmd(cmd, payload=payload))
+
+    async def _get_component(self, path):
+        return await self._cmd('get_component %s' % path)
+
+    def _stream_open(self, req):
+        self.streams[req] = asyncio.Queue()
+        return self.streams[req]
+
+    def _stream_close(self, req):
+        queue = self.streams.pop(req, None)
+        if queue is not None:
+            queue.put_nowait(None)
+
+    async def _notify(self):
+        async with self.state:
+            self.state.notify_all()
+
+    async def _wait_state(self, predicate):
+        async with self.state:
+            await self.state.wait_for(lambda: predicate() or self.closed)
+            if not predicate():
+                raise ConnectionError('Proxy connection closed')
+
+    def _resolve(self, futures, req, value):
+        future = futures.get(req)
+        if future is not None and not future.done():
+            future.set_result(value)
+
+    async def _handle_reply(self, req, msg):
+        if req == -1:
+            if msg.find('stopped') == 0:
+                self.timestamp = int(msg.split('=')[1])
+                self.running = False
+            elif msg.find('running') == 0:
+                self.running = True
+            await self._notify()
+        else:
+            self._resolve(self.replies, req, msg)
+
+    def _handle_payload(self, req, payload):
+        queue = self.streams.get(req)
+        if queue is not None:
+            queue.put_nowait(payload)
+        else:
+            self._resolve(self.payloads, req, payload)
+
+    async def _read_loop(self):
+        try:
+            while True:
+                if self.binary_replies:
+                    header = await self.reader.readexactly(_FRAME_HEADER.size)
+                    req, frame_type, size = _FRAME_HEADER.unpack(header)
+                    data = await self.reader.readexactly(size)
+
+                    if frame_type == _FRAME_PAYLOAD:
+                        self._handle_payload(req, data)
+                    elif frame_type == _FRAME_EXIT:
+                        self.exit_status = int(data)
+                    else:
+                        await self._handle_reply(req, data.decode('utf-8'))
+
+                    continue
+
+                line = await self.reader.readline()
+                if not line:
+                    return
+
+                req = None
+                msg = ''
+                is_reply = True
+                for arg in line.decode('utf-8').rstrip('\n').split(';'):
+                    name, value = arg.split('=', 1)
+                    if name == 'req':
+                        req = int(value)
+                    elif name == 'msg':
+                        msg = value
+                    elif name == 'exit':
+                        self.exit_status = int(value)
+                        is_reply = False
+                    elif name == 'payload':
+                        self._handle_payload(req, await self.reader.readexactly(int(value)))
+                        is_reply = False
+
+                if req is None:
+                    raise RuntimeError('Unknown reply: ' + line.decode('utf-8'))
+
+                # The server switches to the binary protocol right after acknowledging it
+                if req == self.protocol_req and msg == 'binary':
+                    self.binary_replies = True
+
+                if is_reply:
+                    await self._handle_reply(req, msg)
+
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+        finally:
+            # Wake-up everything which is waiting for the simulator
+            self.closed = True
+            error = ConnectionError('Proxy connection closed')
+            for future in list(self.replies.values()) + list(self.payloads.values()):
+                if not future.done():
+                    future.set_exception(error)
+            for req in list(self.streams.keys()):
+                self._stream_close(req)
+            await self._notify()
+
+    async def wait_stop(self):
+        """Wait until execution stops.
+        """
+        await self._wait_state(lambda: not self.running)
+
+    async def wait_running(self):
+        """Wait until GVSOC is running.
+        """
+        await self._wait_state(lambda: self.running)
+
+    async def wait_exit(self) -> int:
+        """Wait until GVSOC exits.
+
+        Contrary to Proxy, the python process is not exited when GVSOC exits, since it may be
+        controlling other instances.
+
+        :return: int, The exit status of GVSOC, or None if the connection was closed without it.
+        """
+        await asyncio.shield(self.reader_task)
+        return self.exit_status
+
+    async def run(self, duration: int = None):
+        """Starts execution.
+
+        :param duration: Specify the duration of the execution in picoseconds (will execute forever by default)
+        """
+        if duration is not None:
+            timestamp = int(await self._cmd('step %d' % duration))
+            await self._wait_state(lambda: self.timestamp >= timestamp)
+        else:
+            await self._cmd('run')
+
+    async def stop(self):
+        """Stop execution.
+        """
+        await self._cmd('stop')
+
+    async def trace_add(self, trace: str):
+        """Enable a trace.
+
+        :param trace: A regular expression used to enable traces
+        """
+        await self._cmd('trace add %s' % trace)
+
+    async def trace_remove(self, trace: str):
+        """Disable a trace.
+
+        :param trace: A regular expression used to disable traces
+        """
+        await self._cmd('trace remove %s' % trace)
+
+    async def trace_level(self, level: str):
+        """Changes the trace level.
+
+        :param level: The trace level, can be "error", "warning", "info", "debug" or "trace"
+        """
+        await self._cmd('trace level %s' % level)
+
+    async def event_add(self, event: str):
+        """Enable an event.
+
+        :param event: A regular expression used to enable events
+        """
+        await self._cmd('event add %s' % event)
+
+    async def event_remove(self, event: str):
+        """Disable an event.
+
+        :param event: A regular expression used to disable events
+        """
+        await self._cmd('event remove %s' % event)
+
+    async def quit(self, status: int = 0):
+        """Exit simulation.
+
+        :param status: Specify the status value.
+        """
+        await self._cmd('quit %d' % status)
+
+    async def close(self):
+        """Close the proxy.
+
+        This will free resources so that simulation can properly exit.
+        """
+        if self.writer.can_write_eof():
+            self.writer.write_eof()
+        self.writer.close()
+        await asyncio.gather(self.reader_task, return_exceptions=True)
+
+
+class AsyncRouter(object):
+    """
+    A class used to inject memory accesses into a router from asyncio code
+
+    The router is looked up in the architecture when it is first accessed.
+
+    :param proxy: AsyncProxy, The proxy object.
+    :param path: The path to the router in the architecture.
+    """
+
+    def __init__(self, proxy: AsyncProxy, path: str = '**/chip/soc/axi_ico'):
+        self.proxy = proxy
+        self.path = path
+        self.component = None
+
+    async def _get_component(self):
+        if self.component is None:
+            self.component = await self.proxy._get_component(self.path)
+        return self.component
+
+    async def mem_write(self, addr: int, size: int, values: bytes):
+        """Inject a memory write.
+
+        See Router.mem_write.
+        """
+        cmd = 'component %s mem_write 0x%x 0x%x' % (await self._get_component(), addr, size)
+        await self.proxy._cmd(cmd, payload=values)
+
+    async def mem_read(self, addr: int, size: int) -> bytes:
+        """Inject a memory read.
+
+        See Router.mem_read.
+        """
+        cmd = 'component %s mem_read 0x%x 0x%x' % (await self._get_component(), addr, size)
+        req = self.proxy._send_cmd(cmd, wait_payload=True)
+        reply = await self.proxy._get_payload(req)
+        _check_access(await self.proxy._wait_reply(req), reply, size)
+        return reply
+
+    async def mem_write_int(self, addr: int, size: int, value: int):
+        """Write an integer.
+
+        See Router.mem_write_int.
+        """
+        await self.mem_write(addr, size, value.to_bytes(size, byteorder='little'))
+
+    async def mem_read_int(self, addr: int, size: int) -> int:
+        """Read an integer.
+
+        See Router.mem_read_int.
+        """
+        return int.from_bytes(await self.mem_read(addr, size), byteorder='little')
+
+    async def mem_write_v(self, accesses: list):
+        """Inject several memory writes in one command.
+
+        See Router.mem_write_v.
+        """
+        views = [ memoryview(values).cast('B') for addr, values in accesses ]
+        descs = _access_descs([ (addr, len(view)) for (addr, values), view in zip(accesses, views) ])
+        payload = b''.join([ descs ] + views)
+        cmd = 'component %s mem_write_v %d' % (await self._get_component(), len(accesses))
+        _check_access(await self.proxy._cmd(cmd, payload=payload))
+
+    async def mem_read_v(self, accesses: list) -> list:
+        """Inject several memory reads in one command.
+
+        See Router.mem_read_v.
+
+        :return: list, One memoryview per access, giving its data.
+        """
+        cmd = 'component %s mem_read_v %d' % (await self._get_component(), len(accesses))
+        req = self.proxy._send_cmd(cmd, payload=_access_descs(accesses), wait_payload=True)
+        view = memoryview(await self.proxy._get_payload(req))
+        _check_access(await self.proxy._wait_reply(req), view,
+            sum([ size for addr, size in accesses ]))
+
+        result = []
+        offset = 0
+        for addr, size in accesses:
+            result.append(view[offset:offset + size])
+            offset += size
+
+        return result
+
+    async def write_array(self, addr: int, array):
+        """Write a NumPy array.
+
+        See Router.write_array.
+        """
+        view = _array_view(array)
+        await self.mem_write(addr, len(view), view)
+
+    async def read_array(self, addr: int, shape, dtype):
+        """Read a NumPy array.
+
+        See Router.read_array. The returned array is a read-only view of the received data.
+        """
+        import numpy
+        dtype = numpy.dtype(dtype).newbyteorder('<')
+        size = int(numpy.prod(shape)) * dtype.itemsize
+        return numpy.frombuffer(await self.mem_read(addr, size), dtype=dtype).reshape(shape)
+
+    async def compare(self, addr: int, expected, atol=0) -> list:
+        """Compare memory with a NumPy array.
+
+        See Router.compare.
+        """
+        import numpy
+        expected = numpy.asarray(expected)
+        return _array_mismatches(await self.read_array(addr, expected.shape, expected.dtype), expected, atol)
+
+
+class AsyncClock_domain(object):
+    """
+    A class used to control a clock domain from asyncio code
+
+    :param proxy: AsyncProxy, The proxy object.
+    :param path: The path to the clock domain in the architecture.
+    """
+
+    def __init__(self, proxy: AsyncProxy, path: str):
+        self.proxy = proxy
+        self.path = path
+        self.component = None
+
+    async def set_frequency(self, frequency: int):
+        """Change the frequency of the clock domain.
+
+        See Clock_domain.set_frequency.
+        """
+        if self.component is None:
+            self.component = await self.proxy._get_component(self.path)
+        reply = await self.proxy._cmd('component %s set_frequency %d' % (self.component, frequency))
+        if reply != 'err=0':
+            raise RuntimeError('Failed to set frequency of clock domain %s' % self.path)
+
+
+class AsyncTestbench(object):
+    """Testbench class for asyncio code.
+
+    The testbench is looked up in the architecture when it is first accessed.
+
+    :param proxy: AsyncProxy, The proxy object.
+    :param path: string, optional, The path to the testbench in the architecture.
+    """
+
+    def __init__(self, proxy: AsyncProxy, path: str = '**/testbench/testbench'):
+        self.proxy = proxy
+        self.path = path
+        self.component = None
+
+    async def _get_component(self):
+        if self.component is None:
+            self.component = await self.proxy._get_component(self.path)
+        return self.component
+
+    def i2s_get(self, id: int = 0):
+        """Open an SAI.
+
+        :param id: int, optional, The SAI identifier.
+
+        :return: AsyncTestbench_i2s, An object which can be used to access the specified SAI.
+        """
+        return AsyncTestbench_i2s(self.proxy, self, id)
+
+    def uart_get(self, id: int = 0):
+        """Open a uart interface.
+
+        :param id: int, optional, The uart interface identifier.
+
+        :return: AsyncTestbench_uart, An object which can be used to access the specified uart interface.
+        """
+        return AsyncTestbench_uart(self.proxy, self, id)
+
+
+class AsyncTestbench_uart(object):
+    """Class instantiated for each manipulated uart interface from asyncio code.
+
+    Once reception is enabled, the received bytes can be read with rx or by iterating
+    asynchronously over this object, which gives the bytes as they are received, until reception
+    is disabled::
+
+        await uart.rx_enable()
+        async for data in uart:
+            ...
+
+    :param proxy: AsyncProxy, The proxy object.
+    :param testbench: AsyncTestbench, The testbench object.
+    :param id: int, optional, The identifier of the uart interface.
+    """
+
+    def __init__(self, proxy: AsyncProxy, testbench: AsyncTestbench, id=0):
+        self.id = id
+        self.proxy = proxy
+        self.testbench = testbench
+        self.pending_rx_bytes = bytearray()
+        self.queue = None
+        self.req = None
+
+    async def _exec(self, method, *args, **kwargs):
+        recorder = _Command_recorder()
+        method(Testbench_uart(recorder, await self.testbench._get_component(), self.id), *args, **kwargs)
+        for cmd in recorder.cmds:
+            await self.proxy._cmd(cmd)
+
+    async def open(self, *args, **kwargs):
+        """Open and configure a uart interface.
+
+        See Testbench_uart.open for the parameters.
+        """
+        await self._exec(Testbench_uart.open, *args, **kwargs)
+
+    async def close(self):
+        """Close the uart interface.
+        """
+        await self._exec(Testbench_uart.close)
+
+    async def tx(self, values: bytes):
+        """Send data to the uart.
+
+        :param values: bytes, The sequence of bytes to be sent, in little endian byte ordering.
+        """
+        cmd = 'component %s uart tx %d %d' % (await self.testbench._get_component(), self.id, len(values))
+        await self.proxy._cmd(cmd, payload=values)
+
+    async def rx_enable(self):
+        """Enable receiving bytes from the uart.
+        """
+        self.req = self.proxy._get_req()
+        self.queue = self.proxy._stream_open(self.req)
+        cmd = 'component %s uart rx %d 1 %d' % (await self.testbench._get_component(), self.id, self.req)
+        await self.proxy._cmd(cmd)
+
+    async def rx_disable(self):
+        """Disable receiving bytes from the uart.
+
+        This also ends the iterations over this object.
+        """
+        cmd = 'component %s uart rx %d 0' % (await self.testbench._get_component(), self.id)
+        await self.proxy._cmd(cmd)
+        self.proxy._stream_close(self.req)
+
+    async def _get_rx(self):
+        # Returns all the bytes received so far, waiting for at least one, or None if reception
+        # is over
+        data = await self.queue.get()
+        if data is None:
+            # The end of reception is never consumed, so that any later read also sees it
+            self.queue.put_nowait(None)
+            return None
+
+        # Bytes are received one by one, give them by chunks
+        chunk = bytearray(data)
+        while not self.queue.empty():
+            data = self.queue.get_nowait()
+            if data is None:
+                self.queue.put_nowait(None)
+                break
+            chunk += data
+        return chunk
+
+    async def rx(self, size: int = None) -> bytes:
+        """Read data from the uart.
+
+        :param size: int, The number of bytes to be read. If it is None, it returns the bytes which has already been received.
+
+        :return: bytes, The sequence of bytes received, in little endian byte ordering.
+
+        :raises: ConnectionError, if reception is disabled before enough bytes are received.
+        """
+        if size is None:
+            while not self.queue.empty():
+                chunk = await self._get_rx()
+                if chunk is None:
+                    break
+                self.pending_rx_bytes += chunk
+            size = len(self.pending_rx_bytes)
+
+        while len(self.pending_rx_bytes) < size:
+            chunk = await self._get_rx()
+            if chunk is None:
+                raise ConnectionError('Uart reception is over')
+            self.pending_rx_bytes += chunk
+
+        reply = self.pending_rx_bytes[0:size]
+        del self.pending_rx_bytes[0:size]
+        return bytes(reply)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if len(self.pending_rx_bytes) != 0:
+            return await self.rx()
+
+        chunk = await self._get_rx()
+        if chunk is None:
+            raise StopAsyncIteration
+        return bytes(chunk)
+
+
+class AsyncTestbench_i2s(object):
+    """Class instantiated for each manipulated SAI from asyncio code.
+
+    The methods are the asynchronous versions of the ones of Testbench_i2s, with the same
+    parameters.
+
+    :param proxy: AsyncProxy, The proxy object.
+    :param testbench: AsyncTestbench, The testbench object.
+    :param id: int, optional, The identifier of the SAI interface.
+    """
+
+    def __init__(self, proxy: AsyncProxy, testbench: AsyncTestbench, id=0):
+        self.id = id
+        self.proxy = proxy
+        self.testbench = testbench
+
+    async def _exec(self, method, *args, **kwargs):
+        recorder = _Command_recorder()
+        method(Testbench_i2s(recorder, await self.testbench._get_component(), self.id), *args, **kwargs)
+        for cmd in recorder.cmds:
+            await self.proxy._cmd(cmd)
+
+    async def open(self, *args, **kwargs):
+        """Open and configure SAI, see Testbench_i2s.open."""
+        await self._exec(Testbench_i2s.open, *args, **kwargs)
+
+    async def close(self):
+        """Close SAI, see Testbench_i2s.close."""
+        await self._exec(Testbench_i2s.close)
+
+    async def clk_start(self):
+        """Start clock, see Testbench_i2s.clk_start."""
+        await self._exec(Testbench_i2s.clk_start)
+
+    async def clk_stop(self):
+        """Stop clock, see Testbench_i2s.clk_stop."""
+        await self._exec(Testbench_i2s.clk_stop)
+
+    async def slot_open(self, *args, **kwargs):
+        """Open and configure a slot, see Testbench_i2s.slot_open."""
+        await self._exec(Testbench_i2s.slot_open, *args, **kwargs)
+
+    async def slot_close(self, *args, **kwargs):
+        """Close a slot, see Testbench_i2s.slot_close."""
+        await self._exec(Testbench_i2s.slot_close, *args, **kwargs)
+
+    async def slot_rx_file_reader(self, *args, **kwargs):
+        """Read a stream of samples from a file, see Testbench_i2s.slot_rx_file_reader."""
+        await self._exec(Testbench_i2s.slot_rx_file_reader, *args, **kwargs)
+
+    async def slot_tx_file_dumper(self, *args, **kwargs):
+        """Write a stream of samples to a file, see Testbench_i2s.slot_tx_file_dumper."""
+        await self._exec(Testbench_i2s.slot_tx_file_dumper, *args, **kwargs)
+
+    async def slot_stop(self, *args, **kwargs):
+        """Stop a slot, see Testbench_i2s.slot_stop."""
+        await self._exec(Testbench_i2s.slot_stop, *args, **kwargs)
@@ -66,6 +66,13 @@ def gen_config(args, config, working_dir, runner=None):
     if args.gtkwi:
         gvsoc_config.set('events/gtkw', True)
 
+    if args.profiling is not None:
+        gvsoc_config.set('profiling/enabled', True)
+        gvsoc_config.set('profiling/path', os.path.abspath(args.profiling))
+
+    if args.restore is not None:
+        gvsoc_config.set('restore', os.path.abspath(args.restore))
+
     debug_mode = gvsoc_config.get_bool('debug-mode') or \
         gvsoc_config.get_bool('traces/enabled') or \
         gvsoc_config.get_bool('events/enabled') or \
@@ -158,6 +165,19 @@ class Runner():
                         "enabled": False,
                         "include_regex": [],
                         "exclude_regex": []
+                    },
+
+                    "profiling": {
+                        "enabled": False,
+                        # Reports are dumped at exit to <path>.txt and <path>.json
+                        "path": "profile"
+                    },
+
+                    "time_engine": {
+                        "queue": "list",
+                        # Maximum time window in ps when the system has partitions, it is
+                        # reduced to the smallest partition bridge latency
+                        "window": 1000000
                     }
                 }
             })
@@ -199,7 +219,8 @@ class Runner():
         [args, _] = parser.parse_known_args()
 
         self.full_config, self.gvsoc_config_path = gen_config(
-            args, { 'target': self.target.get_config() }, gapy_target.get_working_dir(), self)
+            args, { 'target': self.__get_target_config(args, options) },
+            gapy_target.get_working_dir(), self)
 
         if args.gdbserver:
             self.full_config.set('**/gdbserver/enabled', True)
@@ -236,6 +257,26 @@ class Runner():
                 gvsoc_config_path=self.gvsoc_config_path, full_config=self.full_config)
 
 
+    def __get_target_config(self, args, options):
+        if args.config_cache is None:
+            return self.target.get_config()
+
+        # The key covers the component sources, the options and the command-line arguments,
+        # since models can use them to build the hierarchy. The cache entry itself checks the
+        # files which were read while generating the configuration.
+        cache = st.ConfigCache(args.config_cache)
+        key = cache.get_key(self.target, options, sorted(vars(args).items()))
+
+        config = cache.load(key)
+        if config is not None:
+            return config
+
+        config = self.target.get_config()
+        cache.store(key, config, js.imported_files)
+
+        return config
+
+
     def gv_handle_command(self, cmd):
 
         if cmd == 'run':
@@ -275,7 +316,8 @@ class Runner():
             if self.gapy_target.get_args().installdir is None:
                 raise RuntimeError('Install diretory must be specified when components are being generated')
 
-            self.target.gen_all(self.gapy_target.get_args().builddir, self.gapy_target.get_args().installdir)
+            self.target.gen_all(self.gapy_target.get_args().builddir, self.gapy_target.get_args().installdir,
+                jobs=self.gapy_target.get_args().gen_jobs)
 
             generated_components = self.target.get_generated_components()
 
@@ -522,6 +564,13 @@ class Target(gapy.Target):
             parser.add_argument("--valgrind", dest="valgrind",
                 action="store_true", help="Launch GVSOC through valgrind")
 
+            parser.add_argument("--profiling", dest="profiling", default=None, nargs='?',
+                const="profile", help="Profile the host time spent in each component and dump "
+                "the report to the specified path, with extensions .txt and .json")
+
+            parser.add_argument("--restore", dest="restore", default=None,
+                help="Start the simulation from the specified checkpoint directory")
+
             parser.add_argument("--wno-unconnected-device", dest="w_unconnected_device",
                 action="store_false", default=False, help="Deactivate warnings when updating padframe with no connected device")
             parser.add_argument("--wno-unconnected-padfun", dest="w_unconnected_padfun",
@@ -538,6 +587,13 @@ class Target(gapy.Target):
             parser.add_argument("--installdir", dest="installdir", default=None,
                 help="Specify install directory. This can be used when generating components code.")
 
+            parser.add_argument("--gen-jobs", dest="gen_jobs", default=1, type=int,
+                help="Specify the number of processes used to generate components code.")
+
+            parser.add_argument("--config-cache", dest="config_cache", default=None,
+                help="Specify a directory where the system configuration is cached, so that next runs "
+                    "with the same target, options and arguments can skip the system tree generation.")
+
             [args, otherArgs] = parser.parse_known_args()
 
             if args.install_dirs is not None:
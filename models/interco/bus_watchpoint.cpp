@@ -281,6 +281,8 @@ vp::io_req_status_e bus_watchpoint::req(void *__this, vp::io_req *req)
 
 int bus_watchpoint::build()
 {
+    this->checkpoint_unsupported();
+
     traces.new_trace("trace", &trace, vp::DEBUG);
 
     in.set_req_meth(&bus_watchpoint::req);
@@ -0,0 +1,280 @@
+/*
+ * Copyright (C) 2020 GreenWaves Technologies, SAS, ETH Zurich and
+ *                    University of Bologna
+ *
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+
+#include <vp/vp.hpp>
+#include <vp/itf/io.hpp>
+#include <stdio.h>
+#include <map>
+#include <vector>
+
+/*
+ * Link between two time engine partitions.
+ *
+ * Requests received on the input port are forwarded to the output port after a fixed latency, and
+ * responses come back the same way. The latency is the lookahead of the partitions: a request
+ * received during a window is always delivered after its end, so requests are only exchanged
+ * between partitions while they are all stopped, at the end of the window.
+ */
+
+class partition_bridge;
+
+// One side of the bridge, executing the deliveries to its partition
+class Bridge_side : public vp::time_engine_client
+{
+public:
+    Bridge_side(partition_bridge *top, vp::time_engine *engine);
+
+    int64_t exec();
+
+    // Deliveries, ordered by time, and done by calling the deliver method of the bridge
+    std::multimap<int64_t, vp::io_req *> queue;
+    void (*deliver)(partition_bridge *, vp::io_req *);
+
+private:
+    partition_bridge *top;
+};
+
+
+class partition_bridge : public vp::component
+{
+
+    friend class Bridge_side;
+
+public:
+    partition_bridge(js::config *config);
+
+    int build();
+
+private:
+    static vp::io_req_status_e req(void *__this, vp::io_req *req);
+    static void response(void *__this, vp::io_req *req);
+    static void sync(void *__this);
+
+    static void deliver_req(partition_bridge *_this, vp::io_req *req);
+    static void deliver_resp(partition_bridge *_this, vp::io_req *req);
+
+    void post_resp(vp::io_req *req, int64_t time);
+
+    vp::trace trace;
+
+    vp::io_slave in;
+    vp::io_master out;
+
+    // Latency in ps between the 2 partitions
+    int64_t latency;
+
+    Bridge_side *input_side;
+    Bridge_side *output_side;
+    bool partitioned;
+
+    // Requests and responses sent during the current window, only accessed by the thread of the
+    // sending partition until the end of the window
+    std::vector<std::pair<int64_t, vp::io_req *>> pending_reqs;
+    std::vector<std::pair<int64_t, vp::io_req *>> pending_resps;
+};
+
+
+
+Bridge_side::Bridge_side(partition_bridge *top, vp::time_engine *engine)
+    : vp::time_engine_client(NULL), top(top)
+{
+    this->engine = engine;
+}
+
+int64_t Bridge_side::exec()
+{
+    while (this->queue.size() && this->queue.begin()->first == this->get_time())
+    {
+        vp::io_req *req = this->queue.begin()->second;
+        this->queue.erase(this->queue.begin());
+        this->deliver(this->top, req);
+    }
+
+    if (this->queue.size() == 0)
+    {
+        return -1;
+    }
+
+    return this->queue.begin()->first - this->get_time();
+}
+
+
+
+partition_bridge::partition_bridge(js::config *config)
+    : vp::component(config)
+{
+}
+
+
+
+vp::io_req_status_e partition_bridge::req(void *__this, vp::io_req *req)
+{
+    partition_bridge *_this = (partition_bridge *)__this;
+    int64_t time = _this->input_side->get_time() + _this->latency;
+
+    _this->trace.msg(vp::trace::LEVEL_TRACE, "Received request (req: %p, offset: 0x%llx, size: 0x%llx, is_write: %d, delivery: %lld)\n",
+        req, req->get_addr(), req->get_size(), req->get_is_write(), time);
+
+    // Keep what is needed to reply, the latency is the one accumulated so far by the initiator
+    // side, the output side will account for its own one in time
+    req->arg_push(req->resp_port);
+    req->arg_push((void *)(long)req->get_latency());
+
+    _this->pending_reqs.push_back(std::make_pair(time, req));
+
+    if (!_this->partitioned)
+    {
+        partition_bridge::sync(_this);
+    }
+
+    return vp::IO_REQ_PENDING;
+}
+
+
+
+void partition_bridge::deliver_req(partition_bridge *_this, vp::io_req *req)
+{
+    req->prepare();
+
+    vp::io_req_status_e status = _this->out.req(req);
+
+    if (status != vp::IO_REQ_PENDING)
+    {
+        int64_t time = _this->output_side->get_time() + _this->latency;
+        if (_this->get_clock())
+        {
+            time += req->get_full_latency() * _this->get_period();
+        }
+
+        req->status = status;
+        _this->post_resp(req, time);
+    }
+}
+
+
+
+void partition_bridge::response(void *__this, vp::io_req *req)
+{
+    partition_bridge *_this = (partition_bridge *)__this;
+
+    _this->post_resp(req, _this->output_side->get_time() + _this->latency);
+}
+
+
+
+void partition_bridge::post_resp(vp::io_req *req, int64_t time)
+{
+    this->trace.msg(vp::trace::LEVEL_TRACE, "Sending response (req: %p, delivery: %lld)\n", req, time);
+
+    this->pending_resps.push_back(std::make_pair(time, req));
+
+    if (!this->partitioned)
+    {
+        partition_bridge::sync(this);
+    }
+}
+
+
+
+void partition_bridge::deliver_resp(partition_bridge *_this, vp::io_req *req)
+{
+    req->set_latency((long)req->arg_pop());
+    vp::io_slave *port = (vp::io_slave *)req->arg_pop();
+
+    port->resp(req);
+}
+
+
+
+void partition_bridge::sync(void *__this)
+{
+    partition_bridge *_this = (partition_bridge *)__this;
+
+    if (_this->pending_reqs.size())
+    {
+        for (auto &x: _this->pending_reqs)
+        {
+            _this->output_side->queue.insert(x);
+        }
+        _this->pending_reqs.clear();
+        _this->output_side->enqueue_to_engine(_this->output_side->queue.begin()->first);
+    }
+
+    if (_this->pending_resps.size())
+    {
+        for (auto &x: _this->pending_resps)
+        {
+            _this->input_side->queue.insert(x);
+        }
+        _this->pending_resps.clear();
+        _this->input_side->enqueue_to_engine(_this->input_side->queue.begin()->first);
+    }
+}
+
+
+
+int partition_bridge::build()
+{
+    this->traces.new_trace("trace", &this->trace, vp::DEBUG);
+
+    this->in.set_req_meth(&partition_bridge::req);
+    this->new_slave_port("input", &this->in);
+
+    this->out.set_resp_meth(&partition_bridge::response);
+    this->new_master_port("output", &this->out);
+
+    this->latency = this->get_js_config()->get_child_int("latency");
+
+    vp::time_engine *engine = (vp::time_engine *)this->get_service("time");
+    vp::time_engine *input_engine = engine->get_partition(this->get_js_config()->get_child_str("input_partition"));
+    vp::time_engine *output_engine = engine->get_partition(this->get_js_config()->get_child_str("output_partition"));
+
+    this->input_side = new Bridge_side(this, input_engine);
+    this->input_side->deliver = &partition_bridge::deliver_resp;
+    this->input_side->build_instance("input_side", this);
+
+    this->output_side = new Bridge_side(this, output_engine);
+    this->output_side->deliver = &partition_bridge::deliver_req;
+    this->output_side->build_instance("output_side", this);
+
+    this->partitioned = input_engine != output_engine;
+
+    if (this->partitioned)
+    {
+        // The partitions can not run further than our latency without synchronizing, otherwise
+        // they could miss our requests
+        try
+        {
+            engine->lookahead_register(this->latency);
+        }
+        catch (const std::invalid_argument &e)
+        {
+            this->throw_error(e.what());
+        }
+
+        engine->partition_sync_register(this, &partition_bridge::sync);
+    }
+
+    return 0;
+}
+
+
+
+extern "C" vp::component *vp_constructor(js::config *config)
+{
+    return new partition_bridge(config);
+}
@@ -0,0 +1,52 @@
+#
+# Copyright (C) 2020 GreenWaves Technologies, SAS, ETH Zurich and University of Bologna
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import gsystree as st
+
+class Partition_bridge(st.Component):
+    """Memory-mapped link between two partitions
+
+    Requests going through it are delivered to the other side after a fixed latency, and so are
+    the responses. The smallest latency of all bridges is the lookahead used to synchronize the
+    partitions, so it should be as high as the modeled interconnect allows.
+    The clock port can be bound to the output side clock so that the latency reported by
+    synchronous targets is taken into account.
+
+    Attributes
+    ----------
+    parent: gsystree.Component
+        The parent component where this one should be instantiated.
+    name: str
+        The name of the component within the parent space.
+    latency: int
+        Latency in picoseconds between the two partitions. Must be strictly positive when the two
+        partitions are different.
+    input_partition: str
+        Name of the partition of the initiators, or None for the main one.
+    output_partition: str
+        Name of the partition of the targets, or None for the main one.
+    """
+
+    def __init__(self, parent, name, latency, input_partition=None, output_partition=None):
+        super(Partition_bridge, self).__init__(parent, name)
+
+        self.set_component('interco.partition_bridge')
+
+        self.add_properties({
+            'latency': latency,
+            'input_partition': input_partition if input_partition is not None else '',
+            'output_partition': output_partition if output_partition is not None else ''
+        })
@@ -94,6 +94,7 @@ public:
   router(js::config *config);
 
   int build();
+  void checkpoint_io(vp::checkpoint *ckpt);
   std::string handle_command(Gv_proxy *proxy, FILE *req_file, FILE *reply_file, std::vector<std::string> args, std::string req);
 
   static vp::io_req_status_e req(void *__this, vp::io_req *req);
@@ -111,6 +112,9 @@ private:
   bool init = false;
 
   void init_entries();
+  int proxy_access(uint64_t addr, uint64_t size, uint8_t *data, bool is_write);
+  // Maximum size of the data of a vectored proxy command, since proxy payload sizes are ints
+  static constexpr uint64_t proxy_max_size = INT32_MAX;
   MapEntry *firstMapEntry = NULL;
   MapEntry *defaultMapEntry = NULL;
   MapEntry *errorMapEntry = NULL;
@@ -372,19 +376,73 @@ std::string router::handle_command(Gv_proxy *proxy, FILE *req_file, FILE *reply_
             }
         }
 
-        vp::io_req *req = &this->proxy_req;
-        req->set_data((uint8_t *)buffer);
-        req->set_is_write(is_write);
-        req->set_size(size);
-        req->set_addr(addr);
-        req->set_debug(true);
+        error |= this->proxy_access(addr, size, buffer, is_write);
 
-        vp::io_req_status_e result = router::req((void *)this, req);
-        error |= result != vp::IO_REQ_OK;
+        if (!is_write)
+        {
+            error |= proxy->send_payload(reply_file, cmd_req, buffer, size);
+        }
+
+        delete[] buffer;
+
+        return "err=" + std::to_string(error);
+    }
+    else if (args[0] == "mem_write_v" or args[0] == "mem_read_v")
+    {
+        // Several accesses in one command. The payload starts with one descriptor per access,
+        // made of the address and the size as 64 bits little-endian integers, followed for writes
+        // by the data of all the accesses. Reads send back the data of all the accesses in one
+        // payload, even if the command fails, since the client is waiting for it.
+        bool is_write = args[0] == "mem_write_v";
+        long long int nb_accesses = args.size() >= 2 ? strtoll(args[1].c_str(), NULL, 0) : -1;
+
+        // Descriptors are read one by one so that the memory used only depends on what the
+        // client really sent
+        std::vector<uint64_t> descs;
+        uint64_t total_size = 0;
+        int error = nb_accesses < 0;
+        for (long long int i=0; i<nb_accesses; i++)
+        {
+            uint64_t desc[2];
+            if (fread(desc, sizeof(uint64_t), 2, req_file) != 2 ||
+                desc[1] > router::proxy_max_size - total_size)
+            {
+                error = 1;
+                break;
+            }
+            descs.push_back(desc[0]);
+            descs.push_back(desc[1]);
+            total_size += desc[1];
+        }
+
+        uint8_t *buffer = error ? NULL : new (std::nothrow) uint8_t[total_size];
+        if (buffer == NULL)
+        {
+            error = 1;
+        }
+
+        if (is_write && buffer != NULL)
+        {
+            if (fread(buffer, 1, total_size, req_file) != total_size)
+            {
+                error = 1;
+            }
+        }
+
+        // Accesses are only done if the whole command could be read, to never write garbage
+        if (!error)
+        {
+            uint8_t *data = buffer;
+            for (size_t i=0; i<descs.size(); i+=2)
+            {
+                error |= this->proxy_access(descs[i], descs[i + 1], data, is_write);
+                data += descs[i + 1];
+            }
+        }
 
         if (!is_write)
         {
-            error = proxy->send_payload(reply_file, cmd_req, buffer, size);
+            error |= proxy->send_payload(reply_file, cmd_req, buffer, buffer ? total_size : 0);
         }
 
         delete[] buffer;
@@ -395,6 +453,48 @@ std::string router::handle_command(Gv_proxy *proxy, FILE *req_file, FILE *reply_
 }
 
 
+int router::proxy_access(uint64_t addr, uint64_t size, uint8_t *data, bool is_write)
+{
+    vp::io_req *req = &this->proxy_req;
+    req->set_data(data);
+    req->set_is_write(is_write);
+    req->set_size(size);
+    req->set_addr(addr);
+    req->set_debug(true);
+
+    return router::req((void *)this, req) != vp::IO_REQ_OK;
+}
+
+
+void router::checkpoint_io(vp::checkpoint *ckpt)
+{
+  // Bandwidth state of each target, in the order of the routing table, which only depends on the
+  // configuration, followed by the performance counters, ordered by id
+  std::vector<MapEntry *> entries;
+  for (MapEntry *entry = this->firstMapEntry; entry; entry = entry->next)
+  {
+    entries.push_back(entry);
+  }
+  if (this->defaultMapEntry) entries.push_back(this->defaultMapEntry);
+  if (this->errorMapEntry) entries.push_back(this->errorMapEntry);
+
+  for (MapEntry *entry: entries)
+  {
+    ckpt->io(entry->next_read_packet_time);
+    ckpt->io(entry->next_write_packet_time);
+  }
+
+  for (auto &it: this->counters)
+  {
+    Perf_counter *counter = it.second;
+    ckpt->io(counter->nb_read);
+    ckpt->io(counter->nb_write);
+    ckpt->io(counter->read_stalls);
+    ckpt->io(counter->write_stalls);
+  }
+}
+
+
 int router::build()
 {
   traces.new_trace("trace", &trace, vp::DEBUG);
@@ -24,6 +24,11 @@ import configparser
 import collections
 
 
+# Files which have been read to produce configurations, so that users caching them can detect
+# when they become outdated
+imported_files = set()
+
+
 def argToInt(value):
 	""" Given a size or addresse of the type passed in args	(ie 512KB or 1MB) then return the value in bytes.
 	In case of neither KB or MB was specified, 0x prefix can be used.
@@ -116,6 +121,8 @@ def get_config_file(file_path, interpret=False, find=False, path=None, paths=Non
                 file_path, ":".join(paths)))
         file_path = new_file_path
 
+    imported_files.add(os.path.abspath(file_path))
+
     with io.open(file_path, 'r', encoding='utf-8') as fd:
         config_dict = json.load(fd, object_pairs_hook=OrderedDict)
         return config_dict
@@ -265,6 +272,9 @@ class config_object(config):
 
                 module = importlib.import_module(generator.replace('/', '.'))
 
+                if getattr(module, '__file__', None) is not None:
+                    imported_files.add(os.path.abspath(module.__file__))
+
                 self.merge(module.get_config(config_object(current_config.get_dict(), interpret, path, gen=False, indent=indent)))
 
             else:
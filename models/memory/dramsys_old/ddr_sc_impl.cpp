@@ -137,6 +137,8 @@ vp::io_req_status_e ddr::req(void *__this, vp::io_req *req)
 
 int ddr::build()
 {
+  this->checkpoint_unsupported();
+
   traces.new_trace("trace", &trace, vp::DEBUG);
   in.set_req_meth(&ddr::req);
   new_slave_port("input", &in);
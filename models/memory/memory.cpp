@@ -24,6 +24,9 @@
 #include <vp/itf/wire.hpp>
 #include <stdio.h>
 #include <string.h>
+#include <fcntl.h>
+#include <unistd.h>
+#include <sys/mman.h>
 
 
 class memory : public vp::component
@@ -35,6 +38,7 @@ public:
     int build();
     void start();
     void reset(bool active);
+    void checkpoint_io(vp::checkpoint *ckpt);
 
     static vp::io_req_status_e req(void *__this, vp::io_req *req);
 
@@ -46,6 +50,8 @@ private:
     vp::io_req_status_e handle_read(uint64_t addr, uint64_t size, uint8_t *data);
     vp::io_req_status_e handle_atomic(uint64_t addr, uint64_t size, uint8_t *in_data, uint8_t *out_data,
         vp::io_req_opcode_e opcode, int initiator);
+    void image_save(std::string path, uint8_t *data, uint64_t size);
+    void image_restore(std::string path, uint8_t *data, uint64_t size);
 
     vp::trace trace;
     vp::io_slave in;
@@ -337,6 +343,121 @@ void memory::reset(bool active)
 
 
 
+void memory::image_save(std::string path, uint8_t *data, uint64_t size)
+{
+    // The image is a raw copy of the memory, so that it can be mapped, but only the pages which
+    // are not empty are written, so that the file is sparse
+    int fd = open(path.c_str(), O_WRONLY | O_CREAT | O_TRUNC, 0644);
+    if (fd == -1 || ftruncate(fd, size))
+    {
+        if (fd != -1) close(fd);
+        throw std::runtime_error("Failed to create memory image (path: " + path + ", error: " +
+            strerror(errno) + ")");
+    }
+
+    const uint64_t page_size = 4096;
+    static const uint8_t empty_page[page_size] = {0};
+
+    for (uint64_t offset = 0; offset < size; offset += page_size)
+    {
+        uint64_t iter_size = std::min(page_size, size - offset);
+        if (memcmp(&data[offset], empty_page, iter_size) != 0)
+        {
+            if (pwrite(fd, &data[offset], iter_size, offset) != (ssize_t)iter_size)
+            {
+                close(fd);
+                throw std::runtime_error("Failed to write memory image (path: " + path + ", error: " +
+                    strerror(errno) + ")");
+            }
+        }
+    }
+
+    close(fd);
+}
+
+
+
+void memory::image_restore(std::string path, uint8_t *data, uint64_t size)
+{
+    int fd = open(path.c_str(), O_RDONLY);
+    if (fd == -1)
+    {
+        throw std::runtime_error("Failed to open memory image (path: " + path + ", error: " +
+            strerror(errno) + ")");
+    }
+
+    if (lseek(fd, 0, SEEK_END) != (off_t)size)
+    {
+        close(fd);
+        throw std::runtime_error("Memory image size does not match memory size (path: " + path + ")");
+    }
+
+    if (size)
+    {
+        void *image = mmap(NULL, size, PROT_READ, MAP_PRIVATE, fd, 0);
+        if (image == MAP_FAILED)
+        {
+            close(fd);
+            throw std::runtime_error("Failed to map memory image (path: " + path + ", error: " +
+                strerror(errno) + ")");
+        }
+
+        memcpy(data, image, size);
+        munmap(image, size);
+    }
+
+    close(fd);
+}
+
+
+
+void memory::checkpoint_io(vp::checkpoint *ckpt)
+{
+    ckpt->io(this->next_packet_start);
+    ckpt->io(this->powered_up);
+    ckpt->io(this->last_access_timestamp);
+
+    uint32_t nb_reservations = this->res_table.size();
+    ckpt->io(nb_reservations);
+    if (ckpt->is_restore())
+    {
+        this->res_table.clear();
+        for (uint32_t i=0; i<nb_reservations; i++)
+        {
+            uint64_t initiator, addr;
+            ckpt->io(initiator);
+            ckpt->io(addr);
+            this->res_table[initiator] = addr;
+        }
+    }
+    else
+    {
+        for (auto &it: this->res_table)
+        {
+            uint64_t initiator = it.first, addr = it.second;
+            ckpt->io(initiator);
+            ckpt->io(addr);
+        }
+    }
+
+    std::string path = ckpt->file_path(this->get_path(), "mem");
+    if (ckpt->is_restore())
+    {
+        this->image_restore(path, this->mem_data, this->size);
+    }
+    else
+    {
+        this->image_save(path, this->mem_data, this->size);
+    }
+
+    if (this->check_mem)
+    {
+        ckpt->io(this->check_mem, (this->size + 7) / 8);
+    }
+}
+
+
+
 void memory::power_ctrl_sync(void *__this, bool value)
 {
     memory *_this = (memory *)__this;
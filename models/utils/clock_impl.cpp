@@ -32,6 +32,7 @@ public:
 
     int build();
     void reset(bool active);
+    void checkpoint_io(vp::checkpoint *ckpt);
 
 private:
     static void edge_handler(void *__this, vp::clock_event *event);
@@ -151,6 +152,15 @@ void Clock::reset(bool active)
     }
 }
 
+void Clock::checkpoint_io(vp::checkpoint *ckpt)
+{
+    ckpt->io(this->value);
+    ckpt->io(this->target_frequency);
+    ckpt->io(this->frequency);
+    ckpt->io(this->powered_on);
+    ckpt->io(this->start_time);
+}
+
 extern "C" vp::component *vp_constructor(js::config *config)
 {
     return new Clock(config);
@@ -228,6 +228,8 @@ dpi_chip_wrapper::dpi_chip_wrapper(js::config *config)
 
 int dpi_chip_wrapper::build()
 {
+    this->checkpoint_unsupported();
+
     traces.new_trace("trace", &trace, vp::DEBUG);
 
     js::config *groups = get_js_config()->get("groups");
@@ -18,7 +18,7 @@ import gsystree as st
 
 class Clock_domain(st.Component):
 
-    def __init__(self, parent, name, frequency, factor=1):
+    def __init__(self, parent, name, frequency, factor=1, partition=None):
         super(Clock_domain, self).__init__(parent, name)
 
         self.set_component('vp.clock_domain_impl')
@@ -28,6 +28,11 @@ class Clock_domain(st.Component):
             'factor': factor
         })
 
+        # Clock domains of the same partition, and all the components they are clocking, are
+        # executed on the same thread. Partitions must only interact through partition bridges.
+        if partition is not None:
+            self.add_property('partition', partition)
+
     def gen_gtkw(self, tree, comp_traces):
 
         tree.add_trace(self, 'cycles', 'cycles', tag='clock')